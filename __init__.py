@@ -1,4 +1,22 @@
-from .events import BaseEvent
+from .utils import LazyEvent
 
-#  логгер с базовыми атрибутами
-logger = BaseEvent()  # TS|0|YOUR_COMPANY|0.8|IBS|ClassID|View|Severity|
+
+def __getattr__(name):
+    """
+    Отложенный импорт BaseEvent: cef_logger и pydantic загружаются только при первом использовании.
+    """
+    if name == 'BaseEvent':
+        from .events import BaseEvent
+
+        return BaseEvent
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def _create_logger():
+    from .events import BaseEvent
+
+    return BaseEvent()
+
+
+#  логгер с базовыми атрибутами, создается при первом обращении
+logger = LazyEvent(_create_logger)  # TS|0|YOUR_COMPANY|0.8|IBS|ClassID|View|Severity|
@@ -0,0 +1,270 @@
+"""
+Архив лог-сообщений со сжатием и индексом блоков.
+Сообщения пишутся в файл блоками - независимыми gzip-членами, поэтому любой блок
+распаковывается отдельно, а файл целиком остается корректным gzip (zcat, zgrep).
+Рядом с архивом ведется индекс блоков (<архив>.idx): смещение, размер, диапазоны «end»
+и externalId, - по которому чтение периода или externalId не распаковывает весь файл.
+"""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from .parser import iter_messages
+
+INDEX_SUFFIX = '.idx'
+
+# параметры «end» и externalId в расширениях, если у LogRecord нет записей событий
+_END = re.compile(r'(?<=[| ])end=(\d+)')
+_EXTERNAL_ID = re.compile(r'(?<=[| ])externalId=(\d+)')
+
+
+class ArchiveHandler(logging.Handler):
+    """
+    Обработчик, сжимающий лог-сообщения блоками по block_bytes байт несжатых данных.
+
+    В потоке запроса сообщение только кладется в очередь, а сжатие и запись выполняет
+    фоновый поток. Неполный блок записывается через flush_interval секунд после
+    первого сообщения в нем и при закрытии обработчика.
+
+        BaseEvent.EMITTERS = (ArchiveHandler('/var/log/cef/audit.log.gz'),)
+    """
+
+    def __init__(
+        self,
+        path,
+        block_bytes=1024 * 1024,
+        compresslevel=6,
+        flush_interval=60.0,
+        queue_size=100_000,
+    ):
+        """
+        Args:
+            path (str): путь к файлу архива
+            block_bytes (int): размер несжатых данных блока
+            compresslevel (int): уровень сжатия gzip
+            flush_interval (float): максимальное время ожидания неполного блока
+            queue_size (int): размер очереди сообщений, при переполнении сообщения отбрасываются
+        """
+        super().__init__()
+        self.path = path
+        self.block_bytes = block_bytes
+        self.compresslevel = compresslevel
+        self.flush_interval = flush_interval
+        self.dropped = 0  # количество сообщений, отброшенных при переполнении очереди
+        self._queue = queue.Queue(queue_size)
+
+        self._offset = _repair(path)
+        self._file = open(path, 'ab')
+        self._index = open(path + INDEX_SUFFIX, 'a', encoding='utf-8')
+        self._writer = threading.Thread(target=self._write, name='cef-archive-writer', daemon=True)
+        self._writer.start()
+
+    def emit(self, record):
+        try:
+            item = (self.format(record), *self.get_bounds(record))
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            if mark_dropped := getattr(record, 'mark_dropped', None):
+                mark_dropped()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            self._file.close()
+            self._index.close()
+        super().close()
+
+    @staticmethod
+    def get_bounds(record):
+        """
+        Диапазоны «end» и externalId событий лог-записи.
+
+        Returns:
+            tuple: (первый end, последний end, минимальный externalId, максимальный externalId)
+        """
+        events = getattr(record, 'events', None)
+        if events:
+            ends = [end for event in events if (end := event.get('end')) is not None]
+            ids = [
+                int(value) for event in events if str(value := event.get('externalId')).isdigit()
+            ]
+        else:
+            message = record.getMessage()
+            ends = [int(end) for end in _END.findall(message)]
+            ids = [int(value) for value in _EXTERNAL_ID.findall(message)]
+        return (
+            ends[0] if ends else None,
+            ends[-1] if ends else None,
+            min(ids) if ids else None,
+            max(ids) if ids else None,
+        )
+
+    def _write(self):
+        block = Block()
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                block.add(*item)
+                deadline = deadline or time.monotonic() + self.flush_interval
+            if block.size >= self.block_bytes or (block and time.monotonic() >= deadline):
+                self._flush(block)
+                block, deadline = Block(), None
+        if block:
+            self._flush(block)
+
+    def _flush(self, block):
+        """
+        Сжатие и запись блока, затем запись его описания в индекс.
+        Индекс пишется после данных, поэтому в нем нет ссылок на недописанные блоки.
+        """
+        try:
+            data = gzip.compress(block.data(), self.compresslevel, mtime=0)
+            self._file.write(data)
+            self._file.flush()
+            self._index.write(json.dumps(block.describe(self._offset, len(data))) + '\n')
+            self._index.flush()
+            self._offset += len(data)
+        except Exception:
+            self.handleError(logging.makeLogRecord({'msg': 'Ошибка записи блока архива'}))
+
+
+class Block:
+    """
+    Накапливаемый блок архива: сообщения и диапазоны «end» и externalId.
+    """
+
+    __slots__ = ('messages', 'size', 'first_end', 'last_end', 'first_id', 'last_id')
+
+    def __init__(self):
+        self.messages = []
+        self.size = 0
+        self.first_end = self.last_end = self.first_id = self.last_id = None
+
+    def __bool__(self):
+        return bool(self.messages)
+
+    def add(self, message, first_end, last_end, first_id, last_id):
+        # размер блока считается в байтах, как и block_bytes, а не в символах
+        message = message.encode('utf-8')
+        self.messages.append(message)
+        self.size += len(message) + 1
+        if first_end is not None:
+            self.first_end = first_end if self.first_end is None else min(self.first_end, first_end)
+            self.last_end = last_end if self.last_end is None else max(self.last_end, last_end)
+        if first_id is not None:
+            self.first_id = first_id if self.first_id is None else min(self.first_id, first_id)
+            self.last_id = last_id if self.last_id is None else max(self.last_id, last_id)
+
+    def data(self):
+        return b'\n'.join(self.messages) + b'\n'
+
+    def describe(self, offset, length):
+        return {
+            'offset': offset,
+            'length': length,
+            'count': len(self.messages),
+            'first_end': self.first_end,
+            'last_end': self.last_end,
+            'first_id': self.first_id,
+            'last_id': self.last_id,
+        }
+
+
+class ArchiveReader:
+    """
+    Чтение архива по индексу блоков: распаковываются только блоки, пересекающиеся
+    с запрошенным периодом или содержащие externalId.
+
+        reader = ArchiveReader('/var/log/cef/audit.log.gz')
+        for line in reader.read(start=1700000000, stop=1700086400):
+            ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.blocks = load_index(path)
+
+    def select(self, start=None, stop=None, external_id=None):
+        """
+        Блоки, которые могут содержать события из периода [start, stop] и с externalId.
+        Блоки без значений «end» или externalId не отбрасываются.
+        """
+        for block in self.blocks:
+            if block['first_end'] is not None:
+                if start is not None and block['last_end'] < start:
+                    continue
+                if stop is not None and block['first_end'] > stop:
+                    continue
+            if external_id is not None and block['first_id'] is not None:
+                if not block['first_id'] <= external_id <= block['last_id']:
+                    continue
+            yield block
+
+    def read(self, start=None, stop=None, external_id=None):
+        """
+        Лог-сообщения из выбранных блоков. Фильтрация внутри блока остается вызывающему коду.
+        Сообщения выделяются так же, как при разборе (parser.iter_messages): переводы строк
+        в значениях расширений не разделяют сообщение.
+        """
+        with open(self.path, 'rb') as file:
+            for block in self.select(start, stop, external_id):
+                file.seek(block['offset'])
+                data = gzip.decompress(file.read(block['length']))
+                for _, message in iter_messages(data):
+                    yield message[:-1].decode('utf-8')
+
+
+def load_index(path):
+    """
+    Описания блоков из индекса архива. Недописанная последняя строка игнорируется.
+    """
+    blocks = []
+    try:
+        with open(path + INDEX_SUFFIX, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    blocks.append(json.loads(line))
+                except ValueError:
+                    break
+    except FileNotFoundError:
+        pass
+    return blocks
+
+
+def _repair(path):
+    """
+    Приведение архива и индекса к последнему полностью записанному блоку.
+    Архив без индекса не изменяется: новые блоки дописываются после имеющихся данных.
+
+    Returns:
+        int: размер архива
+    """
+    if not os.path.exists(path + INDEX_SUFFIX):
+        return os.path.getsize(path) if os.path.exists(path) else 0
+    blocks = load_index(path)
+    size = blocks[-1]['offset'] + blocks[-1]['length'] if blocks else 0
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        with open(path, 'r+b') as file:
+            file.truncate(size)
+    with open(path + INDEX_SUFFIX, 'w', encoding='utf-8') as file:
+        file.writelines(json.dumps(block) + '\n' for block in blocks)
+    return size
@@ -0,0 +1,141 @@
+"""
+Аудит каскадного удаления: объекты, которые Django удалит вместе с удаляемым объектом,
+собираются до удаления одним проходом deletion.Collector (тем же, что выполняет удаление)
+и сохраняются только в виде первичных ключей, сгруппированных по моделям.
+
+По собранным объектам формируются сводное событие и события по моделям, в каждом из которых
+не больше batch_size первичных ключей. Количество событий по моделям ограничено max_events,
+поэтому удаление большого дерева объектов не создает неограниченного количества лог-сообщений.
+"""
+
+from .utils import LogLabels, RESTMethods
+
+
+class CascadeGroup:
+    """
+    Каскадно удаляемые объекты одной модели.
+    """
+
+    __slots__ = ('label', 'name', 'count', 'pks')
+
+    def __init__(self, model):
+        self.label = model._meta.label  # app_label.ModelName
+        self.name = model._meta.verbose_name
+        self.count = 0  # количество объектов
+        self.pks = []  # первичные ключи (не больше max_pks)
+
+    def add(self, count, pks, max_pks):
+        self.count += count
+        self.pks.extend(pks[:max_pks - len(self.pks)])
+
+
+class CascadeDeletion:
+    """
+    Объекты, которые будут удалены каскадно вместе с удаляемым объектом.
+    """
+
+    def __init__(self, root, max_pks=1000):
+        """
+        Args:
+            root (Model): удаляемый объект
+            max_pks (int): максимальное количество первичных ключей, сохраняемых для модели
+        """
+        self.root = str(root)
+        self.max_pks = max_pks
+        self.groups = {}  # app_label.ModelName -> CascadeGroup
+
+    @property
+    def total(self):
+        """
+        Количество каскадно удаляемых объектов.
+        """
+        return sum(group.count for group in self.groups.values())
+
+    def add(self, model, count, pks):
+        if not count:
+            return
+        if (group := self.groups.get(model._meta.label)) is None:
+            group = self.groups[model._meta.label] = CascadeGroup(model)
+        group.add(count, pks, self.max_pks)
+
+    def iter_params(self, batch_size=100, max_events=20):
+        """
+        Лог-параметры сводного события и событий по моделям.
+
+        Args:
+            batch_size (int): максимальное количество первичных ключей в одном событии
+            max_events (int): максимальное количество событий по моделям
+
+        Returns:
+            Iterator[dict]: лог-параметры событий, первым - сводного; пусто, если каскадно
+                удаляемых объектов нет
+        """
+        if not self.total:
+            return
+        batches = []
+        for group in self.groups.values():
+            for start in range(0, len(group.pks), batch_size):
+                if len(batches) >= max_events:
+                    break
+                batches.append((group, group.pks[start:start + batch_size]))
+        logged = sum(len(pks) for _, pks in batches)
+        yield {
+            **self._base_params(f'Каскадно удаляет связанные объекты ({self.total})'),
+            'cs2Label': LogLabels.models,
+            'cs2': ', '.join(f'{group.label}={group.count}' for group in self.groups.values()),
+            'cn1Label': LogLabels.objects_count,
+            'cn1': self.total,
+            'cn2Label': LogLabels.omitted_count,
+            'cn2': self.total - logged,
+        }
+        for group, pks in batches:
+            yield {
+                **self._base_params(f'Каскадно удаляет объекты модели «{group.name}»'),
+                'cs2Label': LogLabels.model_name,
+                'cs2': group.label,
+                'cs3Label': LogLabels.identifiers,
+                'cs3': ','.join(map(str, pks)),
+                'cn1Label': LogLabels.objects_count,
+                'cn1': len(pks),
+            }
+
+    def _base_params(self, msg):
+        return {
+            'DeviceEventClassID': RESTMethods.DeviceEventClassID.DELETE,
+            'Severity': RESTMethods.Severity.DELETE,
+            'msg': msg,
+            'cs1Label': LogLabels.object_name,
+            'cs1': self.root,
+        }
+
+
+def collect_cascade(obj, using=None, max_pks=1000):
+    """
+    Сбор объектов, которые будут удалены каскадно вместе с obj, до его удаления.
+
+    Collector сам запрашивает только поля, нужные для удаления, если у модели нет обработчиков
+    сигналов удаления, а связи без сигналов и дальнейших каскадов удаляются одним запросом
+    (fast delete) - для них запрашиваются только первичные ключи, не больше max_pks.
+
+    Args:
+        obj (Model): удаляемый объект
+        using (str): псевдоним подключения к БД
+        max_pks (int): максимальное количество первичных ключей, сохраняемых для модели
+
+    Returns:
+        cascade (CascadeDeletion)
+    """
+    from django.db import router
+    from django.db.models.deletion import Collector
+
+    collector = Collector(using=using or router.db_for_write(obj.__class__, instance=obj))
+    collector.collect([obj])
+    cascade = CascadeDeletion(obj, max_pks)
+    for model, instances in collector.data.items():
+        pks = sorted(instance.pk for instance in instances if instance is not obj)
+        cascade.add(model, len(pks), pks)
+    for queryset in collector.fast_deletes:
+        pks = list(queryset.values_list('pk', flat=True).order_by('pk')[:max_pks + 1])
+        count = len(pks) if len(pks) <= max_pks else queryset.count()
+        cascade.add(queryset.model, count, pks)
+    return cascade
@@ -0,0 +1,321 @@
+"""
+Локальный коллектор лог-сообщений для pre-fork серверов (gunicorn и др.).
+Воркеры отправляют готовые лог-сообщения в Unix datagram-сокет, а коллектор пачками
+записывает их в реальные приемники и назначает единый для хоста externalId.
+
+Запуск из мастер-процесса (например, в хуке gunicorn on_starting):
+
+    start_collector('/run/cef.sock', [logging.FileHandler('/var/log/cef.log')])
+
+или отдельным процессом:
+
+    python -m cef_loggers.collector --socket /run/cef.sock --output /var/log/cef.log
+"""
+
+import argparse
+import collections
+import logging
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+from .encoders import format_events
+from .events import BaseEvent, EventLogRecord
+from .record import EventRecord
+from .render import render_record
+from .utils import ExternalCounter
+
+
+# максимальный размер одного сообщения
+MAX_DATAGRAM_SIZE = 64 * 1024
+
+# длина сообщения перед каждым сообщением датаграммы: CEF не экранирует переводы строк
+# в значениях расширений, поэтому разделять события датаграммы по «\n» нельзя
+FRAME_HEADER = struct.Struct('!I')
+
+# размер приемного буфера сокета коллектора (ограничивается net.core.rmem_max)
+RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+
+# конец CEF-заголовка: семь неэкранированных «|» после «CEF:»
+_CEF_HEADER = re.compile(r'CEF:(?:(?:[^|\\]|\\.)*\|){7}')
+
+# параметр externalId в расширениях: «=» в значениях всегда экранирован,
+# поэтому совпадение однозначно
+_EXTERNAL_ID = re.compile(r'(?<=[| ])externalId=[^ ]*')
+
+
+class CollectorHandler(logging.Handler):
+    """
+    Обработчик на стороне воркера: неблокирующая отправка лог-сообщения в коллектор.
+    События пачки (EventLogRecord) упаковываются в датаграммы не больше MAX_DATAGRAM_SIZE,
+    каждое с длиной в заголовке FRAME_HEADER, а коллектор назначает externalId каждому событию.
+    Если коллектор недоступен или не успевает читать сокет, события датаграммы отбрасываются,
+    счетчик dropped увеличивается, а события отмечаются в записи как отброшенные.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.dropped = 0
+        self._socket = None
+        self._pid = None
+
+    def emit(self, record):
+        try:
+            messages = self.get_messages(record)
+        except Exception:
+            self.handleError(record)
+            return
+        dropped = 0
+        for data, count in self.pack(messages):
+            try:
+                self._get_socket().sendto(data, self.path)
+            except OSError:
+                dropped += count
+        if dropped:
+            self.dropped += dropped
+            if isinstance(record, EventLogRecord):
+                record.mark_dropped(dropped)
+
+    def get_messages(self, record):
+        """
+        Сообщения записи: по одному на событие EventLogRecord (кодировщиком форматтера
+        EncoderFormatter или записи), иначе - отформатированная запись.
+        """
+        return format_events(self, record)
+
+    @staticmethod
+    def pack(messages):
+        """
+        Упаковка сообщений в датаграммы не больше MAX_DATAGRAM_SIZE.
+
+        Returns:
+            Iterator[tuple]: (датаграмма, количество сообщений в ней)
+        """
+        chunk, size = [], 0
+        for message in messages:
+            data = message.encode('utf-8')
+            frame_size = FRAME_HEADER.size + len(data)
+            if chunk and size + frame_size > MAX_DATAGRAM_SIZE:
+                yield b''.join(chunk), len(chunk) // 2
+                chunk, size = [], 0
+            size += frame_size
+            chunk += (FRAME_HEADER.pack(len(data)), data)
+        if chunk:
+            yield b''.join(chunk), len(chunk) // 2
+
+    def close(self):
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+        super().close()
+
+    def _get_socket(self):
+        """
+        Сокет создается заново после fork, чтобы воркеры не делили один дескриптор.
+        """
+        if self._socket is None or self._pid != os.getpid():
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+            self._pid = os.getpid()
+        return self._socket
+
+
+class Collector:
+    """
+    Коллектор: принимает сообщения воркеров, назначает externalId и записывает их
+    в handlers пачками по batch_size сообщений (или раз в flush_interval секунд).
+
+    При переполнении очереди сообщения отбрасываются, а коллектор раз в report_interval
+    секунд публикует событие о противодавлении с количеством отброшенных сообщений
+    и глубиной очереди.
+    """
+
+    def __init__(
+        self,
+        path,
+        handlers,
+        batch_size=256,
+        flush_interval=0.2,
+        queue_size=100_000,
+        report_interval=10.0,
+        external_value=0,
+    ):
+        self.path = path
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.external_counter = ExternalCounter(external_value)
+
+        self.received = self.dropped = self.written = 0
+        self._reported_dropped = 0
+        self._queue = collections.deque()
+        self._ready = threading.Condition()
+        self._stopped = threading.Event()
+        self._socket = None
+
+    def serve_forever(self):
+        """
+        Прием сообщений в текущем потоке и запись в приемники в фоновом.
+        """
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+        self._socket.bind(self.path)
+        self._socket.settimeout(self.flush_interval)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *args: self.stop())
+        writer = threading.Thread(target=self._write, name='cef-collector-writer', daemon=True)
+        writer.start()
+        try:
+            self._receive()
+        finally:
+            self._stopped.set()
+            with self._ready:
+                self._ready.notify()
+            writer.join()
+            self._socket.close()
+            os.unlink(self.path)
+            for handler in self.handlers:
+                handler.close()
+
+    def stop(self):
+        self._stopped.set()
+
+    @staticmethod
+    def unpack(data):
+        """
+        Сообщения датаграммы, упакованной CollectorHandler.pack.
+        """
+        offset = 0
+        while offset < len(data):
+            (size,) = FRAME_HEADER.unpack_from(data, offset)
+            offset += FRAME_HEADER.size
+            yield data[offset:offset + size].decode('utf-8')
+            offset += size
+
+    def assign_external_id(self, message):
+        """
+        Замена externalId воркера единым для хоста значением (в одном событии).
+        Счетчик увеличивается, только если externalId действительно назначен.
+        """
+        if match := _EXTERNAL_ID.search(message):
+            start, end = match.span()
+        elif header := _CEF_HEADER.search(message):
+            start = end = header.end()
+        else:
+            return message
+        external_id = f'externalId={self.external_counter()}'
+        if start == end:
+            external_id += ' '
+        return f'{message[:start]}{external_id}{message[end:]}'
+
+    def report_backpressure(self):
+        """
+        Событие о противодавлении: количество отброшенных сообщений и глубина очереди.
+        """
+        record = EventRecord(
+            {
+                **BaseEvent.__fields__,
+                'DeviceEventClassID': 'backpressure',
+                'Name': 'cef-collector',
+                'Severity': 7,
+                'msg': 'Очередь коллектора переполнена, сообщения отброшены',
+                'cnt': self.dropped - self._reported_dropped,
+                'cn1Label': 'Глубина очереди',
+                'cn1': len(self._queue),
+                'end': int(time.time()),
+            }
+        )
+        self._reported_dropped = self.dropped
+        return render_record(record, syslog_flag=True)
+
+    def _receive(self):
+        while not self._stopped.is_set():
+            try:
+                data = self._socket.recv(MAX_DATAGRAM_SIZE)
+            except socket.timeout:
+                continue
+            self.received += 1
+            if len(self._queue) >= self.queue_size:
+                self.dropped += 1
+                continue
+            self._queue.append(data)
+            if len(self._queue) >= self.batch_size:
+                with self._ready:
+                    self._ready.notify()
+
+    def _write(self):
+        reported_at = time.monotonic()
+        while not self._stopped.is_set() or self._queue:
+            with self._ready:
+                if len(self._queue) < self.batch_size and not self._stopped.is_set():
+                    self._ready.wait(self.flush_interval)
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                # датаграмма клиента, отправившего пачку событий, разбирается по длинам сообщений
+                for message in self.unpack(self._queue.popleft()):
+                    batch.append(self.assign_external_id(message))
+            if (
+                self.dropped > self._reported_dropped
+                and time.monotonic() - reported_at >= self.report_interval
+            ):
+                batch.append(self.report_backpressure())
+                reported_at = time.monotonic()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        """
+        Запись пачки сообщений в каждый приемник одной операцией.
+        """
+        record = logging.makeLogRecord({'msg': '\n'.join(batch)})
+        for handler in self.handlers:
+            handler.handle(record)
+        self.written += len(batch)
+
+
+def start_collector(path, handlers, **options):
+    """
+    Запуск коллектора в дочернем процессе (fork), например, из мастер-процесса gunicorn.
+
+    Returns:
+        process (multiprocessing.Process): процесс коллектора
+    """
+    collector = Collector(path, handlers, **options)
+    process = multiprocessing.get_context('fork').Process(
+        target=collector.serve_forever, name='cef-collector', daemon=True
+    )
+    process.start()
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Коллектор CEF-логов воркеров')
+    parser.add_argument('--socket', required=True, help='путь к Unix-сокету коллектора')
+    parser.add_argument('--output', help='файл для записи логов (по умолчанию stdout)')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--flush-interval', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    handler = logging.FileHandler(args.output) if args.output else logging.StreamHandler(sys.stdout)
+    collector = Collector(
+        args.socket, [handler], batch_size=args.batch_size, flush_interval=args.flush_interval
+    )
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
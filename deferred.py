@@ -0,0 +1,65 @@
+"""
+Отложенное выполнение задач аудита после отправки ответа на запрос.
+
+Задачи хранятся в списке текущего потока и выполняются по сигналу request_finished,
+который Django отправляет при закрытии ответа, то есть после передачи его клиенту
+(в том числе для потоковых ответов). Если сигнал не был получен, задачи выполняются
+в начале следующего запроса этого потока или явным вызовом run_deferred.
+"""
+
+import threading
+
+from . import logger
+from .queries import is_strict_error
+
+
+# максимальное количество задач потока: если сигналы запроса не отправляются (например, вызов
+# представлений вне цикла запроса Django), накопленные задачи выполняются, а не удерживаются
+MAX_DEFERRED_TASKS = 1000
+
+_local = threading.local()
+_connected = False
+_connect_lock = threading.Lock()
+
+
+def defer(task):
+    """
+    Добавление задачи, которая выполнится после отправки ответа на текущий запрос.
+    """
+    if not _connected:
+        _connect()
+    tasks = getattr(_local, 'tasks', None)
+    if tasks is None:
+        tasks = _local.tasks = []
+    elif len(tasks) >= MAX_DEFERRED_TASKS:
+        run_deferred()
+        tasks = _local.tasks
+    tasks.append(task)
+
+
+def run_deferred(**kwargs):
+    """
+    Выполнение отложенных задач текущего потока (обработчик сигналов Django).
+    """
+    tasks = getattr(_local, 'tasks', None)
+    if not tasks:
+        return
+    _local.tasks = []
+    for task in tasks:
+        try:
+            task()
+        except Exception as error:
+            if is_strict_error(error):
+                raise
+            logger.debug(f'Ошибка при выполнении отложенной задачи аудита: {error}')
+
+
+def _connect():
+    global _connected
+    from django.core.signals import request_finished, request_started
+
+    with _connect_lock:
+        if not _connected:
+            request_finished.connect(run_deferred, dispatch_uid='cef_loggers.deferred.finished')
+            request_started.connect(run_deferred, dispatch_uid='cef_loggers.deferred.started')
+            _connected = True
@@ -0,0 +1,162 @@
+"""
+Компактное представление изменений больших значений атрибутов для PATCH-логов.
+Все алгоритмы линейны по размеру значений, чтобы огромные поля не нагружали CPU.
+"""
+
+import hashlib
+import json
+
+
+# типы значений, для которых может включаться компактный режим
+JSON, TEXT, BINARY = 'json', 'text', 'binary'
+
+# размер блока при поиске общего префикса/суффикса строк
+_CHUNK_SIZE = 4096
+
+
+def get_kind(value):
+    """
+    Тип значения атрибута: JSON (dict/list), TEXT (str) или BINARY (bytes).
+    """
+    if isinstance(value, (dict, list)):
+        return JSON
+    if isinstance(value, str):
+        return TEXT
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return BINARY
+    return None
+
+
+def get_size(value):
+    """
+    Размер значения в том виде, в котором оно попадет в лог-сообщение.
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    return len(str(value))
+
+
+def compact_change(old, new, kinds, threshold):
+    """
+    Компактное представление пары «старое значение - новое значение».
+
+    Args:
+        old: старое значение атрибута
+        new: новое значение атрибута
+        kinds (Iterable[str]): типы значений с включенным компактным режимом (JSON, TEXT, BINARY)
+        threshold (int): размер, начиная с которого включается компактный режим
+
+    Returns:
+        tuple|None: (старое значение, изменение) или None, если компактный режим не применим
+    """
+    kind = get_kind(new) if new is not None else get_kind(old)
+    if kind not in kinds or max(get_size(old), get_size(new)) < threshold:
+        return None
+    if kind == BINARY:
+        return digest(old), digest(new)
+    if kind == JSON and old is None:
+        # значения не было: патч строится от пустого значения того же типа
+        old_value = type(new)()
+        return digest(old), json.dumps(json_patch(old_value, new), ensure_ascii=False, default=str)
+    if kind == JSON and get_kind(old) == JSON:
+        return digest(old), json.dumps(json_patch(old, new), ensure_ascii=False, default=str)
+    if kind == TEXT and get_kind(old) == TEXT:
+        return digest(old), json.dumps(text_hunk(old, new), ensure_ascii=False)
+    return digest(old), digest(new)
+
+
+def digest(value):
+    """
+    Хэш и длина значения в байтах: «sha256:<hex>,len:<длина>».
+    """
+    if value is None:
+        return str(None)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    elif not isinstance(value, (bytes, bytearray, memoryview)):
+        value = str(value).encode('utf-8')
+    return f'sha256:{hashlib.sha256(value).hexdigest()},len:{memoryview(value).nbytes}'
+
+
+def json_patch(old, new, path=''):
+    """
+    JSON Patch (RFC 6902) для перехода от old к new за один проход по обоим значениям.
+    Списки сравниваются поэлементно по индексам, без поиска наибольшей общей подпоследовательности.
+    """
+    if type(old) is not type(new) or not isinstance(new, (dict, list)):
+        return [] if old == new else [{'op': 'replace', 'path': path, 'value': new}]
+
+    operations = []
+    if isinstance(new, dict):
+        for key in old.keys() - new.keys():
+            operations.append({'op': 'remove', 'path': f'{path}/{_escape_pointer(key)}'})
+        for key, value in new.items():
+            pointer = f'{path}/{_escape_pointer(key)}'
+            if key not in old:
+                operations.append({'op': 'add', 'path': pointer, 'value': value})
+            else:
+                operations.extend(json_patch(old[key], value, pointer))
+        return operations
+
+    common = min(len(old), len(new))
+    for index in range(common):
+        operations.extend(json_patch(old[index], new[index], f'{path}/{index}'))
+    for index in range(len(old) - 1, common - 1, -1):
+        operations.append({'op': 'remove', 'path': f'{path}/{index}'})
+    for value in new[common:]:
+        operations.append({'op': 'add', 'path': f'{path}/-', 'value': value})
+    return operations
+
+
+def text_hunk(old, new):
+    """
+    Изменение текста одним блоком: позиция, количество удаленных символов и вставленный текст.
+    Общие префикс и суффикс находятся сравнением срезов блоками, то есть за линейное время.
+    """
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old[prefix:], new[prefix:])
+    return {
+        'at': prefix,
+        'delete': len(old) - prefix - suffix,
+        'insert': new[prefix:len(new) - suffix],
+    }
+
+
+def _common_prefix(first, second):
+    limit = min(len(first), len(second))
+    start = 0
+    while start < limit:
+        end = min(start + _CHUNK_SIZE, limit)
+        if first[start:end] != second[start:end]:
+            # бинарный поиск первого отличия внутри блока
+            low, high = start, end
+            while low < high:
+                middle = (low + high) // 2
+                if first[start:middle + 1] == second[start:middle + 1]:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+        start = end
+    return limit
+
+
+def _common_suffix(first, second):
+    limit = min(len(first), len(second))
+    length = 0
+    while length < limit:
+        step = min(_CHUNK_SIZE, limit - length)
+        first_chunk = first[len(first) - length - step:len(first) - length]
+        second_chunk = second[len(second) - length - step:len(second) - length]
+        if first_chunk != second_chunk:
+            return length + _common_prefix(first_chunk[::-1], second_chunk[::-1])
+        length += step
+    return limit
+
+
+def _escape_pointer(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
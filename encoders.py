@@ -0,0 +1,141 @@
+"""
+Кодировщики лог-событий. Все они принимают EventRecord, заполненный классами-параметрами,
+поэтому альтернативные форматы не проходят через рендеринг CEF.
+"""
+
+import json
+import logging
+
+from .render import (
+    calculate_dynamic_fields,
+    escape_header,
+    render_record,
+    render_syslog_header,
+)
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class BaseEncoder:
+    """
+    Базовый класс кодировщика лог-события.
+    """
+
+    def encode(self, record, syslog_flag=False):
+        """
+        Кодирование EventRecord в строку.
+        """
+        raise NotImplementedError
+
+
+class CEFEncoder(BaseEncoder):
+    """
+    Кодирование в CEF (формат по умолчанию).
+    """
+
+    def encode(self, record, syslog_flag=False):
+        return render_record(record, syslog_flag)
+
+
+class JSONLinesEncoder(BaseEncoder):
+    """
+    Кодирование в JSON Lines: одно событие - один JSON-объект в строке.
+    Используется orjson, если он установлен, иначе стандартный json.
+    """
+
+    def encode(self, record, syslog_flag=False):
+        fields = calculate_dynamic_fields(record.as_dict())
+        if orjson is not None:
+            return orjson.dumps(fields, default=str).decode()
+        return json.dumps(fields, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class LEEFEncoder(BaseEncoder):
+    """
+    Кодирование в LEEF 2.0:
+    LEEF:2.0|Vendor|Product|Version|EventID|Delimiter|key=value<Delimiter>key=value
+    """
+
+    # соответствие CEF-ключей предопределенным атрибутам LEEF
+    KEYS = {
+        'Name': 'name',
+        'Severity': 'sev',
+        'suser': 'usrName',
+    }
+
+    HEADER_TPL = 'LEEF:2.0|{}|{}|{}|{}|{}|'
+
+    def __init__(self, delimiter='^'):
+        self.delimiter = delimiter
+        # обратная косая черта экранируется первой, иначе экранированный разделитель
+        # и исходная последовательность «\разделитель» были бы неразличимы
+        self.escape_table = (
+            ('\\', '\\\\'),
+            ('\r', ''),
+            ('\n', ''),
+            (delimiter, f'\\{delimiter}'),
+        )
+
+    def encode(self, record, syslog_flag=False):
+        header = self.HEADER_TPL.format(
+            escape_header(record.DeviceVendor),
+            escape_header(record.DeviceProduct),
+            escape_header(record.DeviceVersion),
+            escape_header(record.DeviceEventClassID),
+            self.delimiter,
+        )
+        attributes = self.delimiter.join(
+            f'{self.KEYS.get(key, key)}={self.escape(value)}' for key, value in self.items(record)
+        )
+        return render_syslog_header(syslog_flag) + header + attributes
+
+    def items(self, record):
+        """
+        Атрибуты события: поля заголовка CEF, не вошедшие в заголовок LEEF, и расширения.
+        """
+        yield 'Name', record.Name
+        yield 'Severity', record.Severity
+        yield from record.items()
+
+    def escape(self, value):
+        if value is None:
+            return ''
+        value = str(value)
+        for char, replacement in self.escape_table:
+            if char in value:
+                value = value.replace(char, replacement)
+        return value
+
+
+class EncoderFormatter(logging.Formatter):
+    """
+    Форматтер для выбора кодировщика на уровне отдельного обработчика (sink):
+
+        handler.setFormatter(EncoderFormatter(JSONLinesEncoder()))
+    """
+
+    def __init__(self, encoder, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoder = encoder
+
+    def format(self, record):
+        if encode := getattr(record, 'encode', None):
+            return encode(self.encoder)
+        return super().format(record)
+
+
+def format_events(handler, record):
+    """
+    Сообщения записи по одному на событие EventLogRecord (кодировщиком форматтера
+    EncoderFormatter обработчика или записи), иначе - отформатированная запись.
+    Нужны обработчикам, которые доставляют события пачки по отдельности.
+    """
+    events = getattr(record, 'events', None)
+    if events is None or len(events) == 1:
+        return (handler.format(record),)
+    encoder = getattr(handler.formatter, 'encoder', None) or record.encoder
+    return [encoder.encode(event, record.syslog_flag) for event in events]
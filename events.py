@@ -3,17 +3,29 @@
 Здесь переопределяются классы из библиотеки cef_logger под ваши особенности.
 """
 
+import itertools
+import logging
 import time
 
 from typing import Any, Union
 
-from pydantic import Field
+from pydantic import Field, ValidationError
 
 from cef_logger import Event
 from cef_logger.fields import Fields
 from cef_logger.schemas import ExtensionFields, MandatoryFields
 
-from .utils import LogLevels
+from .encoders import CEFEncoder
+from .record import EventRecord
+from .render import (
+    PLAIN_TYPES,
+    calculate_dynamic_fields,
+    header_key,
+    render_base_header,
+    render_extensions,
+    render_syslog_header,
+)
+from .utils import LogLevels, external_counter
 
 
 class CustomExtensionFields(ExtensionFields):
@@ -36,6 +48,11 @@ class CustomExtensionFields(ExtensionFields):
     end: Any = Field(default=None)
 
 
+# максимальное количество запомненных проверенных CEF-заголовков
+VALIDATED_HEADERS_SIZE = 4096
+_validated_headers = set()
+
+
 class CustomFields(Fields):
     """
     Переопределение валидации класса Fields.
@@ -50,14 +67,130 @@ class CustomFields(Fields):
         MandatoryFields(**fields)
         CustomExtensionFields(**fields)
 
+    @staticmethod
+    def validate_record(record):
+        """
+        Валидация значений EventRecord без сборки промежуточного экземпляра Fields.
+        Обязательные поля проверяются один раз для каждого сочетания значений заголовка.
+        """
+        try:
+            key = header_key(record.header())
+            validated = key in _validated_headers
+        except (AttributeError, TypeError):
+            key, validated = None, False
+        if not validated:
+            MandatoryFields(**calculate_dynamic_fields(record.mandatory()))
+            if key is not None:
+                if len(_validated_headers) >= VALIDATED_HEADERS_SIZE:
+                    _validated_headers.clear()
+                _validated_headers.add(key)
+        CustomFields.validate_extensions(calculate_dynamic_fields(record.extensions()))
+
+    @staticmethod
+    def validate_extensions(extensions):
+        """
+        Валидация только заданных полей расширения. При создании модели CustomExtensionFields
+        обходятся все поля схемы (больше ста), хотя в записи обычно заполнено несколько,
+        а незаданные поля получают значения по умолчанию без валидации.
+        """
+        fields = CustomExtensionFields.__fields__
+        errors = []
+        for key, value in extensions.items():
+            # ключи, которых нет в схеме, модель игнорирует
+            if (field := fields.get(key)) is not None and field.alias == key:
+                _, error = field.validate(value, {}, loc=key, cls=CustomExtensionFields)
+                if error:
+                    errors.append(error)
+        if errors:
+            raise ValidationError(errors, CustomExtensionFields)
+
+    def render_syslog_header(self):
+        return render_syslog_header(self._syslog_flag)
+
+    def render_base_header(self):
+        return render_base_header(self.mandatory)
+
+    def render_extensions(self):
+        return render_extensions(self.extensions, self.custom)
+
 
-class BaseEvent(Event):
+# атрибуты класса-события, которые являются настройками, а не лог-параметрами
+EVENT_SETTINGS = ('ENCODER',)
+
+
+class EventLogRecord(logging.LogRecord):
+    """
+    LogRecord с записями событий EventRecord. Сообщение кодируется только при первом обращении,
+    поэтому обработчики со своим кодировщиком (EncoderFormatter) не платят за рендеринг CEF.
+    """
+
+    def __init__(self, events, encoder, syslog_flag=False):
+        super().__init__(
+            name='', level=logging.DEBUG, pathname='', lineno=0, msg=None, args=(), exc_info=None
+        )
+        self.events = events
+        self.encoder = encoder
+        self.syslog_flag = syslog_flag
+        self.dropped = 0  # количество событий, отброшенных хотя бы одним приемником
+        self._encoded = {}
+
+    def mark_dropped(self, count=None):
+        """
+        Отметка событий, которые приемник не смог принять (по умолчанию - всех событий записи).
+        """
+        count = len(self.events) if count is None else count
+        self.dropped = max(self.dropped, min(count, len(self.events)))
+
+    def encode(self, encoder):
+        """
+        Кодирование событий записи, результат кэшируется для каждого кодировщика.
+        """
+        if (message := self._encoded.get(encoder)) is None:
+            message = self._encoded[encoder] = '\n'.join(
+                encoder.encode(event, self.syslog_flag) for event in self.events
+            )
+        return message
+
+    @property
+    def msg(self):
+        """
+        Сообщение, закодированное кодировщиком записи при первом обращении: обработчики
+        и фильтры, которые читают record.msg напрямую, получают готовую строку.
+        """
+        if self._msg is None:
+            self._msg = self.encode(self.encoder)
+        return self._msg
+
+    @msg.setter
+    def msg(self, value):
+        self._msg = value
+
+    def getMessage(self):  # noqa: N802
+        return self.msg
+
+
+class EventMeta(type(Event)):
+    """
+    Метакласс событий, исключающий настройки EVENT_SETTINGS из лог-параметров.
+    """
+
+    def __new__(cls, name, bases, namespace):
+        event_class = super().__new__(cls, name, bases, namespace)
+        for key in EVENT_SETTINGS:
+            event_class.__fields__.pop(key, None)
+        return event_class
+
+
+class BaseEvent(Event, metaclass=EventMeta):
     """
     Базовый логгер-класс с дефолтными параметрами
     """
 
     SYSLOG_HEADER = True  # добавляем дату, время, хост в начало лог-сообщения
 
+    # кодировщик лог-сообщения по умолчанию (CEFEncoder, JSONLinesEncoder, LEEFEncoder)
+    ENCODER = CEFEncoder()
+
     # базовые атрибуты лог-сообщения
     Version = 0
     DeviceProduct = 'YOUR_COMPANY'
@@ -73,6 +206,7 @@ class BaseEvent(Event):
                 syslog_flag=self.SYSLOG_HEADER,
                 **self.__fields__,
             )
+            self.record = EventRecord(self.fields.all)
             self.fields.validate()
         except Exception as error:
             self.error_log(error)
@@ -81,18 +215,111 @@ class BaseEvent(Event):
         """
         Добавление CustomFields для валидации данных и параметра «end» в конце лог-сообщения
         """
+        if fields:
+            try:
+                record = self.new_record()
+                record.update(fields)
+            except Exception as error:
+                return self.error_log(error)
+            return self.log_record(record)
+        try:
+            self.fields.custom['end'] = int(time.time())
+            self.emit(self.fields.render())
+        except Exception as error:
+            self.error_log(error)
+
+    def new_record(self):
+        """
+        Новая запись события с базовыми атрибутами логгера.
+        """
+        return self.record.copy()
+
+    def log_record(self, record):
+        """
+        Валидация, добавление параметра «end» и отправка лог-сообщения из EventRecord.
+        """
         try:
-            if fields:
-                fields = CustomFields(syslog_flag=self.SYSLOG_HEADER, **{**self.fields.all, **fields})
-                fields.validate()
-                fields.custom['end'] = int(time.time())
-                self.emit(fields.render())
-            else:
-                self.fields.custom['end'] = int(time.time())
-                self.emit(self.fields.render())
+            self.prepare_record(record)
+            self.publish(record)
         except Exception as error:
             self.error_log(error)
 
+    def prepare_record(self, record):
+        """
+        Валидация и добавление параметра «end» без отправки, например, для отправки пачкой.
+        Значения непростых типов (исключения, объекты моделей) заменяются строками, чтобы
+        запись в очередях обработчиков не удерживала объекты запроса.
+        """
+        for key, value in record.items():
+            if not isinstance(value, PLAIN_TYPES):
+                record[key] = str(value)
+        CustomFields.validate_record(record)
+        if 'end' in record.extension_order:
+            # переданный явно «end» заменяется на месте, чтобы не выводить его дважды
+            record['end'] = int(time.time())
+        else:
+            # в том числе «end» копии уже подготовленной записи
+            record.custom['end'] = int(time.time())
+
+    def emit_many(self, events, batch_size=1000, external_id=True):
+        """
+        Отправка множества событий пачками, например, из фоновых задач и management-команд.
+
+        Записи создаются из общей записи с базовыми атрибутами, в каждой пачке externalId
+        резервируется одним вызовом счетчика, а пачка отправляется во все EMITTERS одним LogRecord
+        (одно сообщение из строк, разделенных переводом строки; CollectorHandler разбивает пачку
+        на датаграммы по событиям). События читаются из итератора по одной пачке, поэтому
+        генератор любой длины обрабатывается в постоянной памяти.
+        Событие, не прошедшее валидацию, пропускается с информационным лог-сообщением.
+
+        Args:
+            events (Iterable[dict]): лог-параметры событий
+            batch_size (int): количество событий в одном LogRecord
+            external_id (bool): назначать externalId (значение из лог-параметров имеет приоритет)
+
+        Returns:
+            sent (int): количество отправленных событий без отброшенных приемниками
+        """
+        sent = 0
+        events = iter(events)
+        while batch := list(itertools.islice(events, batch_size)):
+            external_value = (
+                external_counter.external_increment(len(batch)) - len(batch) if external_id else 0
+            )
+            records = []
+            for fields in batch:
+                try:
+                    record = self.new_record()
+                    if external_id:
+                        external_value += 1
+                        record['externalId'] = external_value
+                    record.update(fields)
+                    self.prepare_record(record)
+                except Exception as error:
+                    self.error_log(error)
+                    continue
+                records.append(record)
+            if records:
+                try:
+                    dropped = self.publish(*records)
+                except Exception as error:
+                    self.error_log(error)
+                    continue
+                sent += len(records) - dropped
+        return sent
+
+    def publish(self, *records):
+        """
+        Отправка записей событий во все EMITTERS одним LogRecord.
+
+        Returns:
+            dropped (int): количество событий, отброшенных хотя бы одним приемником
+        """
+        log_record = EventLogRecord(records, self.ENCODER, self.SYSLOG_HEADER)
+        for emitter in self.EMITTERS:
+            emitter.handle(log_record)
+        return log_record.dropped
+
     def error_log(self, error):
         """
         Отправка информационного лог-сообщения в случае ошибок
@@ -0,0 +1,5 @@
+"""
+Нагрузочный стенд для измерения накладных расходов CEFLogMixin.
+
+Запуск: python -m cef_loggers.loadtest --requests 2000 --processes 4
+"""
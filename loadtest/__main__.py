@@ -0,0 +1,219 @@
+"""
+Запуск нагрузочного стенда: поднимает WSGI-сервер с SQLite и нагружает его
+из нескольких процессов смесью GET list/retrieve, POST, PATCH и DELETE.
+
+Для каждого режима логирования выводятся пропускная способность, задержки p50/p95/p99,
+среднее количество SQL-запросов и разница с режимом disable_log = True.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socketserver
+import statistics
+import time
+
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+
+# доли операций в нагрузке по умолчанию
+DEFAULT_MIX = {'list': 30, 'retrieve': 40, 'post': 10, 'patch': 15, 'delete': 5}
+
+
+def setup_django(log_output, stats=False):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'{__package__}.settings')
+
+    import django
+
+    django.setup()
+
+    from ..events import BaseEvent
+
+    # лог-сообщения рендерятся и записываются полностью, но не засоряют вывод стенда
+    BaseEvent.EMITTERS = (logging.FileHandler(log_output),)
+    if stats:
+        from ..stats import StatsHandler
+
+        BaseEvent.EMITTERS += (StatsHandler(),)
+
+
+def prepare_database(objects):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from .models import Item, Profile
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    Item.objects.all().delete()
+    get_user_model().objects.all().delete()
+    user = get_user_model().objects.create(username='loadtest')
+    Profile.objects.create(user=user, full_name='Куратов Проектович')
+    Item.objects.bulk_create(
+        Item(name=f'item {index}', description='описание ' * 20, config={'index': index})
+        for index in range(objects)
+    )
+    return list(Item.objects.values_list('id', flat=True))
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """
+    WSGI-сервер с потоком на соединение: клиенты-процессы обслуживаются параллельно,
+    как в многопоточном WSGI-сервере, и не ждут освобождения единственного потока.
+    """
+
+    daemon_threads = True
+
+
+def serve(port, ready):
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server(
+        '127.0.0.1',
+        port,
+        get_wsgi_application(),
+        server_class=ThreadingWSGIServer,
+        handler_class=QuietHandler,
+    )
+    ready.set()
+    server.serve_forever()
+
+
+def request(connection, method, path, body=None):
+    """
+    Выполнение запроса. Returns: (задержка в секундах, количество SQL-запросов, тело ответа)
+    """
+    headers = {'Content-Type': 'application/json'}
+    payload = json.dumps(body) if body is not None else None
+    started = time.perf_counter()
+    connection.request(method, path, payload, headers)
+    response = connection.getresponse()
+    data = response.read()
+    elapsed = time.perf_counter() - started
+    return elapsed, int(response.getheader('X-Query-Count', 0)), data
+
+
+def run_client(args):
+    """
+    Нагрузка из одного процесса. Returns: список (операция, задержка, SQL-запросы)
+    """
+    port, prefix, ids, mix, count, seed = args
+    rng = random.Random(seed)
+    operations = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    results = []
+    for operation in operations:
+        if operation == 'list':
+            measured = request(connection, 'GET', f'/{prefix}/')
+        elif operation == 'retrieve':
+            measured = request(connection, 'GET', f'/{prefix}/{rng.choice(ids)}/')
+        elif operation == 'post':
+            body = {'name': 'new', 'config': {'a': 1}}
+            measured = request(connection, 'POST', f'/{prefix}/', body)
+        elif operation == 'patch':
+            body = {'name': f'name {rng.random()}', 'config': {'index': rng.random()}}
+            measured = request(connection, 'PATCH', f'/{prefix}/{rng.choice(ids)}/', body)
+        else:
+            # удаляется объект, созданный тем же клиентом, чтобы не уменьшать общий набор
+            created = request(connection, 'POST', f'/{prefix}/', {'name': 'to delete'})[2]
+            created = json.loads(created)
+            measured = request(connection, 'DELETE', f'/{prefix}/{created["id"]}/')
+        results.append((operation, measured[0], measured[1]))
+    connection.close()
+    return results
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_variant(port, prefix, ids, mix, requests, processes):
+    per_process = max(1, requests // processes)
+    tasks = [(port, prefix, ids, mix, per_process, index) for index in range(processes)]
+    started = time.perf_counter()
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        results = [item for chunk in pool.map(run_client, tasks) for item in chunk]
+    elapsed = time.perf_counter() - started
+    latencies = [latency for _, latency, _ in results]
+    return {
+        'requests': len(results),
+        'rps': len(results) / elapsed,
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p95': percentile(latencies, 0.95) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'queries': statistics.mean(queries for _, _, queries in results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочный стенд CEFLogMixin')
+    parser.add_argument('--requests', type=int, default=2000, help='запросов на каждый режим')
+    parser.add_argument('--processes', type=int, default=4, help='количество процессов-клиентов')
+    parser.add_argument('--objects', type=int, default=200, help='количество объектов в базе')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument(
+        '--variants',
+        nargs='+',
+        help='режимы логирования (plain, base, cef, extend), по умолчанию все',
+    )
+    parser.add_argument(
+        '--mix',
+        type=json.loads,
+        default=DEFAULT_MIX,
+        help=f'доли операций в формате JSON, по умолчанию {json.dumps(DEFAULT_MIX)}',
+    )
+    parser.add_argument('--log-output', default=os.devnull, help='файл для лог-сообщений')
+    parser.add_argument(
+        '--stats', action='store_true', help='учитывать события в StatsHandler (см. stats)'
+    )
+    args = parser.parse_args(argv)
+
+    setup_django(args.log_output, args.stats)
+
+    from .views import VARIANTS
+
+    if unknown := set(args.variants or ()) - VARIANTS.keys():
+        parser.error(f'неизвестные режимы: {", ".join(sorted(unknown))}')
+    ids = prepare_database(args.objects)
+
+    ready = multiprocessing.get_context('fork').Event()
+    server = multiprocessing.get_context('fork').Process(
+        target=serve, args=(args.port, ready), daemon=True
+    )
+    server.start()
+    ready.wait(10)
+
+    reports = {}
+    try:
+        variants = [variant for variant in args.variants or VARIANTS if variant != 'plain']
+        for prefix in ['plain', *variants]:
+            reports[prefix] = run_variant(
+                args.port, prefix, ids, args.mix, args.requests, args.processes
+            )
+    finally:
+        server.terminate()
+
+    baseline = reports['plain']
+    print(
+        f'{"режим":<8} {"запросов":>9} {"rps":>9} {"p50, мс":>9} {"p95, мс":>9} {"p99, мс":>9}'
+        f' {"SQL":>6} {"+SQL":>6}'
+    )
+    for prefix, report in reports.items():
+        print(
+            f'{prefix:<8} {report["requests"]:>9} {report["rps"]:>9.1f} {report["p50"]:>9.2f} '
+            f'{report["p95"]:>9.2f} {report["p99"]:>9.2f} {report["queries"]:>6.2f} '
+            f'{report["queries"] - baseline["queries"]:>+6.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
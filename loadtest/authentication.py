@@ -0,0 +1,15 @@
+"""
+Аутентификация нагрузочного стенда.
+"""
+
+from django.contrib.auth import get_user_model
+from rest_framework.authentication import BaseAuthentication
+
+
+class LoadTestAuthentication(BaseAuthentication):
+    """
+    Все запросы выполняются от имени первого пользователя стенда.
+    """
+
+    def authenticate(self, request):
+        return get_user_model().objects.first(), None
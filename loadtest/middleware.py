@@ -0,0 +1,26 @@
+"""
+Подсчет SQL-запросов каждого HTTP-запроса.
+"""
+
+from django.db import connection
+
+
+class QueryCountMiddleware:
+    """
+    Добавляет в ответ заголовок X-Query-Count с количеством выполненных SQL-запросов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        response['X-Query-Count'] = len(queries)
+        return response
@@ -0,0 +1,39 @@
+"""
+Настройки Django-проекта нагрузочного стенда.
+"""
+
+import os
+import tempfile
+
+
+SECRET_KEY = 'loadtest'
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+USE_TZ = True
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'rest_framework',
+    __package__,
+]
+
+MIDDLEWARE = [
+    f'{__package__}.middleware.QueryCountMiddleware',
+]
+
+ROOT_URLCONF = f'{__package__}.urls'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'CEF_LOADTEST_DB', os.path.join(tempfile.gettempdir(), 'cef_loadtest.sqlite3')
+        ),
+    },
+}
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [f'{__package__}.authentication.LoadTestAuthentication'],
+    'DEFAULT_PERMISSION_CLASSES': [],
+}
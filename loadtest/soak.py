@@ -0,0 +1,191 @@
+"""
+Длительный прогон для поиска утечек памяти: сотни тысяч событий через BaseEvent.__call__
+и CEFLogMixin.dispatch в одном процессе, включая ошибки (400, 404, исключение во ViewSet,
+невалидные лог-параметры).
+
+Утечкой считается:
+- рост памяти (tracemalloc) от первой контрольной точки до последней выше порога,
+  тогда выводятся строки кода с наибольшим ростом;
+- состояние аудита (AuditState, ParamsSelector), которое не освобождается подсчетом ссылок
+  сразу после запроса: в каждой контрольной точке операции выполняются с отключенным
+  сборщиком циклических ссылок, после чего считаются оставшиеся объекты;
+- рост очереди отложенных задач аудита (deferred) между контрольными точками.
+Во всех случаях процесс завершается с кодом 1.
+
+Запуск: python -m cef_loggers.loadtest.soak --iterations 200000
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import tracemalloc
+
+from .__main__ import prepare_database, setup_django
+
+
+class SoakError(Exception):
+    """
+    Ошибка во ViewSet для проверки ветки с исключением.
+    """
+
+
+def get_rss():
+    """
+    Resident set size процесса в байтах (0, если /proc недоступен).
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def create_workload(ids):
+    """
+    Бесконечный цикл операций: каждая операция - функция без аргументов.
+    Запросы выполняются через WSGIHandler, как в WSGI-сервере, без тестового клиента Django.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from .. import logger
+    from .views import CEFItemViewSet
+
+    class FailingViewSet(CEFItemViewSet):
+        def retrieve(self, request, *args, **kwargs):
+            raise SoakError('ошибка soak-теста ' * 20)
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    failing = FailingViewSet.as_view({'get': 'retrieve'})
+    objects = itertools.cycle(ids)
+
+    def call(method, path, data=None):
+        body = json.dumps(data) if data is not None else ''
+        request = factory.generic(method, path, body, content_type='application/json')
+        response = handler(request.environ, lambda status, headers: None)
+        for _ in response:
+            pass
+        response.close()
+
+    def view_failing():
+        path = f'/cef/{next(objects)}/'
+        request = factory.get(path)
+        request.resolver_match = resolve(path)
+        try:
+            failing(request, pk=request.resolver_match.kwargs['pk'])
+        except SoakError:
+            pass
+
+    def patch():
+        pk = next(objects)
+        call('PATCH', f'/cef/{pk}/', {'name': f'name {pk}'})
+
+    operations = (
+        lambda: call('GET', '/base/'),
+        lambda: call('GET', f'/cef/{next(objects)}/'),
+        patch,
+        lambda: call('PATCH', '/extend/0/', {'name': 'x'}),
+        lambda: call('POST', '/cef/', {}),
+        view_failing,
+        lambda: logger(msg='soak', suser='soak', cs1=SoakError('значение непростого типа')),
+        lambda: logger(Severity='не число'),
+        lambda: logger.info('soak', {'cs2': list(range(10))}),
+    )
+    return itertools.cycle(operations)
+
+
+def count_pending(workload, operations):
+    """
+    Количество объектов состояния аудита, оставшихся после операций без сборки мусора.
+    """
+    from ..params.main import ParamsSelector
+    from ..state import AuditState
+
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(operations):
+            next(workload)()
+        return sum(type(item) in (AuditState, ParamsSelector) for item in gc.get_objects())
+    finally:
+        gc.enable()
+
+
+def count_deferred():
+    """
+    Количество отложенных задач аудита текущего потока, ожидающих выполнения.
+    """
+    from ..deferred import _local
+
+    return len(getattr(_local, 'tasks', ()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Поиск утечек памяти в слое аудита')
+    parser.add_argument('--iterations', type=int, default=200_000, help='количество операций')
+    parser.add_argument('--checkpoints', type=int, default=10, help='количество контрольных точек')
+    parser.add_argument('--warmup', type=int, default=5_000, help='операций до первой точки')
+    parser.add_argument('--objects', type=int, default=200, help='количество объектов в базе')
+    parser.add_argument('--max-growth', type=float, default=1.0, help='допустимый рост памяти, МБ')
+    parser.add_argument('--frames', type=int, default=5, help='глубина трассировки tracemalloc')
+    args = parser.parse_args(argv)
+
+    setup_django(os.devnull)
+    workload = create_workload(prepare_database(args.objects))
+    for _ in range(args.warmup):
+        next(workload)()
+    gc.collect()
+    tracemalloc.start(args.frames)
+
+    step = max(1, args.iterations // args.checkpoints)
+    first = None
+    failed = False
+    print(
+        f'{"операций":>10} {"tracemalloc, МБ":>16} {"RSS, МБ":>9} {"не освобождено":>15}'
+        f' {"в очереди":>10}'
+    )
+    for done in range(0, args.iterations + 1, step):
+        if done:
+            for _ in range(step):
+                next(workload)()
+        pending = count_pending(workload, 100)
+        deferred = count_deferred()
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        current = tracemalloc.get_traced_memory()[0]
+        print(
+            f'{done:>10} {current / 2 ** 20:>16.2f} {get_rss() / 2 ** 20:>9.1f} {pending:>15}'
+            f' {deferred:>10}',
+            flush=True,
+        )
+        # проверка в каждой контрольной точке: утечка, которая позже освобождается
+        # (например, при вытеснении из кэша), тоже должна быть найдена
+        if pending:
+            print(f'Состояние аудита не освобождается подсчетом ссылок: {pending} объектов')
+            failed = True
+        if first is None:
+            first = snapshot, current, deferred
+        elif deferred > first[2]:
+            print(f'Очередь отложенных задач растет: {first[2]} -> {deferred}')
+            failed = True
+
+    growth = (current - first[1]) / 2 ** 20
+    if growth > args.max_growth:
+        print(f'Рост памяти {growth:.2f} МБ больше {args.max_growth} МБ, наибольший рост:')
+        for stat in snapshot.compare_to(first[0], 'traceback')[:10]:
+            print(stat)
+            for line in stat.traceback.format()[-6:]:
+                print('   ', line)
+        failed = True
+    else:
+        print(f'Рост памяти {growth:.2f} МБ в пределах {args.max_growth} МБ')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
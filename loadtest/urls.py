@@ -0,0 +1,10 @@
+from rest_framework.routers import SimpleRouter
+
+from .views import VARIANTS
+
+
+router = SimpleRouter()
+for prefix, viewset in VARIANTS.items():
+    router.register(prefix, viewset, basename=prefix)
+
+urlpatterns = router.urls
@@ -0,0 +1,61 @@
+"""
+ViewSet нагрузочного стенда в разных режимах логирования.
+"""
+
+from rest_framework import serializers, viewsets
+
+from ..mixins import CEFLogMixin
+from .models import Item
+
+
+class ItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Item
+        fields = ('id', 'name', 'description', 'config')
+
+
+class ItemViewSet(CEFLogMixin, viewsets.ModelViewSet):
+    """
+    Базовый лог CEFLogMixin.
+    """
+
+    queryset = Item.objects.all()
+    serializer_class = ItemSerializer
+    names_for_logger = ('объект', 'объект', 'объектов')
+
+    def get_log_instance(self):
+        return self.kwargs.get('pk')
+
+
+class PlainItemViewSet(ItemViewSet):
+    """
+    Логирование отключено: точка отсчета для сравнения.
+    """
+
+    disable_log = True
+
+
+class CEFItemViewSet(ItemViewSet):
+    """
+    Расширенный CEF-лог.
+    """
+
+    cef_log = True
+
+
+class ExtendItemViewSet(ItemViewSet):
+    """
+    Расширенный CEF-лог с is_extend_patch.
+    """
+
+    cef_log = True
+    is_extend_patch = True
+
+
+# режимы логирования: префикс URL -> ViewSet
+VARIANTS = {
+    'plain': PlainItemViewSet,
+    'base': ItemViewSet,
+    'cef': CEFItemViewSet,
+    'extend': ExtendItemViewSet,
+}
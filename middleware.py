@@ -0,0 +1,141 @@
+"""
+Middleware для CEF-логов запросов к представлениям, которые не наследуют CEFLogMixin:
+обычные Django-представления, админка, функции-представления DRF.
+
+Логируются только представления из таблицы политик CEF_AUDIT_POLICIES в settings:
+
+    MIDDLEWARE = [..., 'cef_loggers.middleware.AuditMiddleware']
+
+    CEF_AUDIT_POLICIES = {
+        'admin:login': {'severity': 8, 'message': 'Вход в админку'},
+        'reports-export': {'sampled': 0.1},
+        'healthcheck': {'enabled': False},
+    }
+"""
+
+import functools
+import random
+
+from . import logger
+from .params.main import OutcomeParams
+from .utils import LogLevels, RESTMethods, get_required_log_attributes
+
+
+class AuditPolicy:
+    """
+    Политика логирования представления.
+    """
+
+    __slots__ = ('enabled', 'sampled', 'severity', 'message')
+
+    def __init__(self, enabled=True, sampled=1.0, severity=None, message=None):
+        """
+        Args:
+            enabled (bool): логировать ли запросы к представлению
+            sampled (float): доля логируемых запросов от 0 до 1
+            severity (int): уровень важности события вместо уровня по методу запроса
+            message (str): msg события вместо сообщения по методу запроса
+        """
+        self.enabled = enabled
+        self.sampled = sampled
+        self.severity = severity
+        self.message = message
+
+    def is_logged(self):
+        return self.enabled and (self.sampled >= 1 or random.random() < self.sampled)
+
+
+class AuditTarget:
+    """
+    Данные запроса в том виде, в котором классы-параметры получают их из ViewSet.
+    """
+
+    __slots__ = ('request', 'response', 'error', 'kwargs')
+
+    def __init__(self, request, response, error=None):
+        self.request = request
+        self.response = response
+        self.error = error
+        self.kwargs = getattr(request.resolver_match, 'kwargs', {})
+
+
+class AuditMiddleware:
+    """
+    Middleware, публикующее CEF-лог после отправки ответа.
+
+    Таблица политик компилируется один раз при создании middleware, поэтому для представлений
+    без политики накладные расходы - один поиск в словаре. Представления с CEFLogMixin
+    не логируются повторно.
+    """
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        self.get_response = get_response
+        self.policies = (
+            compile_policies(getattr(settings, 'CEF_AUDIT_POLICIES', {}))
+            if LogLevels.is_cef_level()
+            else {}
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # исключение удаляется из запроса в любом случае: его трассировка ссылается на запрос
+        error = request.__dict__.pop('_cef_audit_error', None)
+        resolver_match = request.resolver_match
+        policy = self.policies.get(resolver_match.view_name) if resolver_match else None
+        if policy is None:
+            return response
+        if not policy.is_logged() or is_mixin_view(resolver_match.func):
+            return response
+
+        # лог публикуется при закрытии ответа, то есть после его отправки клиенту
+        # (WSGI-сервер вызывает response.close()). Функции _resource_closers вызываются
+        # один раз и до request_finished, по которому закрываются соединения с БД
+        response._resource_closers.append(
+            functools.partial(self.send_log, AuditTarget(request, response, error), policy)
+        )
+        return response
+
+    def process_exception(self, request, exception):
+        request._cef_audit_error = exception
+
+    def send_log(self, target, policy):
+        """
+        Формирование и отправка лог-сообщения по политике представления.
+        """
+        try:
+            record = logger.new_record()
+            record.update(get_required_log_attributes(target.request))
+            method = target.request.method
+            record['msg'] = policy.message or getattr(
+                RESTMethods.Message, method, RESTMethods.Message.GET
+            )
+            if policy.severity is not None:
+                record['Severity'] = policy.severity
+            OutcomeParams(target).fill_record(record)
+        except Exception as error:
+            return logger.debug(f'Ошибка при формировании лога {AuditMiddleware.__name__}: {error}')
+        logger.log_record(record)
+
+
+def compile_policies(policies):
+    """
+    Таблица политик {view_name: AuditPolicy}; выключенные политики в таблицу не попадают.
+    """
+    compiled = {}
+    for view_name, options in policies.items():
+        policy = options if isinstance(options, AuditPolicy) else AuditPolicy(**options)
+        if policy.enabled and policy.sampled > 0:
+            compiled[view_name] = policy
+    return compiled
+
+
+def is_mixin_view(view):
+    """
+    Проверка, что представление логируется CEFLogMixin.
+    """
+    from .mixins import CEFLogMixin
+
+    view_class = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+    return isinstance(view_class, type) and issubclass(view_class, CEFLogMixin)
@@ -3,13 +3,16 @@
 в родительском ViewSet
 """
 
-from typing import Iterable, Union
+from contextlib import nullcontext
+from functools import partial
+from typing import TYPE_CHECKING, Iterable, Union
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.forms.models import model_to_dict
-from rest_framework.response import Response
+from django.db.models import Model
 
 from . import logger
+from .cascade import CascadeDeletion, collect_cascade
+from .deferred import defer
 from .params.base import (
     DeleteBaseParams,
     GetBaseParams,
@@ -19,10 +22,19 @@ from .params.base import (
     PostBaseParams,
 )
 from .params.cef import DeleteCEFParams, PatchCEFExtendParams, PatchCEFParams, PostCEFParams
-from .params.main import ParamsSelector, error_handler
+from .params.main import FieldProjection, OutcomeParams, ParamsSelector, error_handler
+from .queries import QueryBudget, QueryBudgetExceeded
+from .registry import get_event
+from .render import PLAIN_TYPES
+from .state import AuditState, StateAttribute
+from .transactions import TransactionBuffer
 from .utils import LogLevels, RESTMethods
 
 
+if TYPE_CHECKING:
+    from rest_framework.response import Response
+
+
 class CEFLogMixin(RESTMethods):
     """
     Класс-миксин для формирования и отправки лог-сообщений.
@@ -34,18 +46,56 @@ class CEFLogMixin(RESTMethods):
     # перечисление методов, для которых не нужен CEF-лог
     exclude_method_for_cef_log, exclude_action_for_cef_log = (), ()
 
-    # возникшнее исключение
-    error: Exception = None
+    # поля расширения, которые выводятся (если не заданы - все) и не выводятся в лог-сообщение;
+    # невыводимые параметры запроса не вычисляются
+    include_fields_for_cef_log, exclude_fields_for_cef_log = (), ()
+
+    # состояние аудита текущего запроса, создается в dispatch
+    audit_state: AuditState = None
+
+    # атрибуты запроса хранятся в audit_state, а не в классе или экземпляре ViewSet
+    error: Exception = StateAttribute()  # возникшее исключение
+    params: ParamsSelector = StateAttribute()  # экземпляр класса с лог-параметрами
+    response: Union[Exception, 'Response'] = StateAttribute()  # ответ на запрос
+    old_object: dict = StateAttribute()  # атрибуты для сравнения объектов
+    new_object: dict = StateAttribute()
+    changed_fields: tuple = StateAttribute()
+    queries: QueryBudget = StateAttribute()
+    transaction_buffer: TransactionBuffer = StateAttribute()
+    cascade: CascadeDeletion = StateAttribute()
+    snapshot: list = StateAttribute()  # [(событие, записи)] для defer_cef_log
+
+    # типы значений (diff.JSON, diff.TEXT, diff.BINARY), изменения которых в PATCH-логах выводятся
+    # компактно, и размер значения, начиная с которого включается компактный режим
+    compact_diff: tuple = ()
+    compact_diff_threshold: int = 4096
 
-    # экземпляр класса с лог-параметрами
-    params: ParamsSelector
+    # бюджет SQL-запросов слоя аудита на запрос (None - без ограничения). При превышении бюджета
+    # лог-параметр, которому нужен запрос, пропускается, а в strict-режиме вызывается исключение
+    query_budget_for_cef_log: int = None
+    strict_query_budget_for_cef_log = False
 
-    # ответ на запрос
-    response: Union[Exception, Response]
+    # вывод количества (cn3) и времени в мс (cfp3) SQL-запросов слоя аудита в лог-сообщение
+    count_queries_for_cef_log = False
 
-    # атрибуты для сравнения объектов
-    old_object = new_object = {}
-    changed_fields: tuple
+    # формирование и отправка лог-сообщения после отправки ответа клиенту (см. deferred)
+    defer_cef_log = False
+
+    # публикация лог-сообщений запроса одной пачкой после фиксации транзакции, а при ее отмене -
+    # одного события об ошибке (см. transactions); не сочетается с defer_cef_log
+    transactional_cef_log = False
+
+    # базовые атрибуты класса-события ViewSet, например, {'DeviceProduct': 'BILLING'}
+    # (см. registry); если не заданы, используется logger
+    event_attributes_for_cef_log: dict = None
+
+    # аудит объектов, которые удаляются каскадно при DELETE в CEF-логе (см. cascade): сводное
+    # событие и события по моделям, в каждом не больше cascade_batch_size_for_cef_log первичных
+    # ключей; количество событий по моделям и сохраняемых первичных ключей модели ограничено
+    cascade_cef_log = False
+    cascade_batch_size_for_cef_log: int = 100
+    cascade_max_events_for_cef_log: int = 20
+    cascade_max_pks_for_cef_log: int = 1000
 
     # наименования для базовых лог-сообщений, они переопределяется во ViewSet
     names_for_logger: tuple = ('объект', 'объект', 'объектов')
@@ -63,10 +113,62 @@ class CEFLogMixin(RESTMethods):
         """
         Метод для отправки ответа на запрос.
         """
-        self.send_log()
-        if self.error:
-            raise self.error
-        return self.response
+        error, response = self.error, self.response
+        try:
+            if self.defer_cef_log:
+                # лог-параметры вычисляются во время запроса, пока открыты соединения с БД,
+                # а записи с простыми значениями отправляются после ответа; снимок не ссылается
+                # на запрос, ответ и ViewSet
+                self.snapshot = []
+                self.send_log()
+                if self.snapshot:
+                    defer(partial(self.publish_snapshot, self.snapshot))
+            else:
+                self.send_log()
+        finally:
+            self.release_audit_state()
+        if error:
+            try:
+                raise error
+            finally:
+                # трассировка исключения ссылается на этот фрейм, а фрейм - на исключение
+                del error
+        return response
+
+    @classmethod
+    def publish_snapshot(cls, snapshot):
+        """
+        Отправка записей, сохраненных в snapshot при defer_cef_log.
+        """
+        for event, records in snapshot:
+            cls.publish_records(event, records)
+
+    @staticmethod
+    def publish_records(event, records):
+        """
+        Валидация записей события и их отправка одной пачкой; невалидные записи пропускаются.
+        """
+        prepared = []
+        for record in records:
+            try:
+                event.prepare_record(record)
+            except Exception as error:
+                event.error_log(error)
+                continue
+            prepared.append(record)
+        if prepared:
+            try:
+                event.publish(*prepared)
+            except Exception as error:
+                event.error_log(error)
+
+    def release_audit_state(self):
+        """
+        Освобождение состояния аудита после отправки лог-сообщения. Ответ, исключение
+        с трассировкой и лог-параметры ссылаются на ViewSet, поэтому без этого состояние
+        освобождается только сборщиком циклических ссылок, а не сразу после запроса.
+        """
+        self.audit_state = None
 
     def add_log_params(self):
         """
@@ -117,12 +219,147 @@ class CEFLogMixin(RESTMethods):
         """
         Метод для отправки лог-сообщения.
         """
-        if changed_fields := getattr(self, 'changed_fields', None):
+        if self.transactional_cef_log:
+            self.transaction_buffer = TransactionBuffer(
+                self.get_event(), using=self._get_db_alias()
+            )
+        if changed_fields := self.changed_fields:
             for key in changed_fields:
                 self.params.log_params.changed_key = key
-                logger(**self.params.set_cef_params())
+                self._log_params()
+        else:
+            self._log_params()
+        if self.cascade is not None:
+            self._log_cascade()
+        if self.transaction_buffer is not None:
+            self.transaction_buffer.seal()
+
+    def _log_params(self):
+        """
+        Заполнение записи события лог-параметрами и ее отправка.
+        """
+        event = self.get_event()
+        record = event.new_record()
+        with self.audit_queries():
+            self.params.fill_record(record)
+            if self.queries is not None or self.snapshot is not None:
+                self._resolve_values(record)
+        if self.queries is not None and self.count_queries_for_cef_log:
+            record['cn3Label'] = 'Запросы аудита'
+            record['cn3'] = self.queries.count
+            record['cfp3Label'] = 'Время запросов аудита, мс'
+            record['cfp3'] = round(self.queries.duration * 1000, 3)
+        if self.transaction_buffer is not None:
+            self.transaction_buffer.add(record)
+        elif self.snapshot is not None:
+            self.snapshot.append((event, (record,)))
         else:
-            logger(**self.params.set_cef_params())
+            event.log_record(record)
+
+    def _log_cascade(self):
+        """
+        Отправка сводного события и событий по моделям каскадного удаления одной пачкой,
+        если объект удален вместе со связанными объектами.
+        """
+        from rest_framework import status
+
+        if (
+            not self.cascade.total
+            or self.error
+            or not status.is_success(self.response.status_code)
+        ):
+            return
+        event = self.get_event()
+        projection = self.get_field_projection()
+        records = []
+        for params in self.cascade.iter_params(
+            self.cascade_batch_size_for_cef_log, self.cascade_max_events_for_cef_log
+        ):
+            record = event.new_record()
+            with self.audit_queries():
+                self.params.request_params.fill_record(record, projection)
+                record.update(
+                    {
+                        key: value
+                        for key, value in params.items()
+                        if projection is None or key in projection
+                    }
+                )
+                OutcomeParams(self).fill_record(record, projection)
+                if self.queries is not None or self.snapshot is not None:
+                    self._resolve_values(record)
+            if self.transaction_buffer is not None:
+                self.transaction_buffer.add(record)
+            else:
+                records.append(record)
+        if records and self.snapshot is not None:
+            self.snapshot.append((event, tuple(records)))
+        elif records:
+            self.publish_records(event, records)
+
+    def _get_db_alias(self):
+        """
+        Псевдоним БД, в которую пишет ViewSet.
+        """
+        from django.db import DEFAULT_DB_ALIAS, router
+
+        if (queryset := getattr(self, 'queryset', None)) is not None:
+            return router.db_for_write(queryset.model)
+        return DEFAULT_DB_ALIAS
+
+    def audit_queries(self):
+        """
+        Контекст учета SQL-запросов слоя аудита, если он включен во ViewSet.
+        """
+        return self.queries.track() if self.queries is not None else nullcontext()
+
+    @staticmethod
+    def _resolve_values(record):
+        """
+        Приведение к строке значений непростых типов (например, объектов моделей) внутри учета
+        запросов, так как __str__ может выполнять запросы. Значение, которому не хватило бюджета,
+        пропускается.
+        """
+        for key, value in list(record.items()):
+            if not isinstance(value, PLAIN_TYPES):
+                try:
+                    record[key] = str(value)
+                except QueryBudgetExceeded as error:
+                    if error.strict:
+                        raise
+                    record[key] = None
+
+    @classmethod
+    def get_field_projection(cls):
+        """
+        Проекция полей лог-сообщения. Вычисляется один раз для каждого класса ViewSet.
+
+        Returns:
+            projection (FieldProjection|None): проекция или None, если выводятся все поля
+        """
+        if '_field_projection' not in cls.__dict__:
+            cls._field_projection = (
+                FieldProjection(cls.include_fields_for_cef_log, cls.exclude_fields_for_cef_log)
+                if cls.include_fields_for_cef_log or cls.exclude_fields_for_cef_log
+                else None
+            )
+        return cls._field_projection
+
+    @classmethod
+    def get_event(cls):
+        """
+        Класс-событие ViewSet. Вычисляется один раз для каждого класса ViewSet.
+
+        Returns:
+            event (BaseEvent): экземпляр из реестра или logger
+        """
+        if '_cef_event' not in cls.__dict__:
+            cls._cef_event = (
+                get_event(**cls.event_attributes_for_cef_log)
+                if cls.event_attributes_for_cef_log
+                else logger
+            )
+        return cls._cef_event
 
     @error_handler
     def get_log_instance(self):
@@ -138,6 +375,11 @@ class CEFLogMixin(RESTMethods):
         Returns:
             Response (Response|Exception): объект ответа на запрос или возникшее исключение
         """
+        self.audit_state = AuditState()
+        if self.count_queries_for_cef_log or self.query_budget_for_cef_log is not None:
+            self.queries = QueryBudget(
+                self.query_budget_for_cef_log, self.strict_query_budget_for_cef_log
+            )
         if (
                 self.disable_log
                 or not LogLevels.is_cef_level()
@@ -146,17 +388,32 @@ class CEFLogMixin(RESTMethods):
         ):
             return super().dispatch(request, *args, **kwargs)
 
+        if self.queries is not None and self.queries.strict and request.method != self.GET:
+            from django.db import transaction
+
+            # бюджет проверяется до фиксации изменений: превышение после сохранения объекта
+            # (получение нового объекта, лог-параметры) откатывает изменения запроса
+            with transaction.atomic(using=self._get_db_alias()):
+                return self._dispatch_with_log(request, *args, **kwargs)
+        return self._dispatch_with_log(request, *args, **kwargs)
+
+    def _dispatch_with_log(self, request, *args, **kwargs):
+        """
+        Обработка запроса с формированием лога перед отправкой ответа.
+        """
         if request.method == self.GET or not self.cef_log:
             self.check_response(request, *args, **kwargs)
-            self.set_base_params()
+            with self.audit_queries():
+                self.set_base_params()
             return self.send_response()
         if self.is_modifying_method(request.method):
             self.check_object_change(request, *args, **kwargs)
-            if not hasattr(self, 'response'):
+            if self.response is None and self.error is None:
                 self.check_response(request, *args, **kwargs)
         else:
             self.check_response(request, *args, **kwargs)
-        self.set_cef_params()
+        with self.audit_queries():
+            self.set_cef_params()
         return self.send_response()
 
     @error_handler
@@ -164,14 +421,31 @@ class CEFLogMixin(RESTMethods):
         """
         Фиксация истории изменений в объектах связанного queryset.
         """
-        self.old_object = self._get_comparative_object(request)
+        with self.audit_queries():
+            self.old_object = self._get_comparative_object(request)
+            if request.method == self.DELETE and self.cascade_cef_log:
+                self.cascade = self._collect_cascade()
         self.check_response(request, *args, **kwargs)
         if request.method != self.DELETE and not self.error:
-            self.new_object = self._get_comparative_object(request)
+            with self.audit_queries():
+                self.new_object = self._get_comparative_object(request)
             self.changed_fields = tuple(
                 key for key, value in self.new_object.items() if self.old_object.get(key) != value
             )
 
+    @error_handler
+    def _collect_cascade(self):
+        """
+        Объекты, которые будут удалены каскадно вместе с old_object, до его удаления.
+
+        Returns:
+            cascade (CascadeDeletion|None)
+        """
+        if isinstance(self.old_object, Model):
+            return collect_cascade(
+                self.old_object, self._get_db_alias(), self.cascade_max_pks_for_cef_log
+            )
+
     def _get_comparative_object(self, request):
         """
         Получение объекта модели в виде словаря.
@@ -179,6 +453,8 @@ class CEFLogMixin(RESTMethods):
         Returns:
             comparative_object (dict)
         """
+        from django.forms.models import model_to_dict
+
         comparative_object = {}
         if lookup_url_kwarg := getattr(self, 'lookup_url_kwarg', None) or getattr(
             self, 'lookup_field', None
@@ -6,7 +6,11 @@ from abc import ABC, abstractmethod
 from functools import wraps
 
 from .. import logger
+from ..diff import compact_change
+from ..queries import is_strict_error
+from ..record import MANDATORY_KEYS
 from ..utils import Outcomes, get_dhost, external_counter, visitor_ip_address, get_dst
+from .spec import build_params, define_spec_methods
 
 
 def error_handler(func):
@@ -19,6 +23,8 @@ def error_handler(func):
         try:
             return func(*args, **kwargs)
         except Exception as error:
+            if is_strict_error(error):
+                raise
             logger.debug(f'Ошибка при вычислении {func.__name__}: {error}')
 
     return catch_error
@@ -42,6 +48,24 @@ def msg_modification(func):
     return check_log_instance
 
 
+def cached_param(func):
+    """
+    Декоратор для вычисления лог-параметра один раз на экземпляр класса-параметров,
+    то есть один раз на запрос, даже если параметр попадает в несколько лог-сообщений.
+    """
+
+    @wraps(func)
+    def get_cached(self):
+        cache = self.__dict__.setdefault('_cached_params', {})
+        try:
+            return cache[func.__name__]
+        except KeyError:
+            value = cache[func.__name__] = func(self)
+            return value
+
+    return get_cached
+
+
 def required_params(func):
     """
     Декоратор добавляет обязательные параметры в set_cef_params.
@@ -66,19 +90,45 @@ def required_params(func):
 class BaseParamsMethods(ABC):
     """Базовый класс с методами для лог-параметрамов."""
 
+    # декларативное описание лог-параметров (см. spec): {'cs1': источник значения, ...}
+    LOG_SPEC: dict = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get('LOG_SPEC'):
+            define_spec_methods(cls)
+
     def __init__(self, instance):
         """
         instance - экземпляр ViewSet, дополненный атрибутами CEFLogMixin.
         """
         self.instance = instance
 
-    @abstractmethod
     def set_cef_params(self):
         """
         Метод для установки лог-атрибутов в формате:
         {'cs1': value1, 'cs2': value2, ...}
+        По умолчанию лог-атрибуты формируются по LOG_SPEC.
         """
-        pass
+        if not self.LOG_SPEC:
+            raise NotImplementedError(f'{self.__class__.__name__}: не задан LOG_SPEC')
+        return build_params(self)
+
+    def fill_record(self, record, projection=None):
+        """
+        Заполнение EventRecord лог-атрибутами из set_cef_params.
+        Если set_cef_params не переопределен, вычисляются только поля проекции.
+
+        Args:
+            record (EventRecord): запись события
+            projection (FieldProjection): поля, которые выводятся в лог-сообщение
+        """
+        if self.LOG_SPEC and type(self).set_cef_params is BaseParamsMethods.set_cef_params:
+            return record.update(build_params(self, projection))
+        if params := self.set_cef_params():
+            if projection is not None:
+                params = {key: value for key, value in params.items() if key in projection}
+            record.update(params)
 
     @abstractmethod
     def apply_condition(self):
@@ -181,6 +231,24 @@ class CEFBaseParams(BaseParams):
 class CEFBasePatchParams(BaseParams):
     """Базовый класс с CEF-параметрами для обновления сущностей"""
 
+    def get_change(self, key):
+        """
+        Старое и новое значения атрибута. Если во ViewSet включен compact_diff и значение
+        превышает compact_diff_threshold, вместо него возвращается компактное представление.
+
+        Returns:
+            tuple: (старое значение, новое значение)
+        """
+        if getattr(self, '_change_key', None) != key or not hasattr(self, '_change'):
+            old = self.instance.old_object.get(key)
+            new = self.instance.new_object.get(key)
+            change = None
+            if kinds := getattr(self.instance, 'compact_diff', None):
+                threshold = getattr(self.instance, 'compact_diff_threshold', 0)
+                change = compact_change(old, new, kinds, threshold)
+            self._change_key, self._change = key, change or (old, new)
+        return self._change
+
     @abstractmethod
     def cs2Label(self):  # noqa: N802
         """
@@ -230,9 +298,12 @@ class CEFExtendPatchParams(CEFBasePatchParams):
 
 class RequestParams(BaseRequestParams):
     """
-    Параметры, вычисляемые на основе request.
+    Параметры, вычисляемые на основе request. Значения, кроме externalId, не меняются
+    в течение запроса и вычисляются один раз.
     """
 
+    FIELDS = ('Name', 'externalId', 'shost', 'src', 'suser', 'dhost', 'dst')
+
     def set_cef_params(self):
         return {
             self.Name.__name__: self.Name(),
@@ -244,9 +315,18 @@ class RequestParams(BaseRequestParams):
             self.dst.__name__: self.dst(),
         }
 
+    def fill_record(self, record, projection=None):
+        """
+        Вычисляются только поля, которые выводятся в лог-сообщение.
+        """
+        for key in self.FIELDS:
+            if projection is None or key in projection:
+                record[key] = getattr(self, key)()
+
     def apply_condition(self):
         return True
 
+    @cached_param
     @error_handler
     def Name(self):  # noqa: N801, N802
         return self.instance.request.resolver_match.view_name
@@ -255,22 +335,27 @@ class RequestParams(BaseRequestParams):
     def externalId(self):  # noqa: N801, N802
         return external_counter()
 
+    @cached_param
     @error_handler
     def shost(self):
         return self.instance.request.get_host()
 
+    @cached_param
     @error_handler
     def src(self):
         return visitor_ip_address(self.instance.request)
 
+    @cached_param
     @error_handler
     def suser(self):
         return self.instance.request.user.profile.full_name
 
+    @cached_param
     @error_handler
     def dhost(self):
         return get_dhost(self.instance.request)
 
+    @cached_param
     @error_handler
     def dst(self):
         return get_dst()
@@ -289,6 +374,29 @@ class OutcomeParams(BaseParamsMethods):
         return True
 
 
+class FieldProjection:
+    """
+    Поля расширения, которые выводятся в лог-сообщение ViewSet. Поля CEF-заголовка
+    выводятся всегда.
+    """
+
+    __slots__ = ('include', 'exclude')
+
+    def __init__(self, include=(), exclude=()):
+        """
+        Args:
+            include (Iterable[str]): выводимые поля; если не заданы, выводятся все поля
+            exclude (Iterable[str]): невыводимые поля
+        """
+        self.include = frozenset(include) if include else None
+        self.exclude = frozenset(exclude)
+
+    def __contains__(self, key):
+        if key in MANDATORY_KEYS:
+            return True
+        return (self.include is None or key in self.include) and key not in self.exclude
+
+
 class ParamsSelector:
     """
     Класс для определения лог-параметров.
@@ -306,10 +414,27 @@ class ParamsSelector:
                     self.log_params = param
                     break
         except Exception as error:
+            if is_strict_error(error):
+                raise
             logger.debug(f'Ошибка в {ParamsSelector.__name__}: {error}')
         if not hasattr(self, 'log_params'):
             self.log_params = base_param
+        # параметры запроса создаются один раз, чтобы их значения вычислялись один раз на запрос
+        self.request_params = RequestParams(self.log_params.instance)
 
     @required_params
     def set_cef_params(self):
         return self.log_params.set_cef_params()
+
+    def fill_record(self, record):
+        """
+        Заполнение EventRecord обязательными параметрами и параметрами выбранного класса
+        в том же порядке, что и в set_cef_params, с учетом проекции полей ViewSet.
+        """
+        instance = self.log_params.instance
+        projection = instance.get_field_projection() if hasattr(
+            instance, 'get_field_projection'
+        ) else None
+        self.request_params.fill_record(record, projection)
+        self.log_params.fill_record(record, projection)
+        OutcomeParams(instance).fill_record(record, projection)
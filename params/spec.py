@@ -0,0 +1,177 @@
+"""
+Декларативное описание лог-параметров класса-параметров (LOG_SPEC) и его компиляция
+в функцию-сборщик. Упорядоченный словарь «CEF-ключ - источник значения», где источник:
+- константа;
+- Attr('instance.request.method') - атрибут по пути от экземпляра класса-параметров;
+- функция, которая принимает экземпляр класса-параметров (например, метод этого класса);
+- Param(источник, default) - источник со значением по умолчанию при ошибке.
+
+    class PostCEFParams(CEFBaseParams):
+        @error_handler
+        def cs1(self):
+            ...
+
+        LOG_SPEC = {
+            'DeviceEventClassID': RESTMethods.DeviceEventClassID.POST,
+            'msg': RESTMethods.Message.POST,
+            'cs1Label': LogLabels.object_name,
+            'cs1': cs1,
+        }
+
+Для каждого ключа без одноименного метода создается метод, поэтому self.msg() и абстрактные
+методы базовых классов продолжают работать. Сборщик компилируется один раз для класса
+(и проекции полей ViewSet): константы собраны в готовый словарь, вычисляются только
+динамические ключи. Метод, переопределенный в подклассе, имеет приоритет над LOG_SPEC.
+"""
+
+from operator import attrgetter
+
+from .. import logger
+from ..queries import is_strict_error
+
+
+# атрибут методов, созданных по LOG_SPEC (значение - источник)
+SPEC_SOURCE = '_spec_source'
+
+# максимальное количество сборщиков одного класса (по проекциям полей)
+BUILDERS_SIZE = 64
+
+_NO_DEFAULT = object()
+
+
+class Attr:
+    """
+    Значение атрибута по пути от экземпляра класса-параметров.
+    """
+
+    __slots__ = ('path', 'get')
+
+    def __init__(self, path):
+        self.path = path
+        self.get = attrgetter(path)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+
+class Param:
+    """
+    Источник значения со значением по умолчанию, если при вычислении возникла ошибка.
+    """
+
+    __slots__ = ('source', 'default')
+
+    def __init__(self, source, default=None):
+        self.source = source
+        self.default = default
+
+
+def get_getter(key, source):
+    """
+    Функция вычисления значения источника или None для константы.
+
+    Returns:
+        tuple: (функция от экземпляра класса-параметров или None, значение константы)
+    """
+    default = _NO_DEFAULT
+    if isinstance(source, Param):
+        source, default = source.source, source.default
+    if isinstance(source, Attr):
+        getter = source.get
+    elif callable(source):
+        getter = source
+    else:
+        return None, source
+    if default is not _NO_DEFAULT:
+        getter = _with_default(key, getter, default)
+    return getter, None
+
+
+def _with_default(key, getter, default):
+    def get_or_default(params):
+        try:
+            return getter(params)
+        except Exception as error:
+            if is_strict_error(error):
+                raise
+            logger.debug(f'Ошибка при вычислении {key}: {error}')
+            return default
+
+    return get_or_default
+
+
+def define_spec_methods(cls):
+    """
+    Создание методов для ключей LOG_SPEC, у которых нет одноименного метода в классе.
+    """
+    for key, source in cls.LOG_SPEC.items():
+        if key in cls.__dict__:
+            continue
+        getter, value = get_getter(key, source)
+        if getter is None:
+            def method(self, value=value):
+                return value
+        else:
+            def method(self, getter=getter):
+                return getter(self)
+        method.__name__ = method.__qualname__ = key
+        setattr(method, SPEC_SOURCE, source)
+        setattr(cls, key, method)
+
+
+def compile_spec(cls, projection=None):
+    """
+    Сборщик лог-параметров класса: функция, которая принимает экземпляр класса-параметров
+    и возвращает словарь в порядке LOG_SPEC.
+
+    Args:
+        cls (type): класс-параметров с LOG_SPEC
+        projection (FieldProjection): поля, которые выводятся в лог-сообщение
+    """
+    template, dynamic = {}, []
+    for key, source in cls.LOG_SPEC.items():
+        if projection is not None and key not in projection:
+            continue
+        method = getattr(cls, key, None)
+        if method is not None and not hasattr(method, SPEC_SOURCE) and method is not source:
+            # метод, переопределенный в подклассе
+            getter = _call_method(key)
+        else:
+            getter, value = get_getter(key, source)
+            if getter is None:
+                template[key] = value
+                continue
+        # место ключа в словаре занимается сразу, чтобы сохранить порядок LOG_SPEC
+        template[key] = None
+        dynamic.append((key, getter))
+    dynamic = tuple(dynamic)
+
+    def build(params):
+        values = template.copy()
+        for key, getter in dynamic:
+            values[key] = getter(params)
+        return values
+
+    return build
+
+
+def _call_method(key):
+    def call(params):
+        return getattr(params, key)()
+
+    return call
+
+
+def build_params(params, projection=None):
+    """
+    Лог-параметры экземпляра класса-параметров по LOG_SPEC. Сборщик компилируется
+    один раз для каждого класса и проекции полей.
+    """
+    cls = params.__class__
+    if (builders := cls.__dict__.get('_spec_builders')) is None:
+        builders = cls._spec_builders = {}
+    if (build := builders.get(projection)) is None:
+        if len(builders) >= BUILDERS_SIZE:
+            builders.clear()
+        build = builders[projection] = compile_spec(cls, projection)
+    return build(params)
@@ -0,0 +1,232 @@
+"""
+Разбор лог-сообщений в формате CEF, обратный рендерингу из render.py:
+необязательный syslog-заголовок (дата, время, хост), CEF-заголовок и расширения.
+
+Разбор рассчитан на потоковую обработку больших файлов: строки читаются из файла,
+mmap или буфера без загрузки файла целиком, заголовок без экранирования разбирается
+одним str.split, а расширения разбираются только при первом обращении к ним.
+"""
+
+import re
+
+from .record import MANDATORY_KEYS, EventRecord
+
+
+# CEF-заголовок: «CEF:» и семь полей, разделенных неэкранированными «|»
+_HEADER = re.compile(r'CEF:' + r'((?:[^|\\]|\\.)*)\|' * len(MANDATORY_KEYS))
+
+_HEADER_ESCAPE = re.compile(r'\\([\\|])')
+_EXTENSION_ESCAPE = re.compile(r'\\([\\=])')
+
+# начало лог-сообщения: «CEF:» в начале строки или после syslog-заголовка «<дата> <хост> ».
+# Перевод строки в значениях расширений не экранируется, поэтому строки без этого начала
+# считаются продолжением значения предыдущего сообщения
+_MESSAGE_START = re.compile(rb'(?:[^ \n]+ [^ \n]+ )?CEF:')
+
+_HEADER_SIZE = len(MANDATORY_KEYS)
+
+
+class ParsedEvent:
+    """
+    Разобранное лог-сообщение. Значения полей - строки в том виде, в котором они были
+    переданы в рендеринг (после удаления экранирования).
+    """
+
+    __slots__ = ('timestamp', 'host', 'header', '_extensions_text', '_extensions')
+
+    def __init__(self, timestamp, host, header, extensions_text):
+        self.timestamp = timestamp  # дата и время из syslog-заголовка или None
+        self.host = host  # хост из syslog-заголовка или None
+        self.header = header  # значения CEF-заголовка в порядке MANDATORY_KEYS
+        self._extensions_text = extensions_text
+        self._extensions = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.as_dict()!r})'
+
+    def __getitem__(self, key):
+        extensions = self.extensions
+        if key in extensions:
+            return extensions[key]
+        try:
+            return self.header[MANDATORY_KEYS.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @property
+    def extensions(self):
+        """
+        Поля расширения в порядке вывода; разбираются при первом обращении.
+        """
+        if self._extensions is None:
+            self._extensions = parse_extensions(self._extensions_text)
+        return self._extensions
+
+    def as_dict(self):
+        return {**dict(zip(MANDATORY_KEYS, self.header)), **self.extensions}
+
+    def as_record(self):
+        """
+        EventRecord с полями сообщения: render_record(event.as_record()) возвращает
+        исходное сообщение без syslog-заголовка.
+        """
+        record = EventRecord(dict(zip(MANDATORY_KEYS, self.header)))
+        for key, value in self.extensions.items():
+            if record.custom:
+                # поля после пользовательских (например, «end») выводятся в порядке сообщения
+                record.custom[key] = value
+            else:
+                record[key] = value
+        return record
+
+
+def parse_line(line):
+    """
+    Разбор одного лог-сообщения.
+
+    Raises:
+        ValueError: строка не содержит CEF-заголовок
+    """
+    if line.startswith('CEF:'):
+        start = 0
+    elif (start := line.find(' CEF:') + 1) == 0:
+        raise ValueError(f'Строка не является CEF-сообщением: {line[:100]!r}')
+
+    timestamp = host = None
+    if start:
+        timestamp, _, host = line[:start - 1].partition(' ')
+
+    # «\r» не отрезается: в значениях расширений он не экранируется
+    if line.endswith('\n'):
+        line = line[:-1]
+
+    # быстрый путь: в полях заголовка нет экранирования
+    fields = line[start + 4:].split('|', _HEADER_SIZE)
+    if len(fields) > _HEADER_SIZE and '\\' not in line[start:len(line) - len(fields[-1])]:
+        return ParsedEvent(timestamp, host, tuple(fields[:_HEADER_SIZE]), fields[-1])
+
+    header = _HEADER.match(line, start)
+    if header is None:
+        raise ValueError(f'Строка не является CEF-сообщением: {line[:100]!r}')
+    return ParsedEvent(
+        timestamp,
+        host,
+        tuple(
+            _HEADER_ESCAPE.sub(r'\1', value) if '\\' in value else value
+            for value in header.groups()
+        ),
+        line[header.end():],
+    )
+
+
+def parse_extensions(text):
+    """
+    Разбор расширений «key=value key=value» с многословными значениями.
+
+    «=» в значениях всегда экранирован, поэтому текст делится по «=», части с экранированным
+    «=» (нечетное количество «\\» в конце) склеиваются обратно, а ключом является
+    последнее слово перед каждым неэкранированным «=».
+    """
+    pieces = text.split('=')
+    if len(pieces) == 1:
+        return {}
+    if '\\' in text:
+        pieces = _join_escaped(pieces)
+
+    extensions = {}
+    key = pieces[0].rpartition(' ')[2]
+    for piece in pieces[1:-1]:
+        value, _, next_key = piece.rpartition(' ')
+        extensions[key] = value
+        key = next_key
+    extensions[key] = pieces[-1]
+
+    if '\\' in text:
+        for key, value in extensions.items():
+            if '\\\\' in value:
+                extensions[key] = _EXTENSION_ESCAPE.sub(r'\1', value)
+            elif '\\' in value:
+                extensions[key] = value.replace('\\=', '=')
+    return extensions
+
+
+def _join_escaped(pieces):
+    joined = []
+    for piece in pieces:
+        if joined and (len(joined[-1]) - len(joined[-1].rstrip('\\'))) % 2:
+            joined[-1] = f'{joined[-1]}={piece}'
+        else:
+            joined.append(piece)
+    return joined
+
+
+def iter_lines(source, offset=0):
+    """
+    Полные строки файла, mmap или буфера (bytes) начиная со смещения offset.
+    Недописанная последняя строка (без «\\n») не возвращается.
+
+    Yields:
+        tuple[int, bytes]: смещение строки в байтах и строка
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield from _iter_buffer_lines(source, offset)
+        return
+    source.seek(offset)
+    # у mmap нет построчной итерации, у файлов readline медленнее итерации
+    lines = iter(source.readline, b'') if not hasattr(source, '__next__') else source
+    for line in lines:
+        if not line.endswith(b'\n'):
+            return
+        yield offset, line
+        offset += len(line)
+
+
+def _iter_buffer_lines(buffer, offset):
+    buffer = bytes(buffer) if isinstance(buffer, memoryview) else buffer
+    while (end := buffer.find(b'\n', offset)) >= 0:
+        yield offset, buffer[offset:end + 1]
+        offset = end + 1
+
+
+def iter_messages(source, offset=0):
+    """
+    Лог-сообщения источника с учетом переводов строк внутри значений расширений.
+
+    Yields:
+        tuple[int, bytes]: смещение сообщения в байтах и сообщение
+    """
+    start = message = None
+    for line_offset, line in iter_lines(source, offset):
+        if message is not None and not _MESSAGE_START.match(line):
+            message += line
+            continue
+        if message is not None:
+            yield start, message
+        start, message = line_offset, line
+    if message is not None:
+        yield start, message
+
+
+def iter_events(source, offset=0):
+    """
+    Разобранные лог-сообщения файла, mmap или буфера; строки не в формате CEF пропускаются.
+
+        with open('audit.log', 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            for offset, event in iter_events(data):
+                ...
+
+    Yields:
+        tuple[int, ParsedEvent]: смещение сообщения в байтах и разобранное сообщение
+    """
+    for message_offset, message in iter_messages(source, offset):
+        try:
+            yield message_offset, parse_line(message.decode('utf-8'))
+        except ValueError:
+            continue
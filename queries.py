@@ -0,0 +1,74 @@
+"""
+Учет SQL-запросов, которые выполняет слой аудита (получение объектов для сравнения,
+вычисление лог-параметров), и ограничение их количества бюджетом на запрос.
+"""
+
+import time
+
+from contextlib import ExitStack, contextmanager
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Превышен бюджет SQL-запросов слоя аудита.
+    """
+
+    def __init__(self, message, strict=False):
+        super().__init__(message)
+        self.strict = strict  # исключение не перехватывается error_handler
+
+
+class QueryBudget:
+    """
+    Счетчик количества и времени SQL-запросов слоя аудита (обертка connection.execute_wrapper).
+
+    После исчерпания бюджета запросы не выполняются: вызывается QueryBudgetExceeded.
+    В strict-режиме (например, в тестах) исключение прерывает обработку запроса,
+    иначе пропускается только лог-параметр, для которого потребовался запрос.
+    """
+
+    __slots__ = ('limit', 'strict', 'count', 'duration', 'blocked')
+
+    def __init__(self, limit=None, strict=False):
+        """
+        Args:
+            limit (int): бюджет запросов или None, если запросы только считаются
+            strict (bool): прерывать обработку запроса при превышении бюджета
+        """
+        self.limit = limit
+        self.strict = strict
+        self.count = 0  # количество выполненных запросов
+        self.duration = 0.0  # время выполнения запросов в секундах
+        self.blocked = 0  # количество запросов, не выполненных из-за бюджета
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.limit is not None and self.count >= self.limit:
+            self.blocked += 1
+            raise QueryBudgetExceeded(
+                f'Превышен бюджет запросов аудита ({self.limit}): {sql[:200]}', self.strict
+            )
+        self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+
+    @contextmanager
+    def track(self):
+        """
+        Учет запросов во всех подключениях к БД внутри блока with.
+        """
+        from django.db import connections
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+
+def is_strict_error(error):
+    """
+    Исключение, которое не должно перехватываться обработчиками ошибок лог-параметров.
+    """
+    return isinstance(error, QueryBudgetExceeded) and error.strict
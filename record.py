@@ -0,0 +1,142 @@
+"""
+Компактная запись лог-события. У каждого известного CEF-ключа есть фиксированный слот,
+а пользовательские ключи складываются в отдельный словарь custom.
+"""
+
+# обязательные поля CEF-заголовка в порядке вывода
+MANDATORY_KEYS = (
+    'Version',
+    'DeviceVendor',
+    'DeviceProduct',
+    'DeviceVersion',
+    'DeviceEventClassID',
+    'Name',
+    'Severity',
+)
+
+# поля расширения CEF (совпадают с cef_logger.schemas.ExtensionFields)
+EXTENSION_KEYS = (
+    'act', 'app',
+    'c6a1', 'c6a1Label', 'c6a2', 'c6a2Label', 'c6a3', 'c6a3Label', 'c6a4', 'c6a4Label',
+    'cat',
+    'cfp1', 'cfp1Label', 'cfp2', 'cfp2Label', 'cfp3', 'cfp3Label', 'cfp4', 'cfp4Label',
+    'cn1', 'cn1Label', 'cn2', 'cn2Label', 'cn3', 'cn3Label',
+    'cnt',
+    'cs1', 'cs1Label', 'cs2', 'cs2Label', 'cs3', 'cs3Label',
+    'cs4', 'cs4Label', 'cs5', 'cs5Label', 'cs6', 'cs6Label',
+    'destinationDnsDomain', 'destinationServiceName',
+    'destinationTranslatedAddress', 'destinationTranslatedPort',
+    'deviceCustomDate1', 'deviceCustomDate1Label', 'deviceCustomDate2', 'deviceCustomDate2Label',
+    'deviceDirection', 'deviceDnsDomain', 'deviceExternalId', 'deviceFacility',
+    'deviceInboundInterface', 'deviceNtDomain', 'deviceOutboundInterface', 'devicePayloadId',
+    'deviceProcessName', 'deviceTranslatedAddress',
+    'dhost', 'dmac', 'dntdom', 'dpid', 'dpriv', 'dproc', 'dpt', 'dst', 'dtz', 'duid', 'duser',
+    'dvc', 'dvchost', 'dvcmac', 'dvcpid',
+    'end', 'externalId',
+    'fileCreateTime', 'fileHash', 'fileId', 'fileModificationTime', 'filePath', 'filePermission',
+    'fileType',
+    'flexDate1', 'flexDate1Label', 'flexString1', 'flexString1Label', 'flexString2',
+    'flexString2Label',
+    'fname', 'fsize', 'in_', 'msg',
+    'oldFileCreateTime', 'oldFileHash', 'oldFileId', 'oldFileModificationTime', 'oldFileName',
+    'oldFilePath', 'oldFilePermission', 'oldFileSize', 'oldFileType',
+    'out', 'outcome', 'proto', 'reason', 'request', 'requestClientApplication', 'requestContext',
+    'requestCookies', 'requestMethod', 'rt',
+    'shost', 'smac', 'sntdom', 'sourceDnsDomain', 'sourceServiceName', 'sourceTranslatedAddress',
+    'sourceTranslatedPort',
+    'spid', 'spriv', 'sproc', 'spt', 'src', 'start', 'suid', 'suser', 'type',
+)
+
+_MANDATORY = frozenset(MANDATORY_KEYS)
+_EXTENSIONS = frozenset(EXTENSION_KEYS)
+
+
+class EventRecord:
+    """
+    Лог-событие, которое заполняется на месте классами-параметрами и напрямую
+    передается в рендеринг без промежуточных словарей.
+
+    Порядок вывода полей расширения совпадает с порядком их первой установки,
+    пользовательские поля выводятся после них.
+    """
+
+    __slots__ = MANDATORY_KEYS + EXTENSION_KEYS + ('extension_order', 'custom')
+
+    def __init__(self, fields=None):
+        self.extension_order = []
+        self.custom = {}
+        if fields:
+            self.update(fields)
+
+    def __setitem__(self, key, value):
+        if key in _MANDATORY:
+            setattr(self, key, value)
+        elif key in _EXTENSIONS:
+            if key not in self.extension_order:
+                self.extension_order.append(key)
+            setattr(self, key, value)
+        else:
+            self.custom[key] = value
+
+    def __getitem__(self, key):
+        if key in _MANDATORY or key in self.extension_order:
+            return getattr(self, key)
+        return self.custom[key]
+
+    def __contains__(self, key):
+        if key in _MANDATORY:
+            return hasattr(self, key)
+        return key in self.extension_order or key in self.custom
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.as_dict()!r})'
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, AttributeError):
+            return default
+
+    def update(self, fields):
+        """
+        Установка значений из словаря с сохранением порядка ключей.
+        """
+        for key, value in fields.items():
+            self[key] = value
+
+    def copy(self):
+        """
+        Копия записи, например, для заполнения на основе шаблона с базовыми атрибутами.
+        """
+        record = self.__class__()
+        for key in MANDATORY_KEYS:
+            if hasattr(self, key):
+                setattr(record, key, getattr(self, key))
+        for key in self.extension_order:
+            setattr(record, key, getattr(self, key))
+        record.extension_order = self.extension_order.copy()
+        record.custom = self.custom.copy()
+        return record
+
+    def header(self):
+        """
+        Значения обязательных полей в порядке вывода в CEF-заголовке.
+        """
+        return tuple(getattr(self, key) for key in MANDATORY_KEYS)
+
+    def mandatory(self):
+        return {key: getattr(self, key) for key in MANDATORY_KEYS if hasattr(self, key)}
+
+    def extensions(self):
+        return {key: getattr(self, key) for key in self.extension_order}
+
+    def items(self):
+        """
+        Пары ключ-значение полей расширения и пользовательских полей в порядке вывода.
+        """
+        for key in self.extension_order:
+            yield key, getattr(self, key)
+        yield from self.custom.items()
+
+    def as_dict(self):
+        return {**self.mandatory(), **self.extensions(), **self.custom}
@@ -0,0 +1,72 @@
+"""
+Реестр классов-событий с разными базовыми атрибутами (DeviceProduct, DeviceEventClassID,
+Name, Severity), например, для подсистем или отдельных ViewSet.
+
+Класс-событие создается, проверяется и прогревает кэш заголовков один раз для каждого
+набора атрибутов, а его экземпляр используется повторно всеми запросами.
+"""
+
+import threading
+
+from .record import MANDATORY_KEYS
+
+
+_events = {}
+_lock = threading.Lock()
+
+
+def get_event(base=None, **attributes):
+    """
+    Экземпляр класса-события с заданными базовыми атрибутами.
+
+    Args:
+        base (type): родительский класс-событие (по умолчанию BaseEvent)
+        attributes: значения обязательных полей, например, DeviceProduct='BILLING'
+
+    Returns:
+        event (BaseEvent): экземпляр, общий для всех вызовов с теми же аргументами
+    """
+    key = (base, tuple(sorted(attributes.items())))
+    if (event := _events.get(key)) is None:
+        with _lock:
+            if (event := _events.get(key)) is None:
+                event = _events[key] = create_event(base, **attributes)
+    return event
+
+
+def create_event(base=None, **attributes):
+    """
+    Создание класса-события с проверенным и отрендеренным заголовком и его экземпляра.
+
+    Raises:
+        ValueError: неизвестный атрибут или значения, не прошедшие валидацию MandatoryFields
+    """
+    from cef_logger.schemas import MandatoryFields
+
+    from .events import BaseEvent, CustomFields
+    from .render import calculate_dynamic_fields, render_header
+
+    base = base or BaseEvent
+    if unknown := attributes.keys() - set(MANDATORY_KEYS):
+        raise ValueError(f'Неизвестные атрибуты класса-события: {", ".join(sorted(unknown))}')
+    # ошибка в атрибутах обнаруживается при регистрации, а не в каждом запросе
+    MandatoryFields(
+        **calculate_dynamic_fields(
+            {key: attributes.get(key, getattr(base, key)) for key in MANDATORY_KEYS}
+        )
+    )
+    name = '{}_{}'.format(
+        base.__name__, '_'.join(str(attributes[key]) for key in sorted(attributes))
+    )
+    event = type(base)(name, (base,), {**attributes, '__module__': __name__})()
+    CustomFields.validate_record(event.record)
+    render_header(event.record.header())
+    return event
+
+
+def clear():
+    """
+    Очистка реестра (например, после изменения настроек в тестах).
+    """
+    with _lock:
+        _events.clear()
@@ -0,0 +1,154 @@
+"""
+Рендеринг лог-сообщения в формат CEF.
+Экранирование выполняется по заранее построенным таблицам, а значения без спецсимволов
+возвращаются как есть, без копирования.
+"""
+
+import socket
+
+from datetime import datetime
+
+
+# шаблон CEF-заголовка (совпадает с cef_logger.fields.Fields)
+BASE_HEADER_TPL = (
+    'CEF:{Version}|{DeviceVendor}|{DeviceProduct}|{DeviceVersion}|'
+    '{DeviceEventClassID}|{Name}|{Severity}|'
+)
+RECORD_HEADER_TPL = 'CEF:{}|{}|{}|{}|{}|{}|{}|'
+
+# таблицы экранирования: пары (символ, замена) в порядке применения.
+# str.translate с многосимвольными заменами в CPython не имеет быстрого пути и на кириллице
+# работает в десятки раз медленнее str.replace, поэтому таблица применяется посимвольно
+# и только для символов, которые действительно встречаются в значении.
+HEADER_ESCAPE_TABLE = (('\r', ''), ('\n', ''), ('\\', '\\\\'), ('|', '\\|'))
+EXTENSION_ESCAPE_TABLE = (('\\', '\\\\'), ('=', '\\='))
+
+# типы, которые рендерятся без приведения к строке (см. Fields._calculate_dynamic_fields)
+PLAIN_TYPES = (bool, int, str, list, tuple, set, dict, type(None))
+
+# максимальное количество запомненных отрендеренных CEF-заголовков
+HEADER_CACHE_SIZE = 4096
+_header_cache = {}
+
+
+def calculate_dynamic_fields(fields):
+    """
+    Приведение к строке значений непростых типов (на месте, как в Fields._calculate_dynamic_fields).
+    """
+    for key, value in fields.items():
+        if not isinstance(value, PLAIN_TYPES):
+            fields[key] = str(value)
+    return fields
+
+
+def _escape(value, table):
+    """
+    Экранирование строки по таблице. Значение без спецсимволов возвращается без копирования.
+    """
+    for char, replacement in table:
+        if char in value:
+            value = value.replace(char, replacement)
+    return value
+
+
+def escape_header(value):
+    """
+    Экранирование значения поля заголовка.
+    """
+    if not isinstance(value, str):
+        if isinstance(value, PLAIN_TYPES):
+            return value
+        value = str(value)
+    return _escape(value, HEADER_ESCAPE_TABLE)
+
+
+def escape_extension(value):
+    """
+    Экранирование значения поля расширения.
+    """
+    if not isinstance(value, str):
+        if value is None:
+            return ''
+        if isinstance(value, PLAIN_TYPES):
+            return value
+        value = str(value)
+    return _escape(value, EXTENSION_ESCAPE_TABLE)
+
+
+def render_syslog_header(syslog_flag):
+    """
+    Формирование syslog-заголовка: дата, время и хост.
+    """
+    if not syslog_flag:
+        return ''
+    timestamp = datetime.utcnow().isoformat() + '+00:00'
+    return f'{timestamp} {get_hostname()} '
+
+
+def render_base_header(mandatory):
+    """
+    Формирование CEF-заголовка из обязательных полей.
+    """
+    return BASE_HEADER_TPL.format(**{key: escape_header(value) for key, value in mandatory.items()})
+
+
+def header_key(header):
+    """
+    Ключ кэша CEF-заголовка: значения вместе с их типами, так как 1, 1.0 и True равны,
+    но рендерятся по-разному. Ключ заголовка с нехэшируемыми значениями вызывает TypeError.
+    """
+    return header, tuple(map(type, header))
+
+
+def render_header(header):
+    """
+    Формирование CEF-заголовка из значений EventRecord.header(). Заголовки повторяются
+    (один на класс-событие и ViewSet), поэтому результат кэшируется.
+    """
+    key = header_key(header)
+    try:
+        return _header_cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        return RECORD_HEADER_TPL.format(*map(escape_header, header))
+    rendered = RECORD_HEADER_TPL.format(*map(escape_header, header))
+    if len(_header_cache) >= HEADER_CACHE_SIZE:
+        _header_cache.clear()
+    _header_cache[key] = rendered
+    return rendered
+
+
+def render_record(record, syslog_flag=False):
+    """
+    Формирование лог-сообщения напрямую из EventRecord.
+    """
+    header = render_header(record.header())
+    extensions = ' '.join(f'{key}={escape_extension(value)}' for key, value in record.items())
+    return render_syslog_header(syslog_flag) + header + extensions.rstrip(' ')
+
+
+def render_extensions(*extensions):
+    """
+    Формирование строки расширений из словарей в порядке их следования.
+    """
+    return ' '.join(
+        f'{key}={escape_extension(value)}' for fields in extensions for key, value in fields.items()
+    ).rstrip(' ')
+
+
+_hostname = None
+
+
+def get_hostname():
+    """
+    Получение FQDN хоста. Значение вычисляется один раз на процесс.
+    """
+    global _hostname
+    if _hostname is None:
+        # Workaround для macOS (https://bugs.python.org/issue35164)
+        try:
+            _hostname = socket.getfqdn()
+        except socket.gaierror:
+            _hostname = 'localhost'
+    return _hostname
@@ -0,0 +1,182 @@
+"""
+Маршрутизация лог-сообщений в разные приемники по классу события, важности и наименованию.
+У каждого маршрута своя очередь и свой поток записи, поэтому медленный приемник
+не задерживает события других маршрутов.
+"""
+
+import itertools
+import logging
+import queue
+
+from logging.handlers import QueueListener
+
+
+# значение условия маршрута, совпадающее с любым значением поля (в том числе None)
+ANY = object()
+
+# поля события, по которым выбирается маршрут
+ROUTE_KEYS = ('DeviceEventClassID', 'Severity', 'Name')
+
+# максимальное количество запомненных сочетаний полей
+MATCH_CACHE_SIZE = 4096
+
+
+class RouteListener(QueueListener):
+    """
+    Поток записи маршрута. Очередь маршрута ограничена, поэтому при остановке маркер
+    завершения ждет свободного места, а не вызывает queue.Full.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class Route:
+    """
+    Маршрут: условия на поля события и приемники (logging.Handler).
+    Условие - одно значение, набор значений или ANY.
+
+        Route(syslog_handler, DeviceEventClassID=('update', 'delete'))
+        Route(file_handler, DeviceEventClassID='view', Severity=ANY)
+    """
+
+    def __init__(self, *handlers, queue_size=10_000, **conditions):
+        if unknown := conditions.keys() - set(ROUTE_KEYS):
+            raise ValueError(f'Неизвестные условия маршрута: {", ".join(sorted(unknown))}')
+        self.handlers = handlers
+        self.conditions = conditions
+        self.dropped = 0  # количество событий, отброшенных при переполнении очереди
+        self.queue = queue.Queue(queue_size)
+        self.listener = RouteListener(self.queue, *handlers, respect_handler_level=True)
+        self._started = False
+
+    def keys(self):
+        """
+        Все сочетания значений условий; ANY на месте незаданных полей.
+        """
+        values = []
+        for key in ROUTE_KEYS:
+            value = self.conditions.get(key, ANY)
+            values.append(value if isinstance(value, (tuple, list, set, frozenset)) else (value,))
+        return itertools.product(*values)
+
+    def put(self, record):
+        """
+        Returns:
+            bool: запись помещена в очередь маршрута
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def start(self):
+        self.listener.start()
+        self._started = True
+
+    def stop(self):
+        """
+        Остановка потока записи после отправки всех событий из очереди.
+        """
+        if not self._started:
+            return
+        self._started = False
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+class RouterHandler(logging.Handler):
+    """
+    Обработчик, отправляющий событие во все подходящие маршруты (или в default, если таких нет).
+    Записи без событий (например, сообщения об ошибках error_log) отправляются в fallback,
+    а если он не задан - во все маршруты.
+
+    Условия маршрутов компилируются один раз в индекс по точным сочетаниям полей,
+    а результат выбора запоминается для каждого сочетания, поэтому выбор маршрутов
+    для события - один поиск в словаре.
+
+        BaseEvent.EMITTERS = (
+            RouterHandler(
+                Route(SysLogHandler(address=('siem', 514)), Severity=(6, 8)),
+                Route(logging.FileHandler('/var/log/cef/view.log'), DeviceEventClassID='view'),
+            ),
+        )
+    """
+
+    def __init__(self, *routes, default=None, fallback=None):
+        super().__init__()
+        self.routes = routes
+        self.default = default
+        self.fallback = fallback
+        self._index = {}
+        for route in routes:
+            for key in route.keys():
+                self._index.setdefault(key, []).append(route)
+        self._cache = {}
+        for route in self.all_routes:
+            route.start()
+
+    @property
+    def all_routes(self):
+        return tuple(
+            dict.fromkeys(
+                route for route in (*self.routes, self.default, self.fallback) if route
+            )
+        )
+
+    def match(self, event):
+        """
+        Маршруты для события.
+
+        Returns:
+            tuple[Route]: подходящие маршруты
+        """
+        key = (event.DeviceEventClassID, event.Severity, event.Name)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        routes = []
+        for probe in itertools.product(*((value, ANY) for value in key)):
+            for route in self._index.get(probe, ()):
+                if route not in routes:
+                    routes.append(route)
+        routes = tuple(routes) or ((self.default,) if self.default else ())
+        if len(self._cache) >= MATCH_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = routes
+        return routes
+
+    def emit(self, record):
+        try:
+            events = getattr(record, 'events', None)
+            if not events:
+                for route in (self.fallback,) if self.fallback else self.all_routes:
+                    route.put(record)
+                return
+            if len(events) == 1:
+                for route in self.match(events[0]):
+                    if not route.put(record):
+                        record.mark_dropped()
+                return
+            # пачка событий разбивается по маршрутам с сохранением порядка
+            grouped = {}
+            for event in events:
+                for route in self.match(event):
+                    grouped.setdefault(route, []).append(event)
+            for route, route_events in grouped.items():
+                route_record = record.__class__(
+                    tuple(route_events), record.encoder, record.syslog_flag
+                )
+                if not route.put(route_record):
+                    record.mark_dropped(len(route_events))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for route in self.all_routes:
+            route.stop()
+        super().close()
@@ -0,0 +1,251 @@
+"""
+Индекс и поиск по файлам CEF-логов без полного просмотра файлов.
+
+Индекс (SQLite) хранит для значений externalId, suser, src, Name, cs1 и часовых
+интервалов «end» смещения строк в файлах. Индекс дополняется по мере роста файлов:
+повторная индексация продолжает чтение с последнего проиндексированного сообщения.
+Поиск выбирает смещения по индексу и читает только найденные строки.
+
+    python -m cef_loggers.search index /var/log/cef/audit.log --db /var/log/cef/audit.sqlite
+    python -m cef_loggers.search query --db /var/log/cef/audit.sqlite --suser ivanov
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from .parser import iter_messages, parse_line
+
+
+# поля, по значениям которых строится индекс
+INDEX_KEYS = ('externalId', 'suser', 'src', 'Name', 'cs1')
+
+# ключ индекса для интервалов времени «end» и размер интервала в секундах
+END_BUCKET_KEY = 'end'
+END_BUCKET_SECONDS = 3600
+
+# количество строк, после которого индексация фиксирует транзакцию
+COMMIT_EVERY = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    inode INTEGER NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lookup ON entries (key, value, file_id, offset);
+CREATE INDEX IF NOT EXISTS entries_position ON entries (file_id, offset);
+"""
+
+
+class LogIndex:
+    """
+    Индекс файлов CEF-логов в базе SQLite.
+    """
+
+    def __init__(self, database, keys=INDEX_KEYS):
+        self.keys = keys
+        self.connection = sqlite3.connect(database)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, path):
+        """
+        Индексация новых лог-сообщений файла. Если файл был заменен (другой inode) или усечен,
+        он индексируется заново.
+
+        Последнее сообщение файла может дополняться строками продолжения (переводы строк
+        в значениях расширений), поэтому сохраняется позиция его начала, а при следующей
+        индексации оно индексируется заново.
+
+        Returns:
+            int: количество проиндексированных сообщений, включая последнее сообщение
+                предыдущей индексации
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        file_id, position = self._get_file(path, stat)
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM entries WHERE file_id = ? AND offset >= ?', (file_id, position)
+            )
+
+        count = 0
+        entries = []
+        with open(path, 'rb') as file:
+            for offset, message in iter_messages(file, position):
+                position = offset
+                try:
+                    event = parse_line(message.decode('utf-8'))
+                except ValueError:
+                    continue
+                entries.extend(
+                    (key, value, file_id, offset) for key, value in self.get_entries(event)
+                )
+                count += 1
+                if count % COMMIT_EVERY == 0:
+                    self._save(file_id, entries, position)
+                    entries = []
+        self._save(file_id, entries, position)
+        return count
+
+    def get_entries(self, event):
+        """
+        Пары (ключ, значение) индекса для одного лог-сообщения.
+        """
+        for key in self.keys:
+            if value := event.get(key):
+                yield key, value
+        end = event.get('end')
+        if end and end.isdigit():
+            yield END_BUCKET_KEY, _bucket(int(end))
+
+    def search(self, since=None, until=None, **conditions):
+        """
+        Поиск лог-сообщений по точным значениям полей и периоду [since, until] по «end».
+
+        Yields:
+            tuple[str, int, str, ParsedEvent]: файл, смещение, сообщение и разобранное сообщение
+        """
+        clauses = [(key, str(value)) for key, value in conditions.items() if value is not None]
+        query, params = self._build_query(clauses, since, until)
+        if query is None:
+            raise ValueError('Не задано ни одного условия поиска')
+
+        files = dict(self.connection.execute('SELECT id, path FROM files'))
+        opened = {}
+        try:
+            for file_id, offset in self.connection.execute(query, params):
+                if file_id not in opened:
+                    opened[file_id] = open(files[file_id], 'rb')
+                _, message = next(iter_messages(opened[file_id], offset), (offset, b''))
+                line = message.decode('utf-8', errors='replace')
+                try:
+                    event = parse_line(line)
+                except ValueError:
+                    continue
+                if not self._matches(event, clauses, since, until):
+                    continue
+                yield files[file_id], offset, line, event
+        finally:
+            for file in opened.values():
+                file.close()
+
+    def _build_query(self, clauses, since, until):
+        """
+        Пересечение смещений по всем условиям одним SQL-запросом.
+        """
+        selects, params = [], []
+        for key, value in clauses:
+            selects.append('SELECT file_id, offset FROM entries WHERE key = ? AND value = ?')
+            params.extend((key, value))
+        if since is not None or until is not None:
+            selects.append(
+                'SELECT file_id, offset FROM entries WHERE key = ? AND value BETWEEN ? AND ?'
+            )
+            params.extend(
+                (
+                    END_BUCKET_KEY,
+                    _bucket(since if since is not None else 0),
+                    _bucket(until if until is not None else sys.maxsize),
+                )
+            )
+        if not selects:
+            return None, params
+        return ' INTERSECT '.join(selects) + ' ORDER BY file_id, offset', params
+
+    @staticmethod
+    def _matches(event, clauses, since, until):
+        """
+        Проверка найденной строки: значения могли измениться, если файл перезаписан
+        после индексации, а интервалы «end» шире запрошенного периода.
+        """
+        if any(event.get(key) != value for key, value in clauses):
+            return False
+        if since is None and until is None:
+            return True
+        end = event.get('end')
+        if not end or not end.isdigit():
+            return False
+        return (since is None or int(end) >= since) and (until is None or int(end) <= until)
+
+    def _get_file(self, path, stat):
+        row = self.connection.execute(
+            'SELECT id, inode, position FROM files WHERE path = ?', (path,)
+        ).fetchone()
+        if row is None:
+            cursor = self.connection.execute(
+                'INSERT INTO files (path, inode, position) VALUES (?, ?, 0)', (path, stat.st_ino)
+            )
+            return cursor.lastrowid, 0
+        file_id, inode, position = row
+        if inode != stat.st_ino or stat.st_size < position:
+            with self.connection:
+                self.connection.execute('DELETE FROM entries WHERE file_id = ?', (file_id,))
+                self.connection.execute(
+                    'UPDATE files SET inode = ?, position = 0 WHERE id = ?', (stat.st_ino, file_id)
+                )
+            return file_id, 0
+        return file_id, position
+
+    def _save(self, file_id, entries, position):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO entries (key, value, file_id, offset) VALUES (?, ?, ?, ?)', entries
+            )
+            self.connection.execute(
+                'UPDATE files SET position = ? WHERE id = ?', (position, file_id)
+            )
+
+
+def _bucket(timestamp):
+    """
+    Интервал времени «end» строкой фиксированной длины, чтобы диапазон интервалов
+    выбирался по индексу сравнением строк.
+    """
+    return f'{timestamp // END_BUCKET_SECONDS:020d}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Индекс и поиск по файлам CEF-логов')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    index = commands.add_parser('index', help='проиндексировать новые строки файлов')
+    index.add_argument('files', nargs='+', help='файлы CEF-логов')
+    index.add_argument('--db', required=True, help='файл индекса SQLite')
+
+    query = commands.add_parser('query', help='найти лог-сообщения')
+    query.add_argument('--db', required=True, help='файл индекса SQLite')
+    for key in INDEX_KEYS:
+        query.add_argument(f'--{key}', dest=key)
+    query.add_argument('--since', type=int, help='начало периода по «end» (unix time)')
+    query.add_argument('--until', type=int, help='конец периода по «end» (unix time)')
+    args = parser.parse_args(argv)
+
+    log_index = LogIndex(args.db)
+    try:
+        if args.command == 'index':
+            for path in args.files:
+                print(f'{path}: {log_index.update(path)}', file=sys.stderr)
+            return
+        conditions = {key: getattr(args, key) for key in INDEX_KEYS}
+        for _, _, line, _ in log_index.search(args.since, args.until, **conditions):
+            sys.stdout.write(line)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        log_index.close()
+
+
+if __name__ == '__main__':
+    main()
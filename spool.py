@@ -0,0 +1,381 @@
+"""
+Локальный дисковый спул для лог-сообщений на случай, когда приемник логов недоступен
+или не укладывается в бюджет задержки. Сообщения пишутся в кольцо сегментных файлов
+ограниченного размера и дозаписываются в приемник фоновым потоком после его восстановления.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .encoders import format_events
+
+
+# заголовок записи в сегменте: длина данных и их crc32
+FRAME_HEADER = struct.Struct('>II')
+
+SEGMENT_SUFFIX = '.seg'
+CURSOR_FILE = 'cursor'
+
+
+class Spool:
+    """
+    Кольцо append-only сегментов с записями вида [длина][crc32][данные].
+
+    Позиция чтения (сегмент, смещение) хранится в файле cursor и обновляется атомарно,
+    поэтому после падения процесса чтение продолжается с последней подтвержденной записи
+    (доставка «как минимум один раз»). Поврежденный хвост последнего сегмента отбрасывается
+    при открытии спула, а остаток сегмента после поврежденной записи пропускается при чтении.
+    """
+
+    def __init__(
+        self, directory, max_bytes=256 * 1024 * 1024, segment_bytes=16 * 1024 * 1024, fsync=False
+    ):
+        """
+        Args:
+            directory (str): каталог спула
+            max_bytes (int): максимальный суммарный размер сегментов на диске
+            segment_bytes (int): размер сегмента, после которого начинается новый
+            fsync (bool): вызывать os.fsync после каждой записи
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.dropped = 0  # количество записей, вытесненных из-за ограничения размера
+        self.corrupted = 0  # количество сегментов, остаток которых пропущен из-за повреждения
+        self._corrupted_segments = set()
+
+        self._lock = threading.RLock()
+        self._reader = self._reader_segment = None
+
+        os.makedirs(directory, exist_ok=True)
+        self.segments = sorted(
+            int(name[: -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        ) or [1]
+        self.cursor = self._load_cursor()
+        self._repair_tail()
+        self._writer = open(self._segment_path(self.segments[-1]), 'ab')
+        self._sizes = {
+            segment: os.path.getsize(self._segment_path(segment)) for segment in self.segments
+        }
+
+    def __len__(self):
+        """
+        Количество байт, ожидающих отправки.
+        """
+        with self._lock:
+            segment, offset = self.cursor
+            return sum(size for key, size in self._sizes.items() if key >= segment) - offset
+
+    def append(self, message):
+        """
+        Добавление сообщения в конец спула.
+        """
+        data = message.encode('utf-8')
+        frame = FRAME_HEADER.pack(len(data), zlib.crc32(data)) + data
+        with self._lock:
+            size = self._sizes[self.segments[-1]]
+            if size and size + len(frame) > self.segment_bytes:
+                self._rotate()
+            self._writer.write(frame)
+            self._writer.flush()
+            if self.fsync:
+                os.fsync(self._writer.fileno())
+            self._sizes[self.segments[-1]] += len(frame)
+            self._trim()
+
+    def read(self, limit=100):
+        """
+        Чтение до limit сообщений начиная с позиции cursor.
+
+        Returns:
+            list[tuple[str, tuple]]: пары (сообщение, позиция после сообщения)
+        """
+        messages = []
+        with self._lock:
+            segment, offset = self.cursor
+            while len(messages) < limit:
+                frame = self._read_frame(segment, offset)
+                if frame is None:
+                    corrupted = offset < self._sizes[segment]
+                    if segment == self.segments[-1]:
+                        if not corrupted:
+                            break
+                        # запись продолжается в новом сегменте, иначе поврежденный участок
+                        # оставался бы непрочитанным и спул никогда бы не опустел
+                        self._rotate()
+                    if corrupted and segment not in self._corrupted_segments:
+                        self._corrupted_segments.add(segment)
+                        self.corrupted += 1
+                    # конец или поврежденный участок сегмента - переходим к следующему
+                    segment, offset = self.segments[self.segments.index(segment) + 1], 0
+                    messages.append((None, (segment, offset)))
+                    continue
+                data, offset = frame
+                messages.append((data.decode('utf-8'), (segment, offset)))
+        return messages
+
+    def commit(self, position):
+        """
+        Подтверждение доставки сообщений до позиции position и удаление прочитанных сегментов.
+        """
+        with self._lock:
+            if position[0] not in self._sizes:
+                return
+            self.cursor = position
+            for segment in [key for key in self.segments if key < position[0]]:
+                self._remove_segment(segment)
+            tmp_path = os.path.join(self.directory, f'{CURSOR_FILE}.tmp')
+            with open(tmp_path, 'w') as file:
+                file.write(f'{position[0]} {position[1]}')
+            os.replace(tmp_path, os.path.join(self.directory, CURSOR_FILE))
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            if self._reader:
+                self._reader.close()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'{segment:010d}{SEGMENT_SUFFIX}')
+
+    def _load_cursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as file:
+                segment, offset = map(int, file.read().split())
+        except (OSError, ValueError):
+            return self.segments[0], 0
+        if segment not in self.segments:
+            return self.segments[0], 0
+        return segment, offset
+
+    def _repair_tail(self):
+        """
+        Обрезка недописанной или поврежденной записи в конце последнего сегмента.
+        """
+        segment = self.segments[-1]
+        offset = self.cursor[1] if self.cursor[0] == segment else 0
+        while (frame := self._read_frame(segment, offset)) is not None:
+            offset = frame[1]
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) > offset:
+            with open(path, 'r+b') as file:
+                file.truncate(offset)
+
+    def _read_frame(self, segment, offset):
+        """
+        Чтение одной записи. Возвращает (данные, смещение следующей записи) или None,
+        если запись неполная или не совпадает контрольная сумма.
+        """
+        if self._reader_segment != segment:
+            if self._reader:
+                self._reader.close()
+            try:
+                self._reader = open(self._segment_path(segment), 'rb')
+            except FileNotFoundError:
+                self._reader = self._reader_segment = None
+                return None
+            self._reader_segment = segment
+        self._reader.seek(offset)
+        header = self._reader.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return None
+        length, checksum = FRAME_HEADER.unpack(header)
+        data = self._reader.read(length)
+        if len(data) < length or zlib.crc32(data) != checksum:
+            return None
+        return data, offset + FRAME_HEADER.size + length
+
+    def _rotate(self):
+        self._writer.close()
+        segment = self.segments[-1] + 1
+        self.segments.append(segment)
+        self._sizes[segment] = 0
+        self._writer = open(self._segment_path(segment), 'ab')
+
+    def _trim(self):
+        """
+        Вытеснение самых старых сегментов при превышении max_bytes.
+        """
+        while len(self.segments) > 1 and sum(self._sizes.values()) > self.max_bytes:
+            segment = self.segments[0]
+            if self.cursor[0] == segment:
+                self.dropped += self._count_frames(segment, self.cursor[1])
+                self.cursor = (self.segments[1], 0)
+            self._remove_segment(segment)
+
+    def _count_frames(self, segment, offset):
+        count = 0
+        while (frame := self._read_frame(segment, offset)) is not None:
+            offset = frame[1]
+            count += 1
+        return count
+
+    def _remove_segment(self, segment):
+        if self._reader_segment == segment:
+            self._reader.close()
+            self._reader = self._reader_segment = None
+        self.segments.remove(segment)
+        del self._sizes[segment]
+        self._corrupted_segments.discard(segment)
+        try:
+            os.remove(self._segment_path(segment))
+        except FileNotFoundError:
+            pass
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель: после failure_threshold ошибок подряд приемник считается
+    недоступным на reset_timeout секунд, затем пропускается одна пробная отправка.
+    Пока ее результат неизвестен (HALF_OPEN), остальные отправки не пропускаются; если результат
+    не получен за reset_timeout секунд, пропускается следующая пробная отправка.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=5.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Можно ли отправлять сообщение в приемник.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class SpoolHandler(logging.Handler):
+    """
+    Обработчик-обертка над приемником логов (target) со спулом на диске.
+
+    Сообщения отправляются в target напрямую, пока он работает и укладывается в latency_budget.
+    Иначе, а также пока в спуле есть неотправленные сообщения (для сохранения порядка),
+    сообщения пишутся в спул, а фоновый поток отправляет их в target после восстановления.
+
+    Кодировщик задается форматтером самого SpoolHandler: в target передается готовая строка.
+    Бюджет задержки не прерывает зависшую отправку, поэтому у сетевых приемников должен быть
+    задан таймаут сокета.
+
+        BaseEvent.EMITTERS = (SpoolHandler(SysLogHandler(...), '/var/spool/cef'),)
+    """
+
+    def __init__(
+        self,
+        target,
+        directory,
+        latency_budget=0.5,
+        breaker=None,
+        replay_interval=1.0,
+        replay_batch=100,
+        **spool_options,
+    ):
+        super().__init__()
+        self.target = target
+        self.latency_budget = latency_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.spool = Spool(directory, **spool_options)
+        self.replay_interval = replay_interval
+        self.replay_batch = replay_batch
+
+        # по умолчанию logging.Handler глушит ошибки отправки в handleError,
+        # а спулу нужно о них знать
+        target.handleError = self._raise_error
+
+        self._stopped = threading.Event()
+        self._replayer = threading.Thread(
+            target=self._replay, name='cef-spool-replayer', daemon=True
+        )
+        self._replayer.start()
+
+    def emit(self, record):
+        try:
+            # события пачки (EventLogRecord) доставляются и спулятся по одному
+            messages = format_events(self, record)
+            delivered = 0
+            if not len(self.spool) and self.breaker.allow():
+                while delivered < len(messages) and self._deliver(messages[delivered]):
+                    delivered += 1
+            for message in messages[delivered:]:
+                self.spool.append(message)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self._stopped.set()
+        self._replayer.join(self.replay_interval * 2)
+        self.spool.close()
+        self.target.close()
+        super().close()
+
+    def _deliver(self, message):
+        """
+        Отправка сообщения в target с учетом бюджета задержки.
+        """
+        started = time.monotonic()
+        try:
+            self.target.handle(logging.makeLogRecord({'msg': message}))
+        except Exception:
+            self.breaker.failure()
+            return False
+        if time.monotonic() - started > self.latency_budget:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+        return True
+
+    def _replay(self):
+        """
+        Фоновая дозапись сообщений из спула в target в порядке их поступления.
+        """
+        while not self._stopped.is_set():
+            if not len(self.spool) or not self.breaker.allow():
+                self._stopped.wait(self.replay_interval)
+                continue
+            position = None
+            messages = self.spool.read(self.replay_batch)
+            if not messages:
+                self._stopped.wait(self.replay_interval)
+                continue
+            for message, next_position in messages:
+                if message is not None and not self._deliver(message):
+                    break
+                position = next_position
+            if position is not None:
+                self.spool.commit(position)
+
+    @staticmethod
+    def _raise_error(record):
+        raise  # noqa: PLE0704 - повторно возбуждаем исключение, пойманное в emit приемника
@@ -0,0 +1,58 @@
+"""
+Состояние аудита одного запроса. Создается в CEFLogMixin.dispatch для каждого запроса,
+поэтому атрибуты аудита не разделяются между запросами и потоками.
+"""
+
+
+class AuditState:
+    """
+    Данные, которые CEFLogMixin собирает во время обработки запроса.
+    """
+
+    __slots__ = (
+        'response',
+        'error',
+        'params',
+        'old_object',
+        'new_object',
+        'changed_fields',
+        'queries',
+        'transaction_buffer',
+        'cascade',
+        'snapshot',
+    )
+
+    def __init__(self):
+        self.response = None  # ответ на запрос
+        self.error = None  # возникшее исключение
+        self.params = None  # экземпляр ParamsSelector с лог-параметрами
+        self.old_object = {}  # объект до изменения
+        self.new_object = {}  # объект после изменения
+        self.changed_fields = ()  # наименования измененных атрибутов
+        self.queries = None  # экземпляр QueryBudget, если включен учет запросов аудита
+        self.transaction_buffer = None  # экземпляр TransactionBuffer для transactional_cef_log
+        self.cascade = None  # экземпляр CascadeDeletion для cascade_cef_log
+        self.snapshot = None  # записи событий для отправки после ответа при defer_cef_log
+
+
+class StateAttribute:
+    """
+    Атрибут ViewSet, который хранится в состоянии аудита текущего запроса (audit_state).
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if (state := instance.__dict__.get('audit_state')) is None:
+            # до dispatch и после release_audit_state - значение по умолчанию из AuditState
+            state = AuditState()
+        return getattr(state, self.name)
+
+    def __set__(self, instance, value):
+        state = instance.__dict__.get('audit_state')
+        if state is None:
+            state = instance.__dict__['audit_state'] = AuditState()
+        setattr(state, self.name, value)
@@ -0,0 +1,382 @@
+"""
+Статистика потока событий аудита с фиксированным объемом памяти на воркер:
+самые частые значения (space-saving top-K), количество событий по значениям
+(count-min sketch) и количество уникальных пользователей по представлениям (HyperLogLog).
+
+Хэши значений не зависят от PYTHONHASHSEED, поэтому снимки (snapshot) разных воркеров
+и хостов можно объединять:
+
+    stats = StatsHandler()
+    BaseEvent.EMITTERS = (*BaseEvent.EMITTERS, stats)
+    ...
+    total = AuditStats.from_snapshot(snapshot_1).merge(AuditStats.from_snapshot(snapshot_2))
+    total.top('suser'), total.count('Name', 'events-list'), total.distinct('events-list')
+"""
+
+import base64
+import hashlib
+import heapq
+import logging
+import math
+
+
+# поля, для которых отслеживаются самые частые значения
+TOP_KEYS = ('suser', 'src', 'Name', 'DeviceEventClassID')
+
+# поля, для которых оценивается количество событий по любому значению
+COUNT_KEYS = ('Name', 'DeviceEventClassID')
+
+# поле группы и поле, количество уникальных значений которого оценивается в каждой группе
+DISTINCT_KEYS = ('Name', 'suser')
+
+# группа, в которую попадают события после исчерпания лимита групп
+OTHER_GROUP = '*'
+
+# максимальное количество запомненных хэшей значений
+HASH_CACHE_SIZE = 65536
+
+_hash_cache = {}
+
+
+def stable_hash(value):
+    """
+    64-битный хэш строкового представления значения, одинаковый во всех процессах.
+    """
+    try:
+        return _hash_cache[value]
+    except KeyError:
+        pass
+    except TypeError:
+        value = str(value)
+    result = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+    if len(_hash_cache) >= HASH_CACHE_SIZE:
+        _hash_cache.clear()
+    _hash_cache[value] = result
+    return result
+
+
+class CountMinSketch:
+    """
+    Оценка количества по значению сверху: ошибка не больше 2 * total / width
+    с вероятностью 1 - 0.5 ** depth.
+
+    Строки таблицы хранятся в одном списке, а индексы ячеек значения запоминаются,
+    поэтому обновление для повторяющегося значения - один поиск в словаре и depth сложений.
+    """
+
+    __slots__ = ('width', 'depth', 'cells', '_indexes')
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.cells = [0] * (width * depth)
+        self._indexes = {}
+
+    def indexes(self, value):
+        """
+        Индексы ячеек значения (двойное хэширование одного 64-битного хэша).
+        """
+        try:
+            return self._indexes[value]
+        except KeyError:
+            pass
+        hashed = stable_hash(value)
+        low, high = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        width = self.width
+        indexes = tuple(row * width + (low + row * high) % width for row in range(self.depth))
+        if len(self._indexes) >= HASH_CACHE_SIZE:
+            self._indexes.clear()
+        self._indexes[value] = indexes
+        return indexes
+
+    def add(self, value, count=1):
+        cells = self.cells
+        for index in self.indexes(value):
+            cells[index] += count
+
+    def estimate(self, value):
+        cells = self.cells
+        return min(cells[index] for index in self.indexes(value))
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError('Размеры count-min sketch не совпадают')
+        self.cells = list(map(sum, zip(self.cells, other.cells)))
+        return self
+
+    def snapshot(self):
+        return {'width': self.width, 'depth': self.depth, 'cells': self.cells.copy()}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        sketch = cls(data['width'], data['depth'])
+        sketch.cells = list(data['cells'])
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Top-K самых частых значений. Для каждого значения хранится количество и его
+    максимальная переоценка (error): настоящее количество не меньше count - error.
+
+    Значение с минимальным количеством ищется по куче с отложенным обновлением:
+    при увеличении счетчика куча не меняется, устаревшая запись исправляется
+    только при вытеснении, поэтому стоимость обновления в среднем O(log k).
+    """
+
+    __slots__ = ('size', 'counters', 'heap')
+
+    def __init__(self, size=50):
+        self.size = size
+        self.counters = {}  # значение -> [количество, переоценка]
+        self.heap = []  # (количество на момент добавления в кучу, значение)
+
+    def add(self, value, count=1):
+        counters = self.counters
+        if (counter := counters.get(value)) is not None:
+            counter[0] += count
+            return
+        if len(counters) < self.size:
+            counters[value] = [count, 0]
+            heapq.heappush(self.heap, (count, value))
+            return
+        heap = self.heap
+        while True:
+            minimum, evicted = heap[0]
+            current = counters[evicted][0]
+            if minimum == current:
+                break
+            heapq.heapreplace(heap, (current, evicted))
+        del counters[evicted]
+        counters[value] = [minimum + count, minimum]
+        heapq.heapreplace(heap, (minimum + count, value))
+
+    def top(self, limit=None):
+        """
+        Returns:
+            list[tuple]: (значение, количество, переоценка) по убыванию количества
+        """
+        items = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(value, count, error) for value, (count, error) in items[:limit]]
+
+    def merge(self, other):
+        """
+        Объединение сводок: счетчики складываются, остаются size самых частых значений.
+        """
+        counters = {value: counter.copy() for value, counter in self.counters.items()}
+        for value, (count, error) in other.counters.items():
+            if (counter := counters.get(value)) is not None:
+                counter[0] += count
+                counter[1] += error
+            else:
+                counters[value] = [count, error]
+        items = sorted(counters.items(), key=lambda item: item[1][0], reverse=True)
+        self.counters = dict(items[:self.size])
+        self.heap = [(count, value) for value, (count, _) in self.counters.items()]
+        heapq.heapify(self.heap)
+        return self
+
+    def snapshot(self):
+        return {'size': self.size, 'items': self.top()}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        summary = cls(data['size'])
+        summary.counters = {value: [count, error] for value, count, error in data['items']}
+        summary.heap = [(count, value) for value, count, _ in data['items']]
+        heapq.heapify(summary.heap)
+        return summary
+
+
+class HyperLogLog:
+    """
+    Оценка количества уникальных значений: 2 ** precision байт памяти,
+    относительная ошибка около 1.04 / sqrt(2 ** precision).
+    """
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision=10):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = stable_hash(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        if estimate <= 2.5 * size and (zeros := self.registers.count(0)):
+            # поправка для малых множеств (linear counting)
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError('Точность HyperLogLog не совпадает')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def snapshot(self):
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(self.registers).decode(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        counter = cls(data['precision'])
+        counter.registers = bytearray(base64.b64decode(data['registers']))
+        return counter
+
+
+class AuditStats:
+    """
+    Статистика событий: top-K по TOP_KEYS, count-min sketch по COUNT_KEYS
+    и HyperLogLog по DISTINCT_KEYS. Объем памяти не зависит от количества событий:
+    количество групп HyperLogLog ограничено max_groups.
+    """
+
+    def __init__(self, top_size=50, width=2048, depth=4, precision=10, max_groups=256):
+        self.top_size = top_size
+        self.precision = precision
+        self.max_groups = max_groups
+        self.events = 0
+        self.tops = {key: SpaceSaving(top_size) for key in TOP_KEYS}
+        self.sketch = CountMinSketch(width, depth)
+        self.groups = {}
+
+    def add(self, event):
+        """
+        Учет события (EventRecord).
+        """
+        self.events += 1
+        for key, summary in self.tops.items():
+            if (value := getattr(event, key, None)) is not None:
+                summary.add(value if value.__class__ is str else str(value))
+        for key in COUNT_KEYS:
+            if (value := getattr(event, key, None)) is not None:
+                self.sketch.add((key, value if value.__class__ is str else str(value)))
+        group_key, value_key = DISTINCT_KEYS
+        if (value := getattr(event, value_key, None)) is not None:
+            group = str(getattr(event, group_key, None))
+            if (counter := self.groups.get(group)) is None:
+                if len(self.groups) >= self.max_groups:
+                    group = OTHER_GROUP
+                if (counter := self.groups.get(group)) is None:
+                    counter = self.groups[group] = HyperLogLog(self.precision)
+            counter.add(value if value.__class__ is str else str(value))
+
+    def top(self, key, limit=None):
+        """
+        Самые частые значения поля: (значение, количество, переоценка).
+        """
+        return self.tops[key].top(limit)
+
+    def count(self, key, value):
+        """
+        Оценка количества событий со значением поля (не меньше настоящего).
+        """
+        return self.sketch.estimate((key, str(value)))
+
+    def distinct(self, group):
+        """
+        Оценка количества уникальных значений DISTINCT_KEYS[1] в группе.
+        """
+        counter = self.groups.get(str(group))
+        return counter.count() if counter is not None else 0
+
+    def merge(self, other):
+        """
+        Добавление статистики другого воркера.
+        """
+        self.events += other.events
+        for key, summary in self.tops.items():
+            summary.merge(other.tops[key])
+        self.sketch.merge(other.sketch)
+        for group, counter in other.groups.items():
+            if group in self.groups:
+                self.groups[group].merge(counter)
+            elif len(self.groups) < self.max_groups:
+                self.groups[group] = HyperLogLog(counter.precision).merge(counter)
+            else:
+                other_group = self.groups.setdefault(OTHER_GROUP, HyperLogLog(self.precision))
+                other_group.merge(counter)
+        return self
+
+    def snapshot(self):
+        """
+        Снимок статистики, который можно сериализовать в JSON.
+        """
+        return {
+            'events': self.events,
+            'max_groups': self.max_groups,
+            'top': {key: summary.snapshot() for key, summary in self.tops.items()},
+            'sketch': self.sketch.snapshot(),
+            'distinct': {group: counter.snapshot() for group, counter in self.groups.items()},
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        sketch = CountMinSketch.from_snapshot(data['sketch'])
+        groups = {
+            group: HyperLogLog.from_snapshot(counter) for group, counter in data['distinct'].items()
+        }
+        tops = {key: SpaceSaving.from_snapshot(summary) for key, summary in data['top'].items()}
+        stats = cls(
+            top_size=max((summary.size for summary in tops.values()), default=0),
+            width=sketch.width,
+            depth=sketch.depth,
+            precision=next(iter(groups.values())).precision if groups else 10,
+            max_groups=data['max_groups'],
+        )
+        stats.events = data['events']
+        stats.tops.update(tops)
+        stats.sketch = sketch
+        stats.groups = groups
+        return stats
+
+
+class StatsHandler(logging.Handler):
+    """
+    Обработчик, который только учитывает события записи (EventLogRecord) в статистике,
+    не рендеря лог-сообщение. Добавляется в EMITTERS рядом с основными приемниками.
+    """
+
+    def __init__(self, **options):
+        """
+        Args:
+            options: параметры AuditStats (top_size, width, depth, precision, max_groups)
+        """
+        super().__init__()
+        self.stats = AuditStats(**options)
+
+    def emit(self, record):
+        try:
+            for event in getattr(record, 'events', ()):
+                self.stats.add(event)
+        except Exception:
+            self.handleError(record)
+
+    def snapshot(self, reset=False):
+        """
+        Снимок статистики; при reset статистика начинается заново (например, для интервалов).
+        """
+        with self.lock:
+            data = self.stats.snapshot()
+            if reset:
+                stats = self.stats
+                self.stats = AuditStats(
+                    top_size=stats.top_size,
+                    width=stats.sketch.width,
+                    depth=stats.sketch.depth,
+                    precision=stats.precision,
+                    max_groups=stats.max_groups,
+                )
+        return data
@@ -0,0 +1,220 @@
+"""
+Перехват лог-событий в тестах без рендеринга: события сохраняются в кольцевом буфере
+в виде проверенных EventRecord, а строка лог-сообщения формируется только по запросу.
+
+Подключение фикстуры cef_capture в conftest.py:
+
+    pytest_plugins = ['cef_loggers.testing']
+
+    def test_update(client, cef_capture):
+        client.patch('/projects/1/', {'name': 'new'})
+        cef_capture.assert_fields(DeviceEventClassID='update', cs1='name', cs3='new')
+        cef_capture.assert_outcome('success')
+        cef_capture.assert_external_ids_increasing()
+"""
+
+import logging
+
+from contextlib import contextmanager
+
+from .encoders import CEFEncoder
+
+
+try:
+    import pytest
+except ImportError:  # pragma: no cover
+    pytest = None
+
+
+# значение ожидаемого поля, совпадающее с любым заданным значением
+ANY = object()
+
+_MISSING = object()
+
+
+class CaptureHandler(logging.Handler):
+    """
+    Обработчик, сохраняющий события в заранее выделенный кольцевой буфер.
+
+    Записи событий (EventRecord) сохраняются как есть, после валидации и до рендеринга;
+    сообщения без записей (например, об ошибках формирования лог-атрибутов) сохраняются
+    строками в отдельный буфер errors. При переполнении вытесняются самые старые события.
+    """
+
+    def __init__(self, capacity=10_000):
+        super().__init__()
+        self.capacity = capacity
+        self._events = [None] * capacity
+        self._errors = [None] * capacity
+        self.total = self.total_errors = 0  # количество перехваченных событий и ошибок
+
+    def emit(self, record):
+        events = getattr(record, 'events', None)
+        if events is None:
+            self._errors[self.total_errors % self.capacity] = record.getMessage()
+            self.total_errors += 1
+            return
+        for event in events:
+            self._events[self.total % self.capacity] = event
+            self.total += 1
+
+    @staticmethod
+    def _ordered(buffer, total, capacity):
+        if total <= capacity:
+            return buffer[:total]
+        start = total % capacity
+        return buffer[start:] + buffer[:start]
+
+    @property
+    def events(self):
+        """
+        Перехваченные записи событий в порядке отправки.
+        """
+        return self._ordered(self._events, self.total, self.capacity)
+
+    @property
+    def errors(self):
+        """
+        Перехваченные сообщения без записей событий в порядке отправки.
+        """
+        return self._ordered(self._errors, self.total_errors, self.capacity)
+
+    @property
+    def dropped(self):
+        """
+        Количество событий, вытесненных из буфера.
+        """
+        return max(0, self.total - self.capacity)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def __getitem__(self, index):
+        return self.events[index]
+
+    def clear(self):
+        self._events = [None] * self.capacity
+        self._errors = [None] * self.capacity
+        self.total = self.total_errors = 0
+
+    def fields(self, index=-1):
+        """
+        Поля события в виде словаря.
+        """
+        return self.events[index].as_dict()
+
+    def render(self, index=-1, encoder=None, syslog_flag=False):
+        """
+        Лог-сообщение события (по умолчанию в формате CEF, без syslog-заголовка).
+        """
+        return (encoder or CEFEncoder()).encode(self.events[index], syslog_flag)
+
+    def rendered(self, encoder=None, syslog_flag=False):
+        """
+        Лог-сообщения всех событий буфера.
+        """
+        encoder = encoder or CEFEncoder()
+        return [encoder.encode(event, syslog_flag) for event in self.events]
+
+    def find(self, **expected):
+        """
+        События, поля которых совпадают с ожидаемыми.
+        """
+        return [event for event in self.events if not _mismatches(event, expected)]
+
+    def assert_fields(self, index=-1, **expected):
+        """
+        Проверка полей события: значения сравниваются как есть и как строки
+        (в записи значения непростых типов приведены к строке).
+        """
+        if not self.total:
+            raise AssertionError('Событий нет')
+        event = self.events[index]
+        if mismatches := _mismatches(event, expected):
+            details = '; '.join(
+                f'{key}: ожидалось {value!r}, получено {actual!r}'
+                for key, value, actual in mismatches
+            )
+            raise AssertionError(f'Поля события не совпадают: {details}\n{event!r}')
+        return event
+
+    def assert_outcome(self, outcome, reason=ANY, index=-1):
+        """
+        Проверка outcome (success, failure) и, если задана, reason события.
+        """
+        return self.assert_fields(index, outcome=outcome, reason=reason)
+
+    def assert_changes(self, *changes, index=-1, extended=False):
+        """
+        Проверка изменения атрибута в PATCH-логе: changes - наименование атрибута, старое
+        и новое значения. В логе они выводятся в cs1, cs2, cs3, а в расширенном логе
+        (is_extend_patch, extended=True) - в cs2, cs3, cs4, так как cs1 - наименование объекта.
+        """
+        start = 2 if extended else 1
+        return self.assert_fields(
+            index, **{f'cs{number}': value for number, value in enumerate(changes, start)}
+        )
+
+    def assert_external_ids_increasing(self):
+        """
+        Проверка того, что externalId событий строго возрастают (события без externalId
+        пропускаются).
+        """
+        values = [event.get('externalId') for event in self.events]
+        values = [value for value in values if value is not None]
+        for previous, current in zip(values, values[1:]):
+            if not int(current) > int(previous):
+                raise AssertionError(f'externalId не возрастает: {previous} -> {current}')
+
+    def assert_no_errors(self):
+        if errors := self.errors:
+            raise AssertionError('Сообщения об ошибках:\n' + '\n'.join(errors))
+
+
+def _mismatches(event, expected):
+    """
+    Список (поле, ожидаемое значение, значение события) для несовпадающих полей.
+    """
+    mismatches = []
+    for key, value in expected.items():
+        actual = event.get(key, _MISSING)
+        if value is ANY:
+            if actual is _MISSING:
+                mismatches.append((key, value, None))
+        elif actual != value and str(actual) != str(value):
+            mismatches.append((key, value, None if actual is _MISSING else actual))
+    return mismatches
+
+
+@contextmanager
+def capture_events(capacity=10_000, event_class=None):
+    """
+    Замена EMITTERS класса-события (по умолчанию BaseEvent) на CaptureHandler внутри блока with.
+    Классы-события с собственными EMITTERS перехватываются, только если переданы в event_class.
+    """
+    if event_class is None:
+        from .events import BaseEvent
+
+        event_class = BaseEvent
+
+    handler = CaptureHandler(capacity)
+    emitters = event_class.__dict__.get('EMITTERS')
+    event_class.EMITTERS = (handler,)
+    try:
+        yield handler
+    finally:
+        if emitters is None:
+            del event_class.EMITTERS
+        else:
+            event_class.EMITTERS = emitters
+
+
+if pytest is not None:
+
+    @pytest.fixture
+    def cef_capture():
+        """
+        Перехват событий BaseEvent на время теста.
+        """
+        with capture_events() as handler:
+            yield handler
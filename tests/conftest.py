@@ -0,0 +1,83 @@
+"""
+Общие настройки тестов. Каталог репозитория - это пакет cef_loggers; если он установлен
+или лежит в sys.path под другим именем, пакет загружается из каталога под именем cef_loggers.
+Тестам с запросами к ViewSet нужен Django-проект с приложением testapp (фикстура django_project).
+"""
+
+import importlib.util
+import sys
+
+from pathlib import Path
+
+import pytest
+
+
+PACKAGE = 'cef_loggers'
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_package():
+    """
+    Импорт пакета из каталога репозитория под именем cef_loggers.
+    """
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / '__init__.py', submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def pytest_configure(config):
+    # бенчмарки выводят замеры и не проверяют соотношение скоростей: на загруженной машине
+    # оно нестабильно; запуск без них: python -m pytest tests -m 'not benchmark'
+    config.addinivalue_line('markers', 'benchmark: замер производительности без проверки скорости')
+    config.addinivalue_line('markers', 'slow: долгий тест, запуск без них: -m \'not slow\'')
+
+
+import_package()
+
+pytest_plugins = [f'{PACKAGE}.testing']
+
+
+@pytest.fixture(scope='session')
+def django_project(tmp_path_factory):
+    """
+    Django-проект с приложением testapp, базой SQLite во временном каталоге
+    и пользователем с профилем.
+    """
+    import django
+
+    from django.conf import settings
+
+    settings.configure(
+        SECRET_KEY='tests',
+        ALLOWED_HOSTS=['*'],
+        USE_TZ=True,
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'rest_framework',
+            'testapp',
+        ],
+        ROOT_URLCONF='testapp.urls',
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': str(tmp_path_factory.mktemp('django') / 'db.sqlite3'),
+            },
+        },
+    )
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from testapp.models import Profile
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    user = get_user_model().objects.create(username='tests')
+    Profile.objects.create(user=user, full_name='Куратов Проектович')
@@ -0,0 +1,38 @@
+"""
+Архив со сжатием (archive.py): размер блоков в байтах и сообщения с переводами строк.
+"""
+
+import gzip
+import logging
+
+from cef_loggers.archive import ArchiveHandler, ArchiveReader, Block
+
+
+def make_record(message):
+    return logging.makeLogRecord({'msg': message})
+
+
+def test_block_size_in_bytes():
+    block = Block()
+    block.add('CEF:0|IBS|Проект|1|a|b|1|msg=Объект изменен', None, None, None, None)
+    assert block.size == len(block.data())
+
+
+def test_multiline_messages_are_read_whole(tmp_path):
+    path = str(tmp_path / 'audit.log.gz')
+    messages = [
+        f'CEF:0|IBS|Проект|1|update|Изменение|1|externalId={index} msg=строка 1\nстрока 2'
+        for index in range(1, 7)
+    ]
+    handler = ArchiveHandler(path, block_bytes=200)
+    for message in messages:
+        handler.handle(make_record(message))
+    handler.close()
+
+    reader = ArchiveReader(path)
+    # блоки ограничены block_bytes байт несжатых данных, а не символов
+    assert len(reader.blocks) == 3
+    assert list(reader.read()) == messages
+    assert list(reader.read(external_id=4)) == messages[2:4]
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        assert file.read() == '\n'.join(messages) + '\n'
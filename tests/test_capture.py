@@ -0,0 +1,92 @@
+"""
+Перехват событий в тестах (testing.py): кольцевой буфер CaptureHandler и проверки cef_capture.
+"""
+
+import logging
+
+import pytest
+
+from cef_loggers.events import BaseEvent
+from cef_loggers.record import EventRecord
+from cef_loggers.testing import ANY, capture_events
+
+
+def emit_records(handler, *external_ids):
+    record = logging.LogRecord('cef', logging.INFO, __file__, 0, '', (), None)
+    record.events = [
+        EventRecord({**BaseEvent.__fields__, 'externalId': value}) for value in external_ids
+    ]
+    handler.handle(record)
+
+
+def test_ring_buffer_wraparound():
+    with capture_events(capacity=3) as capture:
+        for index in range(5):
+            BaseEvent()(msg=f'событие {index}')
+    assert BaseEvent.EMITTERS != (capture,)
+    assert capture.total == 5 and len(capture) == 3 and capture.dropped == 2
+    assert [event['msg'] for event in capture.events] == ['событие 2', 'событие 3', 'событие 4']
+    assert capture[0]['msg'] == 'событие 2'
+    assert capture.find(msg='событие 4') == [capture[-1]]
+    assert capture.find(msg='событие 0') == []
+    assert 'msg=событие 4' in capture.render()
+    assert len(capture.rendered()) == 3
+
+    capture.clear()
+    assert (capture.total, capture.dropped, capture.events) == (0, 0, [])
+    with pytest.raises(AssertionError, match='Событий нет'):
+        capture.assert_fields(msg=ANY)
+
+
+def test_capture_of_event_class_with_own_emitters():
+    class OwnEvent(BaseEvent):
+        EMITTERS = ()
+
+    with capture_events(event_class=OwnEvent) as capture, capture_events() as base:
+        OwnEvent()(msg='свое событие')
+    assert capture.total == 1 and base.total == 0
+    assert OwnEvent.EMITTERS == ()
+
+
+def test_assert_fields_reports_mismatches(cef_capture):
+    BaseEvent()(msg='событие', cn1=5)
+    cef_capture.assert_fields(msg='событие', cn1='5', end=ANY)
+    with pytest.raises(AssertionError, match="msg: ожидалось 'другое'"):
+        cef_capture.assert_fields(msg='другое')
+    with pytest.raises(AssertionError, match='cs6: ожидалось'):
+        cef_capture.assert_fields(cs6=ANY)
+
+
+def test_assert_external_ids_increasing(cef_capture):
+    emit_records(cef_capture, 1, 2, None, '10')
+    cef_capture.assert_external_ids_increasing()
+    emit_records(cef_capture, 10)
+    with pytest.raises(AssertionError, match='externalId не возрастает: 10 -> 10'):
+        cef_capture.assert_external_ids_increasing()
+
+
+@pytest.mark.parametrize(
+    'prefix, extended, changes',
+    (
+        ('cef', False, ('name', 'старое', 'новое')),
+        ('extend', True, ('name', 'старое', 'новое')),
+    ),
+)
+def test_assert_changes(django_project, cef_capture, prefix, extended, changes):
+    from django.test import Client
+
+    from testapp.models import Item
+
+    item = Item.objects.create(name='старое')
+    response = Client().patch(
+        f'/{prefix}/{item.pk}/', {'name': 'новое'}, content_type='application/json'
+    )
+    assert response.status_code == 200
+    cef_capture.assert_changes(*changes, extended=extended)
+    cef_capture.assert_outcome('success')
+    with pytest.raises(AssertionError):
+        cef_capture.assert_changes(*changes, extended=not extended)
+    if extended:
+        cef_capture.assert_fields(cs1=item.pk)
+    cef_capture.assert_external_ids_increasing()
+    cef_capture.assert_no_errors()
@@ -0,0 +1,53 @@
+"""
+Аудит каскадного удаления (cascade_cef_log): сводное событие и события по моделям.
+"""
+
+from cef_loggers.cascade import CascadeDeletion
+
+
+def delete_item(parts):
+    from django.test import Client
+
+    from testapp.models import Item, Part
+
+    item = Item.objects.create(name='каскад')
+    Part.objects.bulk_create(Part(item=item) for _ in range(parts))
+    pks = list(item.parts.order_by('pk').values_list('pk', flat=True))
+    response = Client().delete(f'/cascade/{item.pk}/')
+    assert response.status_code == 204
+    return pks
+
+
+def cascade_events(capture):
+    return [event for event in capture.events if str(event['msg']).startswith('Каскадно')]
+
+
+def test_no_params_without_cascaded_objects():
+    assert list(CascadeDeletion('объект').iter_params()) == []
+
+
+def test_no_cascade_events_without_related_objects(django_project, cef_capture):
+    delete_item(parts=0)
+    assert cascade_events(cef_capture) == []
+    cef_capture.assert_fields(DeviceEventClassID='delete', outcome='success')
+    cef_capture.assert_no_errors()
+
+
+def test_single_cascaded_object(django_project, cef_capture):
+    [pk] = delete_item(parts=1)
+    summary, part = cascade_events(cef_capture)
+    assert summary['msg'] == 'Каскадно удаляет связанные объекты (1)'
+    assert (summary['cs2'], summary['cn1'], summary['cn2']) == ('testapp.Part=1', 1, 0)
+    assert (part['cs2'], part['cs3'], part['cn1']) == ('testapp.Part', str(pk), 1)
+
+
+def test_truncated_cascade(django_project, cef_capture):
+    pks = delete_item(parts=5)
+    summary, *batches = cascade_events(cef_capture)
+    # не больше двух событий по моделям по два первичных ключа (настройки CascadeItemViewSet)
+    assert [event['cs3'] for event in batches] == [
+        f'{pks[0]},{pks[1]}',
+        f'{pks[2]},{pks[3]}',
+    ]
+    assert (summary['cn1'], summary['cn2']) == (5, 1)
+    cef_capture.assert_no_errors()
@@ -0,0 +1,78 @@
+"""
+Коллектор: разбор датаграмм CollectorHandler по событиям и единый externalId.
+"""
+
+import logging
+import threading
+import time
+
+from cef_loggers.collector import MAX_DATAGRAM_SIZE, Collector, CollectorHandler
+from cef_loggers.events import BaseEvent
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_pack_keeps_newlines_inside_events():
+    messages = ['CEF:0|a|b|1|c|d|1|msg=первая\nстрока', 'CEF:0|a|b|1|c|d|1|msg=вторая\n', '']
+    [(data, count)] = CollectorHandler.pack(messages)
+    assert count == 3
+    assert list(Collector.unpack(data)) == messages
+
+
+def test_pack_splits_by_datagram_size():
+    messages = ['x' * (MAX_DATAGRAM_SIZE // 3) for _ in range(7)]
+    datagrams = list(CollectorHandler.pack(messages))
+    assert all(len(data) <= MAX_DATAGRAM_SIZE for data, _ in datagrams)
+    assert sum(count for _, count in datagrams) == len(messages)
+    assert [message for data, _ in datagrams for message in Collector.unpack(data)] == messages
+
+
+def test_external_id_counter_has_no_gaps():
+    collector = Collector('unused', [])
+    assert collector.assign_external_id('не CEF-сообщение') == 'не CEF-сообщение'
+    assert collector.assign_external_id('CEF:0|a|b|1|c|d|1|externalId=7 msg=x') == (
+        'CEF:0|a|b|1|c|d|1|externalId=1 msg=x'
+    )
+    assert collector.assign_external_id('CEF:0|a|b|1|c|d|1|msg=x') == (
+        'CEF:0|a|b|1|c|d|1|externalId=2 msg=x'
+    )
+
+
+def test_batch_with_multiline_values_through_socket(tmp_path):
+    sink = ListHandler()
+    collector = Collector(str(tmp_path / 'cef.sock'), [sink], flush_interval=0.01)
+    server = threading.Thread(target=collector.serve_forever)
+    server.start()
+    try:
+        assert wait_for(lambda: (tmp_path / 'cef.sock').exists())
+
+        class SocketEvent(BaseEvent):
+            SYSLOG_HEADER = False
+            EMITTERS = (CollectorHandler(str(tmp_path / 'cef.sock')),)
+
+        SocketEvent().emit_many({'msg': f'событие {index}\nпродолжение'} for index in range(5))
+        assert wait_for(lambda: collector.written == 5)
+    finally:
+        collector.stop()
+        server.join()
+    messages = '\n'.join(sink.messages)
+    for index in range(5):
+        assert f'msg=событие {index}\nпродолжение' in messages
+    assert [f'externalId={index}' in messages for index in range(1, 6)] == [True] * 5
+    assert 'externalId=6' not in messages
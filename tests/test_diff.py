@@ -0,0 +1,109 @@
+"""
+Компактное представление изменений (diff.py): JSON Patch, изменение текста одним блоком
+и порог включения компактного режима.
+"""
+
+import copy
+import json
+
+import pytest
+
+from cef_loggers.diff import BINARY, JSON, TEXT, compact_change, digest, json_patch, text_hunk
+
+
+def apply_patch(document, operations):
+    """
+    Применение операций add, remove и replace JSON Patch.
+    """
+    document = copy.deepcopy(document)
+    for operation in operations:
+        *parents, last = [
+            part.replace('~1', '/').replace('~0', '~') for part in operation['path'].split('/')
+        ][1:] or [None]
+        if last is None:
+            document = operation['value']
+            continue
+        target = document
+        for part in parents:
+            target = target[int(part) if isinstance(target, list) else part]
+        if operation['op'] == 'remove':
+            del target[int(last) if isinstance(target, list) else last]
+        elif isinstance(target, list) and last == '-':
+            target.append(operation['value'])
+        else:
+            target[int(last) if isinstance(target, list) else last] = operation['value']
+    return document
+
+
+@pytest.mark.parametrize(
+    'old, new',
+    (
+        ({'a': 1, 'b': {'c': [1, 2, 3]}}, {'a': 1, 'b': {'c': [1, 5]}, 'd': None}),
+        ({'a/b': 1, 'c~d': 2}, {'a/b': 3}),
+        ([1, {'a': 1}], [1, {'a': 2}, 3, 4]),
+        ({'a': [1, 2]}, {'a': {'0': 1}}),
+        ([1, 2], {'a': 1}),
+    ),
+)
+def test_json_patch_round_trip(old, new):
+    operations = json_patch(old, new)
+    assert apply_patch(old, operations) == new
+    assert json_patch(new, new) == []
+
+
+def test_json_patch_operations():
+    assert json_patch({'a': 1, 'b': 2}, {'a': 3, 'c': 4}) == [
+        {'op': 'remove', 'path': '/b'},
+        {'op': 'replace', 'path': '/a', 'value': 3},
+        {'op': 'add', 'path': '/c', 'value': 4},
+    ]
+    # лишние элементы списка удаляются с конца
+    assert json_patch([1, 2, 3], [1]) == [
+        {'op': 'remove', 'path': '/2'},
+        {'op': 'remove', 'path': '/1'},
+    ]
+
+
+@pytest.mark.parametrize(
+    'old, new',
+    (
+        ('abc', 'abc'),
+        ('', 'новый текст'),
+        ('старый текст', ''),
+        ('a' * 10_000 + 'X' + 'b' * 10_000, 'a' * 10_000 + 'YZ' + 'b' * 10_000),
+        ('ab' * 5_000, 'ab' * 5_000 + 'ab'),
+        ('текст ' * 2_000, 'Текст ' + 'текст ' * 1_999),
+    ),
+)
+def test_text_hunk_round_trip(old, new):
+    hunk = text_hunk(old, new)
+    assert old[:hunk['at']] + hunk['insert'] + old[hunk['at'] + hunk['delete']:] == new
+
+
+def test_text_hunk_across_chunks():
+    old = 'a' * 10_000 + 'X' + 'b' * 10_000
+    assert text_hunk(old, old.replace('X', 'YZ')) == {'at': 10_000, 'delete': 1, 'insert': 'YZ'}
+
+
+def test_threshold_switches_compact_mode():
+    old, new = {'items': list(range(100))}, {'items': list(range(99))}
+    size = len(str(old))
+    assert compact_change(old, new, (JSON,), size + 1) is None
+    assert compact_change(old, new, (TEXT,), 0) is None
+    old_value, change = compact_change(old, new, (JSON,), size)
+    assert old_value == digest(old)
+    assert json.loads(change) == [{'op': 'remove', 'path': '/items/99'}]
+
+    text = 'текст ' * 100
+    _, change = compact_change(text, text + '!', (TEXT,), len(text))
+    assert json.loads(change) == {'at': len(text), 'delete': 0, 'insert': '!'}
+    assert compact_change(b'old', b'new', (BINARY,), 3) == (digest(b'old'), digest(b'new'))
+    # значения разных типов записываются хэшами
+    assert compact_change(text, {'a': text}, (JSON,), 0) == (digest(text), digest({'a': text}))
+
+
+@pytest.mark.parametrize('new', ({'items': list(range(100))}, list(range(100))))
+def test_json_from_none_is_patch_against_empty(new):
+    old_value, change = compact_change(None, new, (JSON,), 100)
+    assert old_value == 'None'
+    assert apply_patch(type(new)(), json.loads(change)) == new
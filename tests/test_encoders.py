@@ -0,0 +1,108 @@
+"""
+Кодировщики CEF, JSON Lines и LEEF: эталонные строки и стоимость кодирования.
+"""
+
+import io
+import json
+import logging
+import time
+
+import pytest
+
+from cef_loggers import encoders
+from cef_loggers.encoders import CEFEncoder, EncoderFormatter, JSONLinesEncoder, LEEFEncoder
+from cef_loggers.events import BaseEvent
+from cef_loggers.record import EventRecord
+
+
+FIELDS = {
+    'Version': 0,
+    'DeviceVendor': 'IBS',
+    'DeviceProduct': 'YOUR|COMPANY',
+    'DeviceVersion': '0.8',
+    'DeviceEventClassID': 'update',
+    'Name': 'projects-detail',
+    'Severity': 6,
+    'suser': 'Куратов Проектович',
+    'msg': 'a=b c\\d',
+    'cs1': 'x^y',
+    'cn1': 3,
+    'reason': None,
+    'custom': 'z\ny',
+}
+
+GOLDEN = {
+    CEFEncoder: (
+        'CEF:0|IBS|YOUR\\|COMPANY|0.8|update|projects-detail|6|suser=Куратов Проектович '
+        'msg=a\\=b c\\\\d cs1=x^y cn1=3 reason= custom=z\ny'
+    ),
+    JSONLinesEncoder: (
+        '{"Version":0,"DeviceVendor":"IBS","DeviceProduct":"YOUR|COMPANY","DeviceVersion":"0.8",'
+        '"DeviceEventClassID":"update","Name":"projects-detail","Severity":6,'
+        '"suser":"Куратов Проектович","msg":"a=b c\\\\d","cs1":"x^y","cn1":3,"reason":null,'
+        '"custom":"z\\ny"}'
+    ),
+    LEEFEncoder: (
+        'LEEF:2.0|IBS|YOUR\\|COMPANY|0.8|update|^|name=projects-detail^sev=6'
+        '^usrName=Куратов Проектович^msg=a=b c\\\\d^cs1=x\\^y^cn1=3^reason=^custom=zy'
+    ),
+}
+
+
+@pytest.mark.parametrize('encoder_class', GOLDEN)
+def test_golden(encoder_class):
+    assert encoder_class().encode(EventRecord(FIELDS)) == GOLDEN[encoder_class]
+
+
+def test_json_lines_is_valid_json():
+    assert json.loads(JSONLinesEncoder().encode(EventRecord(FIELDS))) == FIELDS
+
+
+def test_leef_escapes_backslash_before_delimiter():
+    record = EventRecord({**FIELDS, 'cs1': 'a\\^b\\'})
+    assert '^cs1=a\\\\\\^b\\\\^' in LEEFEncoder().encode(record)
+    record = EventRecord({**FIELDS, 'cs1': 'a|b'})
+    assert '|cs1=a\\|b|' in LEEFEncoder(delimiter='|').encode(record)
+
+
+@pytest.mark.parametrize('encoder_class', (JSONLinesEncoder, LEEFEncoder))
+def test_alternative_encoders_skip_cef_rendering(encoder_class, monkeypatch):
+    def render_record(*args, **kwargs):
+        raise AssertionError('CEF-рендеринг не должен вызываться')
+
+    monkeypatch.setattr(encoders, 'render_record', render_record)
+    assert encoder_class().encode(EventRecord(FIELDS)) == GOLDEN[encoder_class]
+
+
+def test_encoder_per_event_class_and_per_sink():
+    default_stream, leef_stream = io.StringIO(), io.StringIO()
+    leef_sink = logging.StreamHandler(leef_stream)
+    leef_sink.setFormatter(EncoderFormatter(LEEFEncoder()))
+
+    class JSONEvent(BaseEvent):
+        SYSLOG_HEADER = False
+        ENCODER = JSONLinesEncoder()
+        EMITTERS = (logging.StreamHandler(default_stream), leef_sink)
+
+    JSONEvent()(msg='Просмотр')
+
+    assert json.loads(default_stream.getvalue())['msg'] == 'Просмотр'
+    assert leef_stream.getvalue().startswith('LEEF:2.0|IBS|YOUR_COMPANY|0.8|base|^|name=view name^')
+
+
+@pytest.mark.benchmark
+def test_encode_benchmark():
+    """
+    Стоимость кодирования одного события в каждом формате.
+    """
+    record = EventRecord(
+        {**FIELDS, 'msg': 'Изменен объект модели «Проект» ' * 10, 'cs2': 'Описание ' * 50}
+    )
+    results = {}
+    for encoder in (CEFEncoder(), JSONLinesEncoder(), LEEFEncoder()):
+        repeat = 5000
+        started = time.perf_counter()
+        for _ in range(repeat):
+            encoder.encode(record)
+        results[encoder.__class__.__name__] = (time.perf_counter() - started) / repeat * 1e6
+    print(', '.join(f'{name}: {cost:.1f} мкс/событие' for name, cost in results.items()))
@@ -0,0 +1,79 @@
+"""
+Время импорта пакета (python -X importtime) и отложенная загрузка тяжелых зависимостей.
+"""
+
+import subprocess
+import sys
+
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# зависимости, которые не должны загружаться при импорте модулей без логирования
+HEAVY_MODULES = ('pydantic', 'cef_logger', 'django', 'rest_framework')
+
+
+def import_times(tmp_path, code):
+    """
+    Результат python -X importtime в отдельном процессе.
+
+    Returns:
+        dict[str, int]: модуль -> суммарное время импорта в мкс
+    """
+    (tmp_path / 'cef_loggers').symlink_to(ROOT, target_is_directory=True)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=tmp_path,
+        env={'PYTHONPATH': str(tmp_path)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def heavy_modules(times):
+    return sorted(name for name in times if name.split('.')[0] in HEAVY_MODULES)
+
+
+@pytest.mark.parametrize(
+    'module', ('cef_loggers', 'cef_loggers.render', 'cef_loggers.parser', 'cef_loggers.spool')
+)
+def test_import_without_heavy_dependencies(tmp_path, module):
+    times = import_times(tmp_path, f'import {module}')
+    assert heavy_modules(times) == []
+
+
+def test_logger_is_created_on_first_use(tmp_path):
+    code = (
+        'import sys, cef_loggers\n'
+        'assert cef_loggers.logger._instance is None\n'
+        "assert 'pydantic' not in sys.modules\n"
+        'cef_loggers.logger.new_record()\n'
+        'assert cef_loggers.logger._instance is not None\n'
+    )
+    import_times(tmp_path, code)
+
+
+def test_mixins_import_defers_drf(tmp_path):
+    times = import_times(tmp_path, 'import cef_loggers.mixins')
+    assert not [name for name in heavy_modules(times) if name.startswith('rest_framework')]
+    assert 'pydantic' not in times
+
+
+@pytest.mark.benchmark
+def test_import_time_benchmark(tmp_path):
+    """
+    Время импорта пакета; только выводится, порог не проверяется.
+    """
+    times = import_times(tmp_path, 'import cef_loggers')
+    print(f'import cef_loggers: {times["cef_loggers"] / 1000:.1f} мс')
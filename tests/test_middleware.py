@@ -0,0 +1,71 @@
+"""
+AuditMiddleware: лог публикуется при закрытии ответа, в том числе потокового.
+"""
+
+import gc
+import weakref
+
+import pytest
+
+from cef_loggers.middleware import AuditMiddleware
+
+
+POLICIES = {
+    'page': {'severity': 9, 'message': 'Просмотр страницы'},
+    'stream': {},
+    'cef-list': {},
+}
+
+
+@pytest.fixture
+def client(django_project):
+    from django.test import Client, override_settings
+
+    with override_settings(
+        MIDDLEWARE=['cef_loggers.middleware.AuditMiddleware'], CEF_AUDIT_POLICIES=POLICIES
+    ):
+        yield Client()
+
+
+def test_response_is_logged_once_on_close(client, cef_capture):
+    response = client.get('/page/')
+    cef_capture.assert_fields(msg='Просмотр страницы', Severity=9, Name='page')
+    cef_capture.assert_outcome('success')
+    response.close()
+    assert cef_capture.total == 1
+    cef_capture.assert_no_errors()
+
+
+def test_streaming_response_is_logged_after_content(client, cef_capture):
+    response = client.get('/stream/')
+    assert cef_capture.total == 0
+    assert b''.join(response.streaming_content) == b'firstsecond'
+    cef_capture.assert_fields(Name='stream', outcome='success')
+    assert cef_capture.total == 1
+
+
+def test_mixin_view_is_not_logged_twice(client, cef_capture):
+    client.get('/cef/')
+    assert cef_capture.total == 1
+
+
+def test_closed_response_is_freed_without_gc(django_project, cef_capture):
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from django.urls import resolve
+
+    request = RequestFactory().get('/page/')
+    request.resolver_match = resolve('/page/')
+    with override_settings(CEF_AUDIT_POLICIES=POLICIES):
+        middleware = AuditMiddleware(lambda request: HttpResponse('страница'))
+    gc.collect()
+    gc.disable()
+    try:
+        response = middleware(request)
+        response.close()
+        reference = weakref.ref(response)
+        del response
+        assert reference() is None
+    finally:
+        gc.enable()
+    assert cef_capture.total == 1
@@ -0,0 +1,122 @@
+"""
+Разбор CEF-сообщений (parser.py) как обратная операция к рендерингу BaseEvent.
+"""
+
+import logging
+import mmap
+import random
+
+import pytest
+
+from cef_loggers.events import BaseEvent
+from cef_loggers.parser import iter_events, parse_line
+from cef_loggers.render import get_hostname, render_record
+
+
+# спецсимволы CEF, пробелы, кириллица и переводы строк (в расширениях они не экранируются)
+HEADER_ALPHABET = '\\=|ab1 -.Яжё'
+EXTENSION_ALPHABET = HEADER_ALPHABET + '\n\r'
+
+EXTENSION_KEYS = ('msg', 'suser', 'act', 'cs1', 'cs1Label', 'cs2', 'cs3', 'reason', 'custom')
+
+README_LINE = (
+    '2021-07-19T11:29:47.421034+00:00 host CEF:0|IBS|YOUR_COMPANY|0.8|update|projects-detail|6|'
+    'externalId=2 shost=testserver src=127.0.0.1 suser=Куратов Проектович dhost= dst=127.0.0.1 '
+    'msg=Объект изменен cs1Label=Наименование атрибута cs1=name cs2Label=Старое значение cs2=old '
+    'cs3Label=Новое значение cs3=new outcome=success reason=None end=1626694187'
+)
+
+
+class StreamEvent(BaseEvent):
+    DeviceProduct = 'YOUR|COMPANY'
+
+
+def random_text(rng, alphabet, size=12):
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, size)))
+
+
+def random_fields(rng):
+    fields = {
+        'DeviceEventClassID': random_text(rng, HEADER_ALPHABET) or 'x',
+        'Name': random_text(rng, HEADER_ALPHABET),
+    }
+    for key in rng.sample(EXTENSION_KEYS, rng.randint(1, len(EXTENSION_KEYS))):
+        fields[key] = rng.choice(
+            (random_text(rng, EXTENSION_ALPHABET), random_text(rng, EXTENSION_ALPHABET, 40), None)
+        )
+    return fields
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def render_events(rng, count):
+    """
+    Случайные события и их лог-сообщения, отрендеренные BaseEvent с syslog-заголовком.
+    """
+    handler = ListHandler()
+    StreamEvent.EMITTERS = (handler,)
+    event = StreamEvent()
+    fields = [random_fields(rng) for _ in range(count)]
+    for event_fields in fields:
+        event(**event_fields)
+    return fields, handler.messages
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_round_trip(seed):
+    fields, messages = render_events(random.Random(seed), 100)
+    text = ''.join(f'{message}\n' for message in messages)
+    parsed = [event for _, event in iter_events(text.encode('utf-8'))]
+    assert len(parsed) == len(fields)
+
+    for event_fields, event, message in zip(fields, parsed, messages):
+        assert event.host == get_hostname()
+        assert event['DeviceProduct'] == 'YOUR|COMPANY'
+        for key, value in event_fields.items():
+            assert event[key] == ('' if value is None else value)
+        # повторный рендеринг разобранного сообщения совпадает с исходным без syslog-заголовка
+        assert render_record(event.as_record()) == message.split(' ', 2)[2]
+
+
+def test_round_trip_from_file_and_mmap(tmp_path):
+    fields, messages = render_events(random.Random(0), 500)
+    path = tmp_path / 'audit.log'
+    path.write_text(''.join(f'{message}\n' for message in messages), encoding='utf-8')
+
+    with open(path, 'rb') as file:
+        from_file = [event.as_dict() for _, event in iter_events(file)]
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            from_mmap = [(offset, event.as_dict()) for offset, event in iter_events(data)]
+        finally:
+            data.close()
+    assert from_file == [event for _, event in from_mmap]
+    assert len(from_file) == len(fields)
+
+    # чтение с сохраненного смещения продолжается с того же сообщения
+    offset, expected = from_mmap[250]
+    with open(path, 'rb') as file:
+        assert next(iter_events(file, offset))[1].as_dict() == expected
+
+
+def test_readme_example():
+    event = parse_line(README_LINE)
+    assert event.timestamp == '2021-07-19T11:29:47.421034+00:00'
+    assert event.host == 'host'
+    assert event['DeviceEventClassID'] == 'update'
+    assert event['suser'] == 'Куратов Проектович'
+    assert event['cs2Label'] == 'Старое значение'
+    assert event['dhost'] == ''
+    assert render_record(event.as_record()) == README_LINE.split(' ', 2)[2]
+
+
+def test_unfinished_last_line_is_skipped():
+    data = (README_LINE + '\n' + README_LINE[:50]).encode('utf-8')
+    assert len(list(iter_events(data))) == 1
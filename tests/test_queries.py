@@ -0,0 +1,80 @@
+"""
+Бюджет SQL-запросов слоя аудита: пропуск лог-параметров и strict-режим.
+"""
+
+import pytest
+
+from cef_loggers.queries import QueryBudgetExceeded
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """
+    Установка бюджета запросов аудита для ViewSet тестового приложения.
+    """
+    from testapp.views import ItemViewSet
+
+    def set_budget(limit, strict=False):
+        monkeypatch.setattr(ItemViewSet, 'count_queries_for_cef_log', True)
+        monkeypatch.setattr(ItemViewSet, 'query_budget_for_cef_log', limit)
+        monkeypatch.setattr(ItemViewSet, 'strict_query_budget_for_cef_log', strict)
+
+    return set_budget
+
+
+def patch_item(item, name):
+    from django.test import Client
+
+    return Client().patch(f'/cef/{item.pk}/', {'name': name}, content_type='application/json')
+
+
+@pytest.fixture
+def item(django_project):
+    from testapp.models import Item
+
+    return Item.objects.create(name='старое')
+
+
+def test_queries_are_counted(item, budget, cef_capture):
+    budget(None)
+    assert patch_item(item, 'новое').status_code == 200
+    # объект до и после изменения и профиль пользователя для suser
+    cef_capture.assert_fields(cs1='name', suser='Куратов Проектович', cn3=3)
+    cef_capture.assert_no_errors()
+
+
+def test_skip_mode_drops_params_without_budget(item, budget, cef_capture):
+    budget(1)
+    assert patch_item(item, 'новое').status_code == 200
+    item.refresh_from_db()
+    assert item.name == 'новое'
+
+    # объекту после изменения не хватило бюджета: изменения атрибутов не выводятся,
+    # а об ошибках отправляются отладочные события
+    errors = [str(event['msg']) for event in cef_capture.events[:-1]]
+    assert [message.split(':')[0] for message in errors] == [
+        'Ошибка при вычислении check_object_change',
+        'Ошибка при вычислении suser',
+    ]
+    assert all('Превышен бюджет запросов аудита (1)' in message for message in errors)
+    event = cef_capture.assert_fields(DeviceEventClassID='update', cs1=None, cn3=1)
+    assert event.get('suser') is None
+
+
+@pytest.mark.parametrize('limit', (0, 1))
+def test_strict_mode_rolls_back_changes(item, budget, cef_capture, limit):
+    budget(limit, strict=True)
+    # 0 - бюджет превышен до сохранения объекта, 1 - после сохранения
+    with pytest.raises(QueryBudgetExceeded):
+        patch_item(item, 'новое')
+    item.refresh_from_db()
+    assert item.name == 'старое'
+    assert not cef_capture.find(DeviceEventClassID='update')
+
+
+def test_strict_mode_within_budget(item, budget, cef_capture):
+    budget(3, strict=True)
+    assert patch_item(item, 'новое').status_code == 200
+    item.refresh_from_db()
+    assert item.name == 'новое'
+    cef_capture.assert_changes('name', 'старое', 'новое')
@@ -0,0 +1,128 @@
+"""
+EventRecord и расход памяти на одно событие в сравнении с cef_logger.Event.
+"""
+
+import logging
+import statistics
+import tracemalloc
+
+from cef_logger import Event
+
+from cef_loggers.events import BaseEvent
+from cef_loggers.record import EventRecord
+
+
+FIELDS = {
+    'DeviceEventClassID': 'update',
+    'Name': 'projects-detail',
+    'Severity': 6,
+    'shost': 'testserver',
+    'src': '127.0.0.1',
+    'suser': 'Куратов Проектович',
+    'msg': 'Объект изменен',
+    'cs1Label': 'Наименование атрибута',
+    'cs1': 'name',
+    'cs2Label': 'Старое значение',
+    'cs2': 'old',
+    'cs3Label': 'Новое значение',
+    'cs3': 'new',
+    'outcome': 'success',
+    'reason': 'None',
+}
+
+
+class RenderHandler(logging.Handler):
+    """
+    Обработчик, который только формирует строку лог-сообщения.
+    """
+
+    def emit(self, record):
+        self.format(record)
+
+
+class ReferenceEvent(Event):
+    EMITTERS = (RenderHandler(),)
+    Version = 0
+    DeviceProduct = 'YOUR_COMPANY'
+    DeviceVersion = '0.8'
+    DeviceVendor = 'IBS'
+    DeviceEventClassID = 'base'
+    Name = 'view name'
+    Severity = 1
+
+
+class CurrentEvent(BaseEvent):
+    EMITTERS = (RenderHandler(),)
+    SYSLOG_HEADER = False
+
+
+def old_pipeline(event):
+    # слияние словарей required_params и передача параметров в logger(**fields)
+    request_params = {key: FIELDS[key] for key in ('shost', 'src', 'suser')}
+    outcome_params = {key: FIELDS[key] for key in ('outcome', 'reason')}
+    fields = {**request_params, **FIELDS, **outcome_params}
+    event(**fields)
+
+
+def new_pipeline(event):
+    record = event.new_record()
+    record.update(FIELDS)
+    event.log_record(record)
+
+
+def peak_memory(call, repeat=50):
+    """
+    Медиана пикового объема памяти, выделенной за один вызов.
+    """
+    call()
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks)
+
+
+def test_record_fields_order_and_custom_keys():
+    record = CurrentEvent().new_record()
+    record.update({'msg': 'x', 'custom': 1, 'cs1': 'y'})
+    record['end'] = 2
+    assert record.header() == (0, 'IBS', 'YOUR_COMPANY', '0.8', 'base', 'view name', 1)
+    assert list(record.items()) == [('msg', 'x'), ('cs1', 'y'), ('end', 2), ('custom', 1)]
+    assert 'cs1' in record and 'cs2' not in record and record.get('cs2') is None
+    copy = record.copy()
+    copy['msg'] = 'z'
+    assert record['msg'] == 'x' and copy['msg'] == 'z'
+    assert EventRecord(record.as_dict()).as_dict() == record.as_dict()
+
+
+def test_less_peak_memory_per_event():
+    reference, current = ReferenceEvent(), CurrentEvent()
+    old = peak_memory(lambda: old_pipeline(reference))
+    new = peak_memory(lambda: new_pipeline(current))
+    print(f'пиковая память на событие: cef_logger {old:.0f} Б, EventRecord {new:.0f} Б')
+    assert new < old
+
+
+def test_explicit_end_is_rendered_once():
+    record = CurrentEvent().new_record()
+    record.update({'msg': 'x', 'end': 5, 'custom': 1})
+    CurrentEvent().prepare_record(record)
+    keys = [key for key, _ in record.items()]
+    assert keys == ['msg', 'end', 'custom'] and record['end'] != 5
+
+    # без явного «end» он выводится последним, после пользовательских полей
+    record = CurrentEvent().new_record()
+    record.update({'msg': 'x', 'custom': 1})
+    CurrentEvent().prepare_record(record)
+    assert [key for key, _ in record.items()] == ['msg', 'custom', 'end']
+
+    # копия подготовленной записи, например, для события об отмене транзакции
+    record = record.copy()
+    CurrentEvent().prepare_record(record)
+    assert [key for key, _ in record.items()] == ['msg', 'custom', 'end']
@@ -0,0 +1,72 @@
+"""
+Реестр классов-событий (registry.py): кэширование экземпляров и проверка атрибутов.
+"""
+
+import threading
+
+import pytest
+
+from cef_loggers import registry
+from cef_loggers.events import BaseEvent
+from cef_loggers.testing import capture_events
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def test_event_is_created_once():
+    event = registry.get_event(DeviceProduct='BILLING', Severity=6)
+    assert registry.get_event(Severity=6, DeviceProduct='BILLING') is event
+    assert registry.get_event(DeviceProduct='BILLING') is not event
+    assert registry.get_event(BaseEvent, DeviceProduct='BILLING', Severity=6) is not event
+    assert isinstance(event, BaseEvent)
+    assert (type(event).DeviceProduct, type(event).Severity) == ('BILLING', 6)
+
+    registry.clear()
+    assert registry.get_event(DeviceProduct='BILLING', Severity=6) is not event
+
+
+def test_concurrent_calls_share_instance():
+    barrier = threading.Barrier(8)
+    events = []
+
+    def get():
+        barrier.wait()
+        events.append(registry.get_event(DeviceProduct='PARALLEL'))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(event) for event in events}) == 1
+
+
+def test_event_attributes_are_logged():
+    class AuditEvent(BaseEvent):
+        Name = 'audit'
+
+    event = registry.get_event(AuditEvent, DeviceProduct='BILLING')
+    with capture_events(event_class=type(event)) as capture:
+        event(msg='событие подсистемы')
+    capture.assert_fields(DeviceProduct='BILLING', Name='audit', msg='событие подсистемы')
+    assert '|BILLING|0.8|base|audit|1|' in capture.render()
+
+
+@pytest.mark.parametrize(
+    'attributes, message',
+    (
+        ({'msg': 'x'}, 'Неизвестные атрибуты класса-события: msg'),
+        ({'Severity': 'не число'}, 'Severity'),
+        ({'Severity': 11}, 'Severity'),
+    ),
+)
+def test_invalid_attributes_are_rejected(attributes, message):
+    with pytest.raises(ValueError, match=message):
+        registry.get_event(**attributes)
+    # неудачная регистрация не попадает в реестр
+    assert not registry._events
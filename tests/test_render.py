@@ -0,0 +1,96 @@
+"""
+Рендеринг CEF (render.py) в сравнении с рендерингом библиотеки cef_logger.
+"""
+
+import random
+import time
+
+import pytest
+
+from cef_logger.fields import Fields
+
+from cef_loggers.events import CustomFields
+from cef_loggers.record import EventRecord
+from cef_loggers.render import escape_extension, escape_header, render_record
+
+
+# символы, которые экранируются или удаляются, вперемешку с обычными и кириллицей
+ALPHABET = '\\=|\r\n ab12_-.:Яжё ЪэЮ'
+
+EXTENSION_KEYS = ('msg', 'suser', 'cs1', 'cs1Label', 'cs2', 'reason', 'cn1', 'outcome')
+CUSTOM_KEYS = ('custom', 'Комментарий')
+
+BENCHMARK_FIELDS = {
+    'Version': 0,
+    'DeviceVendor': 'IBS',
+    'DeviceProduct': 'YOUR_COMPANY',
+    'DeviceVersion': '0.8',
+    'DeviceEventClassID': 'update',
+    'Name': 'Изменение объекта',
+    'Severity': 6,
+    'msg': 'Изменен объект модели «Проект» пользователем системы ' * 20,
+    'suser': 'Куратов Проектович',
+    'cs1': 'Описание проекта ' * 50,
+    'cs2': 'Старое описание проекта ' * 50,
+    'cs3': 'Новое описание проекта ' * 50,
+}
+
+
+def random_value(rng):
+    if rng.random() < 0.6:
+        return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 20)))
+    return rng.choice(
+        (None, 0, -7, True, False, 1.5, ['a=b'], ('|',), {'k': 'v\\'}, ValueError('x=1|y'))
+    )
+
+
+def random_fields(rng):
+    fields = {
+        'Version': rng.choice((0, '0')),
+        'DeviceVendor': random_value(rng),
+        'DeviceProduct': random_value(rng),
+        'DeviceVersion': random_value(rng),
+        'DeviceEventClassID': random_value(rng),
+        'Name': random_value(rng),
+        'Severity': rng.randint(0, 10),
+    }
+    for key in rng.sample(EXTENSION_KEYS + CUSTOM_KEYS, rng.randint(0, 6)):
+        fields[key] = random_value(rng)
+    return fields
+
+
+def events_per_second(render, repeat=2000):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return repeat / (time.perf_counter() - started)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_render_matches_cef_logger(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        fields = random_fields(rng)
+        expected = Fields(**fields).render()
+        assert CustomFields(**fields).render() == expected
+        assert render_record(EventRecord(fields)) == expected
+
+
+def test_clean_value_is_not_copied():
+    value = 'Просмотр списка объектов ' * 100
+    assert escape_extension(value) is value
+    assert escape_header(value) is value
+
+
+@pytest.mark.benchmark
+def test_render_benchmark():
+    """
+    Рендеринг длинных значений на кириллице без спецсимволов.
+    """
+    record = EventRecord(BENCHMARK_FIELDS)
+    results = {
+        'cef_logger': events_per_second(Fields(**BENCHMARK_FIELDS).render),
+        'CustomFields': events_per_second(CustomFields(**BENCHMARK_FIELDS).render),
+        'render_record': events_per_second(lambda: render_record(record)),
+    }
+    print(', '.join(f'{name}: {rate:,.0f} событий/с' for name, rate in results.items()))
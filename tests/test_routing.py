@@ -0,0 +1,119 @@
+"""
+Маршрутизация событий (routing.py): выбор маршрутов, разбиение пачек и отброшенные события.
+"""
+
+import logging
+import threading
+
+import pytest
+
+from cef_loggers.encoders import CEFEncoder
+from cef_loggers.events import BaseEvent, EventLogRecord
+from cef_loggers.record import EventRecord
+from cef_loggers.routing import ANY, Route, RouterHandler
+
+
+class ListHandler(logging.Handler):
+    """
+    Обработчик, сохраняющий полученные записи.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class BlockingHandler(ListHandler):
+    """
+    Обработчик, который ждет разрешения на обработку каждой записи.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.resume = threading.Event()
+
+    def emit(self, record):
+        self.entered.set()
+        self.resume.wait(5)
+        super().emit(record)
+
+
+def make_event(**fields):
+    return EventRecord({**BaseEvent.__fields__, **fields})
+
+
+def make_record(*events):
+    return EventLogRecord(events, CEFEncoder())
+
+
+def names(handler):
+    return [[event['Name'] for event in record.events] for record in handler.records]
+
+
+def test_match_by_conditions():
+    changes, important, view, default = (Route(ListHandler()) for _ in range(4))
+    changes.conditions = {'DeviceEventClassID': ('update', 'delete')}
+    important.conditions = {'Severity': {6, 8}, 'DeviceEventClassID': ANY}
+    view.conditions = {'DeviceEventClassID': 'view', 'Name': 'projects-list'}
+    router = RouterHandler(changes, important, view, default=default)
+    try:
+        assert router.match(make_event(DeviceEventClassID='update', Severity=6)) == (
+            changes,
+            important,
+        )
+        assert router.match(make_event(DeviceEventClassID='delete', Severity=1)) == (changes,)
+        assert router.match(make_event(DeviceEventClassID='view', Name='projects-list')) == (
+            view,
+        )
+        assert router.match(make_event(DeviceEventClassID='view', Name='other')) == (default,)
+        assert len(router._cache) == 4
+    finally:
+        router.close()
+    with pytest.raises(ValueError, match='Неизвестные условия маршрута: msg'):
+        Route(ListHandler(), msg='x')
+
+
+def test_batch_is_split_by_route_in_order():
+    updates, views, errors = ListHandler(), ListHandler(), ListHandler()
+    router = RouterHandler(
+        Route(updates, DeviceEventClassID='update'),
+        Route(views, DeviceEventClassID='view'),
+        fallback=Route(errors),
+    )
+    events = [
+        make_event(DeviceEventClassID=kind, Name=str(index))
+        for index, kind in enumerate(('update', 'view', 'update', 'delete', 'view'))
+    ]
+    router.handle(make_record(*events))
+    router.handle(make_record(events[0]))
+    router.handle(logging.makeLogRecord({'msg': 'Ошибка при вычислении cs1', 'levelno': 40}))
+    router.close()
+    assert names(updates) == [['0', '2'], ['0']]
+    assert names(views) == [['1', '4']]
+    assert [record.getMessage() for record in errors.records] == ['Ошибка при вычислении cs1']
+
+
+def test_dropped_events_are_counted():
+    blocking = BlockingHandler()
+    route = Route(blocking, queue_size=1)
+    router = RouterHandler(route)
+    records = [make_record(make_event(Name=str(index)), make_event()) for index in range(3)]
+    try:
+        router.handle(records[0])
+        assert blocking.entered.wait(5)
+        # первая запись обрабатывается, вторая ждет в очереди, третьей нет места
+        router.handle(records[1])
+        router.handle(records[2])
+        assert route.dropped == 1
+        assert [record.dropped for record in records] == [0, 0, 2]
+    finally:
+        blocking.resume.set()
+        router.close()
+    assert names(blocking) == [['0', 'view name'], ['1', 'view name']]
+    # повторная остановка и остановка незапущенного маршрута ничего не делают
+    route.stop()
+    Route(ListHandler()).stop()
@@ -0,0 +1,36 @@
+"""
+Индекс и поиск по файлам логов (search.py): дописывание файла и сообщения с переводами строк.
+"""
+
+from cef_loggers.search import LogIndex
+
+
+def message(external_id, value):
+    return f'CEF:0|IBS|Проект|1|update|Изменение|6|externalId={external_id} cs1={value}\n'
+
+
+def test_last_message_is_reindexed_when_continued(tmp_path):
+    path = tmp_path / 'audit.log'
+    path.write_text(message(1, 'первый') + message(2, 'строка 1'), encoding='utf-8')
+    index = LogIndex(str(tmp_path / 'index.sqlite'))
+    try:
+        assert index.update(str(path)) == 2
+        [(_, offset, _, event)] = index.search(externalId=2)
+        assert event['cs1'] == 'строка 1'
+
+        # продолжение значения последнего сообщения дописано после индексации
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('строка 2\n' + message(3, 'третий'))
+        assert index.update(str(path)) == 2
+        [(_, second, line, event)] = index.search(externalId=2)
+        assert second == offset
+        assert event['cs1'] == 'строка 1\nстрока 2'
+        assert line.endswith('cs1=строка 1\nстрока 2\n')
+        assert [event['cs1'] for *_, event in index.search(externalId=3)] == ['третий']
+        assert list(index.search(cs1='строка 1')) == []
+
+        # файл не изменился: переиндексируется только последнее сообщение
+        assert index.update(str(path)) == 1
+        assert len(list(index.search(Name='Изменение'))) == 3
+    finally:
+        index.close()
@@ -0,0 +1,55 @@
+"""
+Короткий прогон soak-теста нагрузочного стенда (loadtest.soak) в отдельном процессе:
+стенду нужен свой Django-проект.
+"""
+
+import subprocess
+import sys
+
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ARGS = ['--iterations', '90', '--checkpoints', '3', '--warmup', '20', '--objects', '5']
+
+# утечка состояния аудита: каждый AuditState остается в списке
+LEAK = (
+    'from cef_loggers.state import AuditState\n'
+    'leaked = []\n'
+    'init = AuditState.__init__\n'
+    'AuditState.__init__ = lambda self: (init(self), leaked.append(self))[0]\n'
+)
+
+
+def run_soak(tmp_path, prepare=''):
+    (tmp_path / 'cef_loggers').symlink_to(ROOT, target_is_directory=True)
+    code = (
+        f'{prepare}import sys\n'
+        'from cef_loggers.loadtest import soak\n'
+        f'sys.exit(soak.main({ARGS!r}))\n'
+    )
+    return subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=tmp_path,
+        env={'PYTHONPATH': str(tmp_path), 'CEF_LOADTEST_DB': str(tmp_path / 'db.sqlite3')},
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.mark.slow
+def test_soak_passes(tmp_path):
+    result = run_soak(tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    # заголовок и по строке на каждую контрольную точку, включая нулевую
+    assert len(result.stdout.splitlines()) == 1 + 4 + 1
+
+
+@pytest.mark.slow
+def test_soak_detects_unreleased_audit_state(tmp_path):
+    result = run_soak(tmp_path, LEAK)
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert result.stdout.count('Состояние аудита не освобождается') == 4
@@ -0,0 +1,179 @@
+"""
+Декларативные лог-параметры (LOG_SPEC): компиляция сборщика, проекция полей, переопределение
+методов в подклассах и совпадение с лог-параметрами по методу на ключ.
+"""
+
+import inspect
+import time
+
+from types import SimpleNamespace
+
+import pytest
+
+from cef_loggers.events import BaseEvent
+from cef_loggers.params.cef import (
+    DeleteCEFParams,
+    PatchCEFExtendParams,
+    PatchCEFParams,
+    PostCEFParams,
+)
+from cef_loggers.params.main import FieldProjection
+from cef_loggers.params.spec import Attr, Param, build_params, compile_spec
+from cef_loggers.record import EventRecord
+from cef_loggers.render import render_record
+from cef_loggers.utils import LogLabels, RESTMethods
+
+
+def make_instance(method, **attributes):
+    """
+    Экземпляр ViewSet с атрибутами CEFLogMixin, которые используют классы-параметров.
+    """
+    meta = SimpleNamespace(verbose_name='проект', get_latest_by=None)
+    return SimpleNamespace(
+        request=SimpleNamespace(method=method),
+        queryset=SimpleNamespace(model=SimpleNamespace(_meta=meta)),
+        error=None,
+        old_object={'name': 'старое', 'config': {'a': 1}},
+        new_object={'name': 'новое', 'config': {'a': 2}},
+        is_extend_patch=True,
+        get_log_instance=lambda: 7,
+        **attributes,
+    )
+
+
+def legacy(params_class, keys):
+    """
+    Класс-параметров с set_cef_params по методу на ключ, как до LOG_SPEC.
+    """
+
+    def set_cef_params(self):
+        return {key: getattr(self, key)() for key in keys}
+
+    attributes = {'set_cef_params': set_cef_params}
+    return type(f'Legacy{params_class.__name__}', (params_class,), attributes)
+
+
+CASES = {
+    'post': (PostCEFParams, 'POST', None),
+    'delete': (DeleteCEFParams, 'DELETE', None),
+    'patch': (PatchCEFParams, 'PATCH', 'name'),
+    'extend': (PatchCEFExtendParams, 'PATCH', 'config'),
+}
+
+
+def fill(params, projection=None):
+    record = EventRecord({**BaseEvent.__fields__, 'Name': 'projects-detail'})
+    params.fill_record(record, projection)
+    return record
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_compiled_matches_method_per_key(case):
+    params_class, method, changed_key = CASES[case]
+    legacy_class = legacy(params_class, tuple(params_class.LOG_SPEC))
+    records = []
+    for cls in (params_class, legacy_class):
+        params = cls(make_instance(method))
+        if changed_key:
+            params.changed_key = changed_key
+        records.append(fill(params))
+    compiled, expected = records
+    assert compiled.as_dict() == expected.as_dict()
+    assert list(compiled.items()) == list(expected.items())
+    assert render_record(compiled) == render_record(expected)
+
+
+def test_constants_are_folded_into_template():
+    build = compile_spec(PatchCEFParams)
+    closure = inspect.getclosurevars(build).nonlocals
+    assert [key for key, _ in closure['dynamic']] == ['cs1', 'cs2', 'cs3']
+    assert closure['template'] == {
+        'DeviceEventClassID': RESTMethods.DeviceEventClassID.PATCH,
+        'Severity': RESTMethods.Severity.PATCH,
+        'msg': RESTMethods.Message.PATCH,
+        'cs1Label': LogLabels.attribute_name,
+        'cs1': None,
+        'cs2Label': LogLabels.old_value,
+        'cs2': None,
+        'cs3Label': LogLabels.new_value,
+        'cs3': None,
+    }
+    # методы для ключей LOG_SPEC без методов по-прежнему доступны
+    assert PatchCEFParams(make_instance('PATCH')).msg() == RESTMethods.Message.PATCH
+
+
+class CountingParams(PostCEFParams):
+    calls = []
+
+    def apply_condition(self):
+        return True
+
+    LOG_SPEC = {
+        'msg': 'константа',
+        'cs1Label': LogLabels.object_name,
+        'cs1': lambda self: CountingParams.calls.append('cs1') or 'объект',
+        'cs2': Attr('instance.request.method'),
+        'cs3': Param(lambda self: 1 / 0, default='по умолчанию'),
+    }
+
+
+def test_projection_skips_excluded_sources():
+    CountingParams.calls.clear()
+    params = CountingParams(make_instance('GET'))
+    projection = FieldProjection(exclude=('cs1', 'cs1Label'))
+    record = fill(params, projection)
+    assert CountingParams.calls == []
+    assert record.as_dict() == {
+        **BaseEvent.__fields__,
+        'Name': 'projects-detail',
+        'msg': 'константа',
+        'cs2': 'GET',
+        'cs3': 'по умолчанию',
+    }
+
+    record = fill(params)
+    assert CountingParams.calls == ['cs1']
+    assert record['cs1'] == 'объект'
+    # сборщик компилируется один раз для класса и проекции
+    assert set(CountingParams.__dict__['_spec_builders']) == {projection, None}
+
+
+def test_subclass_overrides_win_over_spec():
+    class NamedPatchParams(PatchCEFParams):
+        def msg(self):
+            return 'Изменен проект'
+
+        def get_change(self, key):
+            return f'было {key}', f'стало {key}'
+
+    params = NamedPatchParams(make_instance('PATCH'))
+    params.changed_key = 'name'
+    record = fill(params)
+    assert (record['msg'], record['cs2'], record['cs3']) == (
+        'Изменен проект',
+        'было name',
+        'стало name',
+    )
+    # базовый класс не изменился
+    base = PatchCEFParams(make_instance('PATCH'))
+    base.changed_key = 'name'
+    assert fill(base)['msg'] == RESTMethods.Message.PATCH
+
+
+@pytest.mark.benchmark
+def test_spec_benchmark():
+    """
+    Стоимость формирования PATCH-параметров сборщиком LOG_SPEC и методами по ключу.
+    """
+    legacy_class = legacy(PatchCEFExtendParams, tuple(PatchCEFExtendParams.LOG_SPEC))
+    results = {}
+    for name, cls in (('LOG_SPEC', PatchCEFExtendParams), ('метод на ключ', legacy_class)):
+        params = cls(make_instance('PATCH'))
+        params.changed_key = 'name'
+        build = build_params if cls is PatchCEFExtendParams else cls.set_cef_params
+        repeat = 20_000
+        started = time.perf_counter()
+        for _ in range(repeat):
+            build(params)
+        results[name] = (time.perf_counter() - started) / repeat * 1e6
+    print(', '.join(f'{name}: {cost:.2f} мкс' for name, cost in results.items()))
@@ -0,0 +1,169 @@
+"""
+Дисковый спул, автоматический выключатель и SpoolHandler при отказе приемника.
+"""
+
+import logging
+import os
+import re
+import time
+
+from cef_loggers.spool import FRAME_HEADER, CircuitBreaker, Spool, SpoolHandler
+
+
+class FlakySink(logging.Handler):
+    """
+    Приемник, который можно «убить»: пока alive = False, отправка завершается ошибкой.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.alive = True
+        self.messages = []
+
+    def emit(self, record):
+        if not self.alive:
+            raise ConnectionError('приемник недоступен')
+        self.messages.append(record.getMessage())
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def read_all(spool):
+    messages = []
+    while batch := spool.read(100):
+        messages.extend(message for message, _ in batch if message is not None)
+        spool.commit(batch[-1][1])
+    return messages
+
+
+def test_kill_sink_mid_stream(tmp_path):
+    sink = FlakySink()
+    handler = SpoolHandler(
+        sink,
+        str(tmp_path),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05),
+        replay_interval=0.01,
+    )
+    expected = [f'событие {index}' for index in range(300)]
+    try:
+        for index, message in enumerate(expected):
+            if index == 100:
+                sink.alive = False
+            elif index == 200:
+                # пока приемник недоступен, события копятся в спуле
+                assert len(handler.spool) and len(sink.messages) == 100
+                sink.alive = True
+            handler.handle(logging.makeLogRecord({'msg': message}))
+        assert wait_for(lambda: len(sink.messages) == len(expected) and not len(handler.spool))
+    finally:
+        handler.close()
+    # все события доставлены ровно один раз и в исходном порядке
+    assert sink.messages == expected
+
+
+def test_spool_survives_restart_and_torn_write(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=64)
+    for index in range(10):
+        spool.append(f'запись {index}')
+    # подтверждена доставка первых трех записей
+    delivered = 0
+    for message, position in spool.read(100):
+        delivered += message is not None
+        if delivered == 3:
+            spool.commit(position)
+            break
+    spool.close()
+
+    # недописанная запись в конце последнего сегмента, например, при падении процесса
+    last = max(name for name in os.listdir(tmp_path) if name.endswith('.seg'))
+    with open(tmp_path / last, 'ab') as file:
+        file.write(FRAME_HEADER.pack(100, 0) + b'oops')
+
+    spool = Spool(str(tmp_path), segment_bytes=64)
+    spool.append('после перезапуска')
+    expected = [f'запись {index}' for index in range(3, 10)] + ['после перезапуска']
+    assert read_all(spool) == expected
+    assert not len(spool)
+    spool.close()
+
+
+def test_corrupted_last_segment_is_skipped(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append('первая')
+    spool.append('вторая')
+    # повреждение данных первой записи: ее контрольная сумма не совпадает
+    with open(tmp_path / f'{1:010d}.seg', 'r+b') as file:
+        file.seek(FRAME_HEADER.size)
+        file.write(b'X')
+
+    assert read_all(spool) == []
+    assert spool.corrupted == 1 and not len(spool)
+    spool.append('третья')
+    assert read_all(spool) == ['третья']
+    spool.close()
+
+
+def test_spool_size_limit_drops_oldest(tmp_path):
+    spool = Spool(str(tmp_path), max_bytes=200, segment_bytes=50)
+    for index in range(50):
+        spool.append(f'запись {index:02d}')
+    messages = read_all(spool)
+    assert spool.dropped == 50 - len(messages)
+    assert messages == [f'запись {index:02d}' for index in range(50 - len(messages), 50)]
+    spool.close()
+
+
+def test_breaker_allows_one_probe_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # неудачная проба снова размыкает выключатель, успешная - замыкает
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow() and breaker.allow()
+
+
+def test_batched_record_is_spooled_per_event(tmp_path):
+    from cef_loggers.events import BaseEvent
+
+    sink = FlakySink()
+    sink.alive = False
+    handler = SpoolHandler(
+        sink,
+        str(tmp_path),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05),
+        replay_interval=0.01,
+    )
+
+    class SpoolEvent(BaseEvent):
+        SYSLOG_HEADER = False
+        EMITTERS = (handler,)
+
+    try:
+        assert SpoolEvent().emit_many({'msg': f'событие {index}'} for index in range(3)) == 3
+        sink.alive = True
+        assert wait_for(lambda: len(sink.messages) == 3 and not len(handler.spool))
+    finally:
+        handler.close()
+    # каждое событие пачки доставлено отдельным сообщением
+    assert [re.search(r'msg=(\S+ \d)', message)[1] for message in sink.messages] == [
+        f'событие {index}' for index in range(3)
+    ]
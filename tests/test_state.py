@@ -0,0 +1,103 @@
+"""
+Состояние аудита запроса (AuditState) при параллельных запросах в потоках.
+"""
+
+import logging
+import threading
+
+import pytest
+
+from cef_loggers.events import BaseEvent
+from cef_loggers.mixins import CEFLogMixin
+from cef_loggers.state import AuditState
+
+
+THREADS = 8
+REQUESTS = 15
+
+
+class EventsHandler(logging.Handler):
+    """
+    Сохраняет записи событий EventRecord без рендеринга.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def emit(self, record):
+        self.events.extend(record.events)
+
+
+@pytest.fixture
+def events(monkeypatch):
+    handler = EventsHandler()
+    monkeypatch.setattr(BaseEvent, 'EMITTERS', (handler,))
+    return handler.events
+
+
+def test_no_mutable_class_defaults():
+    for name in ('old_object', 'new_object', 'changed_fields', 'error', 'response', 'params'):
+        # атрибуты класса - дескрипторы, значения которых хранятся в audit_state экземпляра
+        assert not isinstance(CEFLogMixin.__dict__[name], (dict, list, set))
+    assert not hasattr(AuditState(), '__dict__')
+
+
+def test_state_defaults_without_dispatch():
+    view = CEFLogMixin()
+    assert view.old_object == {} and view.changed_fields == () and view.error is None
+    view.old_object['leak'] = True
+    assert CEFLogMixin().old_object == {}
+
+
+@pytest.mark.parametrize('prefix', ('cef', 'extend'))
+def test_concurrent_requests_do_not_leak_diffs(django_project, events, prefix):
+    from django.test import Client
+
+    from testapp.models import Item
+
+    items = [Item.objects.create(name='') for _ in range(THREADS)]
+    for item in items:
+        item.name = f'{prefix} {item.pk} step 0'
+        item.save()
+    barrier = threading.Barrier(THREADS)
+    failures = []
+
+    def patch_item(item):
+        client = Client()
+        try:
+            barrier.wait()
+            for step in range(1, REQUESTS + 1):
+                response = client.patch(
+                    f'/{prefix}/{item.pk}/',
+                    {'name': f'{prefix} {item.pk} step {step}'},
+                    content_type='application/json',
+                )
+                assert response.status_code == 200, response.content
+        except Exception as error:
+            failures.append(error)
+
+    threads = [threading.Thread(target=patch_item, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not failures
+
+    updates = [event for event in events if event['DeviceEventClassID'] == 'update']
+    assert len(updates) == THREADS * REQUESTS
+    seen = set()
+    for event in updates:
+        if prefix == 'extend':
+            pk, attribute, old, new = event['cs1'], event['cs2'], event['cs3'], event['cs4']
+        else:
+            attribute, old, new = event['cs1'], event['cs2'], event['cs3']
+            pk = new.split()[1]
+        # изменение относится к объекту запроса и к соседним шагам одного потока
+        assert attribute == 'name'
+        _, old_pk, _, old_step = old.split()
+        _, new_pk, _, new_step = new.split()
+        assert old_pk == new_pk == str(pk)
+        assert int(new_step) == int(old_step) + 1
+        seen.add((str(pk), new_step))
+    assert len(seen) == THREADS * REQUESTS
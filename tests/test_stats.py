@@ -0,0 +1,151 @@
+"""
+Статистика аудита (stats.py): границы ошибок скетчей, объединение и полнота top-K.
+"""
+
+import collections
+import json
+import random
+import time
+
+import pytest
+
+from cef_loggers.events import BaseEvent
+from cef_loggers.record import EventRecord
+from cef_loggers.render import render_record
+from cef_loggers.stats import AuditStats, CountMinSketch, HyperLogLog, SpaceSaving, StatsHandler
+
+
+def zipf_stream(seed, size=20_000, values=2_000):
+    """
+    Поток значений с распределением Ципфа: несколько частых значений и длинный хвост.
+    """
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, values + 1)]
+    return rng.choices([f'user {index}' for index in range(values)], weights, k=size)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_count_min_error_bound(seed):
+    stream = zipf_stream(seed)
+    sketch = CountMinSketch(width=512, depth=4)
+    for value in stream:
+        sketch.add(value)
+    bound = 2 * len(stream) / sketch.width
+    counts = collections.Counter(stream)
+    errors = [sketch.estimate(value) - count for value, count in counts.items()]
+    # оценка не бывает меньше настоящего количества, а граница нарушается с вероятностью 1/16
+    assert min(errors) >= 0
+    assert sum(error <= bound for error in errors) / len(errors) >= 1 - 0.5 ** sketch.depth
+
+
+def test_count_min_merge_equals_single_sketch():
+    first, second = zipf_stream(0, 5_000), zipf_stream(1, 5_000)
+    merged, left, right = CountMinSketch(), CountMinSketch(), CountMinSketch()
+    for value in first:
+        left.add(value)
+        merged.add(value)
+    for value in second:
+        right.add(value)
+        merged.add(value)
+    assert left.merge(right).cells == merged.cells
+    with pytest.raises(ValueError):
+        CountMinSketch(width=16).merge(CountMinSketch(width=32))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_space_saving_heavy_hitter_recall(seed):
+    stream = zipf_stream(seed)
+    summary = SpaceSaving(size=50)
+    for value in stream:
+        summary.add(value)
+    counts = collections.Counter(stream)
+    top = {value: (count, error) for value, count, error in summary.top()}
+    # каждое значение чаще n / k гарантированно в сводке
+    heavy = [value for value, count in counts.items() if count > len(stream) / summary.size]
+    assert heavy and all(value in top for value in heavy)
+    for value, (count, error) in top.items():
+        assert count - error <= counts[value] <= count
+
+
+def test_space_saving_merge_keeps_heavy_hitters():
+    first, second = zipf_stream(0, 10_000), zipf_stream(1, 10_000)
+    left, right = SpaceSaving(size=50), SpaceSaving(size=50)
+    for value in first:
+        left.add(value)
+    for value in second:
+        right.add(value)
+    merged = SpaceSaving.from_snapshot(left.snapshot()).merge(right)
+    expected = [value for value, _ in collections.Counter(first + second).most_common(5)]
+    assert [value for value, _, _ in merged.top(5)] == expected
+    assert len(merged.counters) == merged.size
+
+
+@pytest.mark.parametrize('size', (10, 1_000, 50_000))
+def test_hyperloglog_relative_error(size):
+    counter = HyperLogLog(precision=10)
+    for index in range(size):
+        counter.add(f'user {index}')
+    # три стандартных отклонения 1.04 / sqrt(2 ** precision)
+    assert abs(counter.count() - size) / size <= 3 * 1.04 / 2 ** 5
+
+
+def test_hyperloglog_merge_is_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for index in range(3_000):
+        (left if index < 2_000 else right).add(index)
+        union.add(index)
+    for index in range(1_000, 2_000):
+        right.add(index)
+    assert left.merge(right).registers == union.registers
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=8).merge(HyperLogLog(precision=10))
+
+
+def test_audit_stats_snapshot_round_trip_and_merge():
+    handlers = [StatsHandler(max_groups=2), StatsHandler(max_groups=2)]
+
+    class StatsEvent(BaseEvent):
+        EMITTERS = ()
+
+    stream = zipf_stream(0, 2_000, 50)
+    for index, user in enumerate(stream):
+        StatsEvent.EMITTERS = (handlers[index % 2],)
+        StatsEvent()(Name=f'view {index % 3}', suser=user)
+
+    snapshots = [json.loads(json.dumps(handler.snapshot(reset=True))) for handler in handlers]
+    assert handlers[0].stats.events == 0
+    total = AuditStats.from_snapshot(snapshots[0]).merge(AuditStats.from_snapshot(snapshots[1]))
+    assert total.events == len(stream)
+    assert total.top('suser', 1)[0][0] == collections.Counter(stream).most_common(1)[0][0]
+    assert total.count('Name', 'view 0') >= len(stream) // 3
+    # группы сверх max_groups объединяются в «*»
+    assert '*' in total.groups and len(total.groups) == total.max_groups + 1
+    users = {user for index, user in enumerate(stream) if index % 3 == 0}
+    assert total.distinct('view 0') == pytest.approx(len(users), rel=0.1)
+
+
+@pytest.mark.benchmark
+def test_stats_benchmark():
+    """
+    Стоимость учета события в статистике в сравнении с рендерингом CEF-сообщения.
+    """
+    records = [
+        EventRecord(
+            {
+                **BaseEvent.__fields__,
+                'Name': f'view {index % 20}',
+                'suser': user,
+                'src': f'10.0.0.{index % 200}',
+                'msg': 'Просмотр объекта',
+            }
+        )
+        for index, user in enumerate(zipf_stream(0, 10_000))
+    ]
+    stats = AuditStats()
+    results = {}
+    for name, call in (('AuditStats.add', stats.add), ('render_record', render_record)):
+        started = time.perf_counter()
+        for record in records:
+            call(record)
+        results[name] = (time.perf_counter() - started) / len(records) * 1e6
+    print(', '.join(f'{name}: {cost:.1f} мкс/событие' for name, cost in results.items()))
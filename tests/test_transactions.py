@@ -0,0 +1,105 @@
+"""
+Публикация событий после фиксации транзакции (transactional_cef_log).
+"""
+
+import pytest
+
+from cef_loggers.deferred import run_deferred
+from cef_loggers.transactions import TransactionBuffer
+
+
+class Rollback(Exception):
+    pass
+
+
+@pytest.fixture
+def item(django_project, monkeypatch):
+    from testapp.models import Item
+    from testapp.views import ItemViewSet
+
+    monkeypatch.setattr(ItemViewSet, 'transactional_cef_log', True)
+    run_deferred()
+    return Item.objects.create(name='старое')
+
+
+def patch_item(item, name):
+    from django.test import Client
+
+    response = Client().patch(
+        f'/cef/{item.pk}/', {'name': name}, content_type='application/json'
+    )
+    assert response.status_code == 200
+
+
+def updates(capture):
+    return capture.find(DeviceEventClassID='update')
+
+
+def test_published_after_commit(item, cef_capture):
+    from django.db import transaction
+
+    with transaction.atomic():
+        patch_item(item, 'новое')
+        # ответ закрыт, но транзакция еще не зафиксирована
+        assert not updates(cef_capture)
+    [event] = updates(cef_capture)
+    assert (event['cs3'], event['outcome']) == ('новое', 'success')
+    run_deferred()
+    assert len(updates(cef_capture)) == 1
+    cef_capture.assert_no_errors()
+
+
+def test_rollback_event_keeps_original_reason(item, cef_capture):
+    from django.db import transaction
+
+    with pytest.raises(Rollback), transaction.atomic():
+        patch_item(item, 'новое')
+        patch_item(item, 'еще новее')
+        raise Rollback
+    assert not cef_capture.events
+    run_deferred()
+
+    # по одному событию об отмене на запрос, с исходной причиной и новым externalId
+    first, second = cef_capture.events
+    for event, name in ((first, 'новое'), (second, 'еще новее')):
+        assert (event['outcome'], event['cs3'], event['cnt']) == ('failure', name, 1)
+        assert event['reason'] == TransactionBuffer.ROLLBACK_REASON
+        assert (event['cs5Label'], event['cs5']) == ('Исходная причина', 'None')
+    cef_capture.assert_external_ids_increasing()
+    item.refresh_from_db()
+    assert item.name == 'старое'
+
+
+def test_savepoint_rollback(item, cef_capture):
+    from django.db import transaction
+
+    from testapp.models import Item
+
+    other = Item.objects.create(name='другое')
+    with transaction.atomic():
+        with pytest.raises(Rollback), transaction.atomic():
+            patch_item(item, 'новое')
+            raise Rollback
+        patch_item(other, 'зафиксировано')
+    run_deferred()
+
+    failure, success = cef_capture.events
+    assert (failure['outcome'], failure['cs3']) == ('failure', 'новое')
+    assert (success['outcome'], success['cs3']) == ('success', 'зафиксировано')
+    cef_capture.assert_external_ids_increasing()
+
+
+def test_rollback_record_gets_new_external_id():
+    from cef_loggers.events import BaseEvent
+    from cef_loggers.utils import external_counter
+
+    record = BaseEvent().new_record()
+    record.update({'externalId': external_counter(), 'outcome': 'failure', 'reason': 'ошибка'})
+    rollback = TransactionBuffer(BaseEvent()).get_rollback_record([record, record.copy()])
+    assert rollback['externalId'] > record['externalId']
+    assert (rollback['reason'], rollback['cs5'], rollback['cnt']) == (
+        TransactionBuffer.ROLLBACK_REASON,
+        'ошибка',
+        2,
+    )
+    assert record['reason'] == 'ошибка'
@@ -0,0 +1,3 @@
+"""
+Django-приложение для тестов CEFLogMixin с запросами к ViewSet.
+"""
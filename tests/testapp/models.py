@@ -0,0 +1,39 @@
+"""
+Модели тестового приложения.
+"""
+
+from django.conf import settings
+from django.db import models
+
+
+class Profile(models.Model):
+    """
+    Профиль пользователя: из него CEFLogMixin берет suser.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile'
+    )
+    full_name = models.CharField(max_length=255)
+
+
+class Item(models.Model):
+    """
+    Модель, изменения которой логируются.
+    """
+
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, default='')
+    config = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        verbose_name = 'Тестовый объект'
+
+
+class Part(models.Model):
+    """
+    Связанная модель, объекты которой удаляются каскадно вместе с Item.
+    """
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='parts')
+    name = models.CharField(max_length=255, blank=True, default='')
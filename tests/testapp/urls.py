@@ -0,0 +1,15 @@
+from django.urls import path
+from rest_framework.routers import SimpleRouter
+
+from .views import CascadeItemViewSet, ExtendItemViewSet, ItemViewSet, page, stream
+
+
+router = SimpleRouter()
+router.register('cef', ItemViewSet, basename='cef')
+router.register('extend', ExtendItemViewSet, basename='extend')
+router.register('cascade', CascadeItemViewSet, basename='cascade')
+
+urlpatterns = router.urls + [
+    path('page/', page, name='page'),
+    path('stream/', stream, name='stream'),
+]
@@ -0,0 +1,75 @@
+"""
+ViewSet тестового приложения в разных режимах логирования.
+"""
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import serializers, viewsets
+from rest_framework.authentication import BaseAuthentication
+
+from cef_loggers.mixins import CEFLogMixin
+
+from .models import Item
+
+
+class FirstUserAuthentication(BaseAuthentication):
+    """
+    Все запросы выполняются от имени первого пользователя.
+    """
+
+    def authenticate(self, request):
+        return get_user_model().objects.first(), None
+
+
+class ItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Item
+        fields = ('id', 'name', 'description', 'config')
+
+
+class ItemViewSet(CEFLogMixin, viewsets.ModelViewSet):
+    """
+    Расширенный CEF-лог.
+    """
+
+    queryset = Item.objects.all()
+    serializer_class = ItemSerializer
+    authentication_classes = (FirstUserAuthentication,)
+    permission_classes = ()
+    names_for_logger = ('объект', 'объект', 'объектов')
+    cef_log = True
+
+    def get_log_instance(self):
+        return self.kwargs.get('pk')
+
+
+class ExtendItemViewSet(ItemViewSet):
+    """
+    Расширенный CEF-лог с is_extend_patch.
+    """
+
+    is_extend_patch = True
+
+
+class CascadeItemViewSet(ItemViewSet):
+    """
+    Расширенный CEF-лог с аудитом каскадного удаления.
+    """
+
+    cascade_cef_log = True
+    cascade_batch_size_for_cef_log = 2
+    cascade_max_events_for_cef_log = 2
+
+
+def page(request):
+    """
+    Django-представление без CEFLogMixin.
+    """
+    return HttpResponse('страница')
+
+
+def stream(request):
+    """
+    Django-представление с потоковым ответом.
+    """
+    return StreamingHttpResponse(iter((b'first', b'second')))
@@ -0,0 +1,145 @@
+"""
+Отправка лог-сообщений с учетом транзакций: события запроса публикуются одной пачкой
+после фиксации транзакции (transaction.on_commit), а вместо событий отмененной
+транзакции публикуется одно событие об ошибке.
+"""
+
+from functools import partial
+
+from .deferred import defer
+from .utils import LogLabels, Outcomes, external_counter
+
+
+# состояния записей в буфере
+PENDING, COMMITTED, PUBLISHED = 'pending', 'committed', 'published'
+
+
+class TransactionBuffer:
+    """
+    Записи событий одного запроса, ожидающие фиксации транзакции.
+
+    Записи формируются после выполнения представления, поэтому они относятся к транзакции,
+    открытой в этот момент: транзакции запроса (ATOMIC_REQUESTS) или транзакции и точке
+    сохранения (savepoint) вызывающего кода. Точки сохранения, которые представление открыло
+    и закрыло само, к этому моменту уже завершены.
+
+    Для каждой записи регистрируется свой on_commit, поэтому записи, добавленные в откаченной
+    точке сохранения, не подтверждаются, даже если внешняя транзакция зафиксирована.
+    Подтвержденные записи публикуются одной пачкой: обработчик пачки регистрируется в seal
+    после всех записей и вызывается Django после их подтверждения.
+    При закрытии ответа (finish) неподтвержденные записи, обработчиков которых больше нет
+    в очереди on_commit, считаются отмененными; если транзакция еще не завершена, проверка
+    повторяется после следующего запроса потока.
+    """
+
+    # причина ошибки в событии об отмене транзакции
+    ROLLBACK_REASON = 'Транзакция отменена'
+
+    def __init__(self, event, using=None):
+        """
+        Args:
+            event (BaseEvent): класс-событие, через который публикуются записи
+            using (str): псевдоним подключения к БД
+        """
+        self.event = event
+        self.using = using
+        self.records = []
+        self.states = []
+        self.callbacks = []
+        self.finished = False
+
+    def add(self, record):
+        """
+        Валидация записи и ее добавление в буфер до фиксации транзакции.
+        """
+        from django.db import transaction
+
+        try:
+            self.event.prepare_record(record)
+        except Exception as error:
+            return self.event.error_log(error)
+        callback = partial(self._commit, len(self.records))
+        self.records.append(record)
+        self.states.append(PENDING)
+        self.callbacks.append(callback)
+        transaction.on_commit(callback, using=self.using)
+
+    def seal(self):
+        """
+        Регистрация публикации пачки после добавления всех записей запроса.
+        """
+        from django.db import transaction
+
+        if self.records:
+            transaction.on_commit(self.flush, using=self.using)
+            defer(self.finish)
+
+    def flush(self):
+        """
+        Публикация подтвержденных записей одним LogRecord.
+        """
+        records = []
+        for index, state in enumerate(self.states):
+            if state == COMMITTED:
+                self.states[index] = PUBLISHED
+                records.append(self.records[index])
+        if records:
+            try:
+                self.event.publish(*records)
+            except Exception as error:
+                self.event.error_log(error)
+
+    def finish(self):
+        """
+        Проверка буфера после отправки ответа: публикация подтвержденных записей
+        и одно событие об ошибке вместо записей отмененных транзакций.
+        Записи транзакций, которые еще не завершены, публикуются при их фиксации,
+        а их отмена обнаруживается при повторной проверке.
+        """
+        self.flush()
+        self.finished = True
+        rolled_back, waiting = [], False
+        for index, state in enumerate(self.states):
+            if state != PENDING:
+                continue
+            if self._is_waiting(self.callbacks[index]):
+                waiting = True
+            else:
+                self.states[index] = PUBLISHED
+                rolled_back.append(self.records[index])
+        if rolled_back:
+            self.event.log_record(self.get_rollback_record(rolled_back))
+        if waiting:
+            # отмену транзакции Django не сообщает: записи проверяются снова позже
+            defer(self.finish)
+
+    def get_rollback_record(self, records):
+        """
+        Событие об ошибке на основе первой отмененной записи с количеством отмененных событий.
+        Исходная причина записи сохраняется в cs5, а externalId назначается новый.
+        """
+        record = records[0].copy()
+        record['cs5Label'] = LogLabels.original_reason
+        record['cs5'] = record.get(Outcomes.reason)
+        record[Outcomes.outcome] = Outcomes.failure
+        record[Outcomes.reason] = self.ROLLBACK_REASON
+        record['cnt'] = len(records)
+        if 'externalId' in record:
+            record['externalId'] = external_counter()
+        return record
+
+    def _commit(self, index):
+        self.states[index] = COMMITTED
+        if self.finished:
+            self.flush()
+
+    def _is_waiting(self, callback):
+        """
+        Обработчик еще в очереди on_commit, то есть транзакция записи не завершена.
+        """
+        from django.db import transaction
+
+        connection = transaction.get_connection(self.using)
+        return connection.in_atomic_block and any(
+            item[1] is callback for item in connection.run_on_commit
+        )
@@ -4,11 +4,11 @@
 
 import multiprocessing
 import socket
+import threading
 
+from functools import lru_cache
 from os import getenv
 
-from rest_framework import status
-
 
 # Уровень логирования в системе
 DJANGO_LOG_LEVEL = getenv('DJANGO_LOG_LEVEL', 'DEBUG')
@@ -55,6 +55,39 @@ class ExternalCounter:
             return self._external_value
 
 
+class LazyEvent:
+    """
+    Экземпляр класса-события, который создается при первом обращении к нему.
+    """
+
+    def __init__(self, factory):
+        """
+        factory - функция без аргументов, возвращающая экземпляр класса-события.
+        """
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        return self.get_instance()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.get_instance(), name)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._instance!r})'
+
+    def get_instance(self):
+        """
+        Создание экземпляра при первом обращении.
+        """
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+
 class LogLevels:
     """
     Уровни логирования в системе.
@@ -125,10 +158,19 @@ class Outcomes:
         """
         Получение словаря outcome на основе response.
         """
+        from rest_framework import status
+
         if error:
             return {cls.outcome: cls.failure, cls.reason: error}
         if not status.is_success(response.status_code):
-            return {cls.outcome: cls.failure, cls.reason: response.data}
+            # у ответов Django, в отличие от ответов DRF, нет data
+            reason = getattr(response, 'data', None)
+            # ReturnDict и ReturnList ссылаются на сериализатор, а через него на запрос и ViewSet
+            if isinstance(reason, dict):
+                reason = dict(reason)
+            elif isinstance(reason, list):
+                reason = list(reason)
+            return {cls.outcome: cls.failure, cls.reason: reason}
         return {cls.outcome: cls.success, cls.reason: 'None'}
 
 
@@ -141,6 +183,12 @@ class LogLabels:
     old_value = 'Старое значение'
     attribute_name = 'Наименование атрибута'
     object_name = 'Наименование объекта'
+    model_name = 'Модель'
+    models = 'Модели'
+    identifiers = 'Идентификаторы'
+    objects_count = 'Количество объектов'
+    omitted_count = 'Объектов вне лога'
+    original_reason = 'Исходная причина'
 
 
 class SeverityLevels:
@@ -264,8 +312,9 @@ def get_dhost(request):
     return ''.join([host, path_info]) if host and path_info else ''
 
 
+@lru_cache(maxsize=None)
 def get_dst():
-    """Метод для получения IP-адреса сервера
+    """Метод для получения IP-адреса сервера. Значение вычисляется один раз на процесс.
 
     Returns:
         str: строка с IP-адреса сервера